@@ -1,47 +1,104 @@
-from orchestrator.agent_state import ExpandedContentResponse, PPTAgentState
-from app.dependencies import llm as get_llm, get_rag_pipeline
+import asyncio
+from orchestrator.agent_state import (
+    Bulletslides,
+    ContentExpansion,
+    ExpandedContentResponse,
+    PPTAgentState,
+)
+from app.dependencies import llm as get_llm
+from app.config import EXPAND_CONTEXT_TOKENS
+from utils.metrics import agent_tags
+from agents.retrieval_agent import get_slide_contexts, build_context
 
 
-def ContentExpansionAgent(state: PPTAgentState) -> PPTAgentState:
-    """Expand bullet points into detailed content"""
+def _slide_text(slide: Bulletslides, rag_context: str = None) -> str:
+    text = f"Slide: {slide.title}\nBullet Points:\n" + "\n".join(
+        f"- {point}" for point in slide.bullet_points
+    )
+    if rag_context:
+        text += f"\nKnowledge Base Information:\n{rag_context}"
+    return text
 
-    outline = state.outline
-    topic = state.topic
 
-    # Get RAG context once
-    rag_context = ""
-    try:
-        rag = get_rag_pipeline()
-        relevant_docs = rag.query(topic)
-        rag_context = "\n\n".join([doc.page_content for doc in relevant_docs[:5]])
-    except:
-        pass
+def _expansion_prompt(slides_text: str, topic: str, rag_context: str = "") -> str:
+    knowledge = f"\n\nKnowledge Base Information:\n{rag_context}" if rag_context else ""
+    return f"""Expand each bullet point into 10-20 words factual sentences.
 
-    # Use structured output
-    llm = get_llm()
-    structured_llm = llm.with_structured_output(ExpandedContentResponse)
+Topic: {topic}
+
+{slides_text}{knowledge}
+
+Keep content accurate and presentation-ready."""
+
+
+def _deck_prompt(state: PPTAgentState) -> str:
+    # Each slide carries its own retrieved context
+    contexts = [
+        build_context(state, f"expand/{i}", chunks, EXPAND_CONTEXT_TOKENS)
+        for i, chunks in enumerate(get_slide_contexts(state))
+    ]
 
     # Build slides text
     slides_text = "\n\n".join(
-        [
-            f"Slide: {slide.title}\nBullet Points:\n"
-            + "\n".join(f"- {point}" for point in slide.bullet_points)
-            for slide in outline.slides
-        ]
+        _slide_text(slide, rag_context)
+        for slide, rag_context in zip(state.outline.slides, contexts)
     )
 
-    prompt = f"""Expand each bullet point into 10-20 words factual sentences.
+    return _expansion_prompt(slides_text, state.topic)
 
-Topic: {topic}
 
-{slides_text}
+def ContentExpansionAgent(state: PPTAgentState) -> PPTAgentState:
+    """Expand bullet points into detailed content"""
 
-Knowledge Base Information:
-{rag_context}
+    prompt = _deck_prompt(state)
 
-Keep content accurate and presentation-ready."""
+    # Use structured output
+    llm = get_llm(use_cache=state.use_cache)
+    structured_llm = llm.with_structured_output(ExpandedContentResponse)
 
     result = structured_llm.invoke(prompt)
 
     state.expanded_content = result.slides
     return state
+
+
+async def ContentExpansionAgentAsync(state: PPTAgentState) -> PPTAgentState:
+    """Expand bullet points into detailed content (async)"""
+
+    prompt = await asyncio.to_thread(_deck_prompt, state)
+
+    llm = get_llm(use_cache=state.use_cache)
+    structured_llm = llm.with_structured_output(ExpandedContentResponse)
+
+    result = await structured_llm.ainvoke(prompt)
+
+    state.expanded_content = result.slides
+    return state
+
+
+def expand_slide(
+    slide: Bulletslides, topic: str, rag_context: str, use_cache: bool = True
+) -> ContentExpansion:
+    """Expand the bullet points of a single slide"""
+
+    llm = get_llm(use_cache=use_cache)
+    structured_llm = llm.with_structured_output(ContentExpansion).with_config(
+        tags=agent_tags("expand")
+    )
+
+    prompt = _expansion_prompt(_slide_text(slide), topic, rag_context)
+    return structured_llm.invoke(prompt)
+
+
+async def aexpand_slide(
+    slide: Bulletslides, topic: str, rag_context: str, use_cache: bool = True
+) -> ContentExpansion:
+    """Expand the bullet points of a single slide (async)"""
+
+    llm = get_llm(use_cache=use_cache)
+    structured_llm = llm.with_structured_output(ContentExpansion).with_config(
+        tags=agent_tags("expand")
+    )
+
+    prompt = _expansion_prompt(_slide_text(slide), topic, rag_context)
+    return await structured_llm.ainvoke(prompt)
@@ -1,16 +1,27 @@
 from orchestrator.agent_state import PPTAgentState
 from utils.ppt_generator import create_presentation
+from utils.metrics import EXPORT_SECONDS
+from utils.tracing import span
+import asyncio
 import os
 
 
-def ExportAgent(state: PPTAgentState, output_dir: str = "outputs") -> PPTAgentState:
+def ExportAgent(state: PPTAgentState, output_dir: str = None) -> PPTAgentState:
     """Export presentation to PowerPoint and draft text file"""
 
+    # Runs with their own output directory (e.g. API jobs) keep the draft there too
+    output_dir = output_dir or state.output_dir or "outputs"
+    draft_path = (
+        os.path.join(state.output_dir, "draft.txt")
+        if state.output_dir
+        else "data/draft.txt"
+    )
+
     os.makedirs(output_dir, exist_ok=True)
-    os.makedirs("data", exist_ok=True)
+    os.makedirs(os.path.dirname(draft_path), exist_ok=True)
 
     # Save draft
-    with open("data/draft.txt", "w", encoding="utf-8") as f:
+    with open(draft_path, "w", encoding="utf-8") as f:
         f.write(f"PRESENTATION: {state.topic}\n{'=' * 80}\n\n")
 
         for i, slide in enumerate(state.validation_results, 1):
@@ -24,7 +35,15 @@ def ExportAgent(state: PPTAgentState, output_dir: str = "outputs") -> PPTAgentSt
 
     # Export PowerPoint
     ppt_path = os.path.join(output_dir, "generated_ppt.pptx")
-    create_presentation(state.validation_results, ppt_path, state.topic)
+    with span(
+        "create_presentation", slides=len(state.validation_results)
+    ), EXPORT_SECONDS.time():
+        create_presentation(state.validation_results, ppt_path, state.topic)
 
-    print(f"✓ Exported: data/draft.txt and {ppt_path}")
+    print(f"✓ Exported: {draft_path} and {ppt_path}")
     return state
+
+
+async def ExportAgentAsync(state: PPTAgentState) -> PPTAgentState:
+    """Export presentation without blocking the event loop"""
+    return await asyncio.to_thread(ExportAgent, state)
@@ -1,27 +1,22 @@
-from app.dependencies import llm as get_llm, get_rag_pipeline
+import asyncio
+from app.dependencies import llm as get_llm
 from orchestrator.agent_state import BulletslidesResponse, PPTAgentState
+from app.config import OUTLINE_CONTEXT_TOKENS
+from agents.retrieval_agent import get_context, build_context
 
 
-def OutlineAgent(state: PPTAgentState) -> PPTAgentState:
-    """Generates the outline"""
-
+def _outline_prompt(state: PPTAgentState) -> str:
     topic = state.topic
     slides = state.slides
 
     rag_content = "No relevant documents found."
-    try:
-        rag = get_rag_pipeline()
-        relevant_docs = rag.query(topic)
-        if relevant_docs:
-            rag_content = "\n\n".join([doc.page_content for doc in relevant_docs[:5]])
-    except Exception:
-        pass
-
-    # Use structured output with BulletslidesResponse
-    llm = get_llm()
-    structured_llm = llm.with_structured_output(BulletslidesResponse)
+    relevant_chunks = get_context(state)
+    if relevant_chunks:
+        rag_content = build_context(
+            state, "outline", relevant_chunks, OUTLINE_CONTEXT_TOKENS
+        )
 
-    prompt = f"""You are an experienced outline designer.
+    return f"""You are an experienced outline designer.
 
 Generate a concise, structured outline of EXACTLY {slides} slides about: {topic}
 
@@ -35,9 +30,32 @@ Create {slides} slides with:
 
 If content is insufficient, distribute available information evenly across all {slides} slides."""
 
+
+def OutlineAgent(state: PPTAgentState) -> PPTAgentState:
+    """Generates the outline"""
+
+    prompt = _outline_prompt(state)
+
+    # Use structured output with BulletslidesResponse
+    llm = get_llm(use_cache=state.use_cache)
+    structured_llm = llm.with_structured_output(BulletslidesResponse)
+
     # This returns a BulletslidesResponse object automatically
     result = structured_llm.invoke(prompt)
 
     # Update state with outline
     state.outline = result
     return state
+
+
+async def OutlineAgentAsync(state: PPTAgentState) -> PPTAgentState:
+    """Generates the outline (async)"""
+
+    # Retrieval is blocking, keep it off the event loop
+    prompt = await asyncio.to_thread(_outline_prompt, state)
+
+    llm = get_llm(use_cache=state.use_cache)
+    structured_llm = llm.with_structured_output(BulletslidesResponse)
+
+    state.outline = await structured_llm.ainvoke(prompt)
+    return state
@@ -0,0 +1,151 @@
+import asyncio
+from typing import List, Optional
+from orchestrator.agent_state import Bulletslides, PPTAgentState, RetrievedChunk
+from app.dependencies import get_rag_pipeline
+from app.config import (
+    SLIDE_CONTEXT_K,
+    CONTEXT_MMR_LAMBDA,
+    CONTEXT_DUPLICATE_THRESHOLD,
+)
+from rag_pipeline.context_packer import PackedContext, pack_context
+
+
+def _to_chunks(results) -> List[RetrievedChunk]:
+    return [
+        RetrievedChunk(
+            id=doc.id,
+            content=doc.page_content,
+            metadata=dict(doc.metadata),
+            score=float(score),
+        )
+        for doc, score in results
+    ]
+
+
+def _search(query: str, k: int, corpus_id: str = None) -> List[RetrievedChunk]:
+    try:
+        rag = get_rag_pipeline(corpus_id)
+        results = rag.query_with_scores(query, k=k)
+    except Exception:
+        return []
+
+    return _to_chunks(results)
+
+
+def _search_batch(
+    queries: List[str], k: int, corpus_id: str = None
+) -> List[List[RetrievedChunk]]:
+    try:
+        rag = get_rag_pipeline(corpus_id)
+        results = rag.query_batch_with_scores(queries, k=k)
+    except Exception:
+        return [[] for _ in queries]
+
+    return [_to_chunks(hits) for hits in results]
+
+
+def RetrievalAgent(state: PPTAgentState) -> PPTAgentState:
+    """Retrieve knowledge base context once for the whole run"""
+
+    state.retrieved_context = _search(state.topic, 5, state.corpus_id)
+    return state
+
+
+async def RetrievalAgentAsync(state: PPTAgentState) -> PPTAgentState:
+    """Retrieve knowledge base context once for the whole run (async)"""
+
+    state.retrieved_context = await asyncio.to_thread(
+        _search, state.topic, 5, state.corpus_id
+    )
+    return state
+
+
+def get_context(
+    state: PPTAgentState, query: Optional[str] = None, k: int = 5
+) -> List[RetrievedChunk]:
+    """
+    Return chunks for a query (defaults to the topic).
+    Results are read from / stored in the state so each lookup runs once per run.
+    """
+    if query is None or query == state.topic:
+        if state.retrieved_context is None:
+            state.retrieved_context = _search(state.topic, k, state.corpus_id)
+        return state.retrieved_context
+
+    if query not in state.retrieval_cache:
+        state.retrieval_cache[query] = _search(query, k, state.corpus_id)
+    return state.retrieval_cache[query]
+
+
+def _slide_query(slide: Bulletslides) -> str:
+    return f"{slide.title}: " + "; ".join(slide.bullet_points)
+
+
+def retrieve_slide_contexts(
+    slides: List[Bulletslides], k: int = SLIDE_CONTEXT_K, corpus_id: str = None
+) -> List[List[RetrievedChunk]]:
+    """
+    Retrieve up to k chunks per slide with one batched search over all
+    slide queries. A chunk matching several slides goes only to the slide
+    it is closest to.
+    """
+    # Over-fetch so slides still get k chunks after deduplication
+    results = _search_batch([_slide_query(slide) for slide in slides], k * 2, corpus_id)
+
+    best = {}
+    for index, chunks in enumerate(results):
+        for chunk in chunks:
+            if chunk.content not in best or chunk.score < best[chunk.content][0]:
+                best[chunk.content] = (chunk.score, index)
+
+    return [
+        [chunk for chunk in chunks if best[chunk.content][1] == index][:k]
+        for index, chunks in enumerate(results)
+    ]
+
+
+def get_slide_contexts(state: PPTAgentState) -> List[List[RetrievedChunk]]:
+    """
+    Chunks for each outline slide, falling back to the topic context when
+    per-slide retrieval is disabled or found nothing for a slide.
+    """
+    slides = state.outline.slides if state.outline else []
+    if SLIDE_CONTEXT_K <= 0:
+        return [get_context(state)] * len(slides)
+
+    if state.slide_contexts is None:
+        state.slide_contexts = retrieve_slide_contexts(
+            slides, SLIDE_CONTEXT_K, state.corpus_id
+        )
+
+    return [chunks or get_context(state) for chunks in state.slide_contexts]
+
+
+def pack_chunks(
+    chunks: List[RetrievedChunk], budget: int, corpus_id: str = None
+) -> PackedContext:
+    """Pack chunks into a token budget, using their stored vectors for MMR"""
+    vectors = None
+    ids = [chunk.id for chunk in chunks]
+    if chunks and all(ids):
+        try:
+            vectors = get_rag_pipeline(corpus_id).chunk_vectors(ids)
+        except Exception:
+            vectors = None
+
+    return pack_context(
+        chunks,
+        budget,
+        vectors=vectors,
+        lambda_mult=CONTEXT_MMR_LAMBDA,
+        duplicate_threshold=CONTEXT_DUPLICATE_THRESHOLD,
+    )
+
+
+def build_context(
+    state: PPTAgentState, name: str, chunks: List[RetrievedChunk], budget: int
+) -> str:
+    """Prompt context block for one agent call, recording its packing stats"""
+    packed = pack_chunks(chunks, budget, state.corpus_id)
+    state.context_stats[name] = packed.stats()
+    return packed.text
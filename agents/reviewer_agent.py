@@ -1,37 +1,23 @@
-from orchestrator.agent_state import PPTAgentState, SlideValidation
-from app.dependencies import llm as get_llm, get_rag_pipeline
+import asyncio
+from orchestrator.agent_state import (
+    ContentExpansion,
+    PPTAgentState,
+    SlideValidation,
+    ValidationPoint,
+)
+from app.dependencies import llm as get_llm
+from app.config import REVIEW_CONCURRENCY, REVIEW_MAX_RETRIES, REVIEW_CONTEXT_TOKENS
+from utils.metrics import agent_tags
+from agents.retrieval_agent import get_context, get_slide_contexts, build_context
 
 
-def ReviewerAgent(state: PPTAgentState) -> PPTAgentState:
-    """Review and validate expanded content for accuracy"""
-    expanded_content = state.expanded_content
-    topic = state.topic
-
-    # Get RAG context once for all validations
-    rag_context = ""
-    try:
-        rag = get_rag_pipeline()
-        relevant_docs = rag.query(topic)
-        rag_context = "\n\n".join([doc.page_content for doc in relevant_docs[:5]])
-    except:
-        pass
+def _review_prompt(slide, topic: str, rag_context: str) -> str:
+    # Build single slide text
+    slide_text = f"Slide: {slide.title}\nContent:\n" + "\n".join(
+        f"- {point}" for point in slide.detailed_points
+    )
 
-    # Use structured output for validation
-    llm = get_llm()
-
-    # Loop through each slide and validate individually
-    all_validations = []
-
-    for slide in expanded_content:
-        # Build single slide text
-        slide_text = f"Slide: {slide.title}\nContent:\n" + "\n".join(
-            f"- {point}" for point in slide.detailed_points
-        )
-
-        # Create structured LLM for single slide validation
-        structured_llm = llm.with_structured_output(SlideValidation)
-
-        prompt = f"""Review each statement in this slide for factual accuracy.
+    return f"""Review each statement in this slide for factual accuracy.
 
 Topic: {topic}
 
@@ -46,8 +32,122 @@ For each statement, validate if it's factually correct and supported by the refe
 
 Validate all statements in this slide."""
 
-        result = structured_llm.invoke(prompt)
+
+def _unreviewed(slide, error) -> SlideValidation:
+    """Fallback when a slide could not be validated: flag every point for review"""
+    return SlideValidation(
+        title=slide.title,
+        validation=[
+            ValidationPoint(
+                point=point,
+                status="needs_review",
+                reason=f"Automatic review failed: {error}",
+            )
+            for point in slide.detailed_points
+        ],
+    )
+
+
+def _structured_reviewer(use_cache: bool = True):
+    llm = get_llm(use_cache=use_cache)
+    return (
+        llm.with_structured_output(SlideValidation)
+        .with_retry(stop_after_attempt=REVIEW_MAX_RETRIES + 1)
+        .with_config(tags=agent_tags("review"))
+    )
+
+
+def _review_contexts(state: PPTAgentState):
+    """Per-slide contexts aligned with the expanded slides"""
+    slide_chunks = get_slide_contexts(state)[: len(state.expanded_content)]
+    missing = len(state.expanded_content) - len(slide_chunks)
+    if missing > 0:
+        slide_chunks += [get_context(state)] * missing
+    return [
+        build_context(state, f"review/{i}", chunks, REVIEW_CONTEXT_TOKENS)
+        for i, chunks in enumerate(slide_chunks)
+    ]
+
+
+def _collect(expanded_content, results):
+    all_validations = []
+    for slide, result in zip(expanded_content, results):
+        if isinstance(result, Exception) or result is None:
+            result = _unreviewed(slide, result or "empty response")
         all_validations.append(result)
+    return all_validations
+
 
-    state.validation_results = all_validations
+def ReviewerAgent(state: PPTAgentState) -> PPTAgentState:
+    """Review and validate expanded content for accuracy"""
+    expanded_content = state.expanded_content
+    topic = state.topic
+
+    # Validate each slide against the context retrieved for it
+    contexts = _review_contexts(state)
+
+    # Use structured output for validation, built once for all slides
+    structured_llm = _structured_reviewer(state.use_cache)
+
+    # Validate slides concurrently; batch() keeps results in slide order
+    prompts = [
+        _review_prompt(slide, topic, rag_context)
+        for slide, rag_context in zip(expanded_content, contexts)
+    ]
+    results = structured_llm.batch(
+        prompts,
+        config={"max_concurrency": REVIEW_CONCURRENCY},
+        return_exceptions=True,
+    )
+
+    state.validation_results = _collect(expanded_content, results)
+    return state
+
+
+async def ReviewerAgentAsync(state: PPTAgentState) -> PPTAgentState:
+    """Review and validate expanded content for accuracy (async)"""
+    expanded_content = state.expanded_content
+    topic = state.topic
+
+    contexts = await asyncio.to_thread(_review_contexts, state)
+
+    structured_llm = _structured_reviewer(state.use_cache)
+
+    prompts = [
+        _review_prompt(slide, topic, rag_context)
+        for slide, rag_context in zip(expanded_content, contexts)
+    ]
+    results = await structured_llm.abatch(
+        prompts,
+        config={"max_concurrency": REVIEW_CONCURRENCY},
+        return_exceptions=True,
+    )
+
+    state.validation_results = _collect(expanded_content, results)
     return state
+
+
+def review_slide(
+    slide: ContentExpansion, topic: str, rag_context: str, use_cache: bool = True
+) -> SlideValidation:
+    """Validate a single expanded slide"""
+
+    structured_llm = _structured_reviewer(use_cache)
+    try:
+        result = structured_llm.invoke(_review_prompt(slide, topic, rag_context))
+    except Exception as e:
+        return _unreviewed(slide, e)
+    return result if result is not None else _unreviewed(slide, "empty response")
+
+
+async def areview_slide(
+    slide: ContentExpansion, topic: str, rag_context: str, use_cache: bool = True
+) -> SlideValidation:
+    """Validate a single expanded slide (async)"""
+
+    structured_llm = _structured_reviewer(use_cache)
+    try:
+        result = await structured_llm.ainvoke(_review_prompt(slide, topic, rag_context))
+    except Exception as e:
+        return _unreviewed(slide, e)
+    return result if result is not None else _unreviewed(slide, "empty response")
@@ -0,0 +1,61 @@
+import asyncio
+from orchestrator.agent_state import PPTAgentState, SlideResult, SlideTask
+from app.config import EXPAND_CONTEXT_TOKENS, REVIEW_CONTEXT_TOKENS
+from agents.content_expansion_agent import expand_slide, aexpand_slide
+from agents.reviewer_agent import review_slide, areview_slide
+from agents.retrieval_agent import pack_chunks
+
+
+def _pack_contexts(task: SlideTask):
+    """Expansion and review contexts of the slide, with their packing stats"""
+    expand = pack_chunks(task.context_chunks, EXPAND_CONTEXT_TOKENS, task.corpus_id)
+    review = pack_chunks(task.context_chunks, REVIEW_CONTEXT_TOKENS, task.corpus_id)
+    stats = {
+        f"expand/{task.index}": expand.stats(),
+        f"review/{task.index}": review.stats(),
+    }
+    return expand.text, review.text, stats
+
+
+def SlideAgent(task: SlideTask) -> dict:
+    """Expand and review a single slide (one branch of the slide-parallel graph)"""
+
+    expand_context, review_context, stats = _pack_contexts(task)
+    expanded = expand_slide(task.slide, task.topic, expand_context, task.use_cache)
+    validation = review_slide(expanded, task.topic, review_context, task.use_cache)
+
+    return {
+        "slide_results": [
+            SlideResult(index=task.index, expanded=expanded, validation=validation)
+        ],
+        "context_stats": stats,
+    }
+
+
+async def SlideAgentAsync(task: SlideTask) -> dict:
+    """Expand and review a single slide (async)"""
+
+    expand_context, review_context, stats = await asyncio.to_thread(
+        _pack_contexts, task
+    )
+    expanded = await aexpand_slide(
+        task.slide, task.topic, expand_context, task.use_cache
+    )
+    validation = await areview_slide(
+        expanded, task.topic, review_context, task.use_cache
+    )
+
+    return {
+        "slide_results": [
+            SlideResult(index=task.index, expanded=expanded, validation=validation)
+        ],
+        "context_stats": stats,
+    }
+
+
+def CollectSlidesAgent(state: PPTAgentState) -> PPTAgentState:
+    """Join per-slide results back into outline order"""
+
+    state.expanded_content = [result.expanded for result in state.slide_results]
+    state.validation_results = [result.validation for result in state.slide_results]
+    return state
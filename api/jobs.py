@@ -0,0 +1,267 @@
+import asyncio
+import os
+import shutil
+import time
+import uuid
+from collections import deque
+from typing import Optional
+
+from orchestrator.ppt_graph import astream_ppt_events
+from rag_pipeline.corpus import ingest_corpus
+from utils.tracing import trace, span
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no room for another job"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Job queue is full")
+        self.retry_after = retry_after
+
+
+def expired(finished_at: dict, ttl: float, max_finished: int, now: float = None):
+    """
+    Keys of finished_at ({key: finish time}) past the TTL (0 = no TTL), plus
+    the oldest beyond the max_finished most recent
+    """
+    now = time.time() if now is None else now
+    ordered = sorted(finished_at, key=finished_at.get)
+    excess = max(0, len(ordered) - max_finished)
+    return [
+        key
+        for n, key in enumerate(ordered)
+        if n < excess or (ttl > 0 and now - finished_at[key] > ttl)
+    ]
+
+
+class Job:
+    """A presentation generation request running in the background"""
+
+    def __init__(
+        self,
+        topic: str,
+        slides: int,
+        context: str,
+        upload_dir: Optional[str],
+        output_root: str = "outputs",
+        use_cache: bool = True,
+        profile: bool = False,
+        corpus_id: Optional[str] = None,
+    ):
+        self.job_id = str(uuid.uuid4())
+        self.topic = topic
+        self.slides = slides
+        self.context = context
+        self.upload_dir = upload_dir
+        self.use_cache = use_cache
+        self.profile = profile
+        self.corpus_id = corpus_id
+        self.trace_id = None
+        self.output_dir = os.path.join(output_root, self.job_id)
+
+        self.status = "queued"  # queued | running | completed | failed | cancelled
+        self.stage = None
+        self.completed_stages = []
+        self.progress = 0.0
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.task = None
+
+    @property
+    def ppt_path(self) -> str:
+        return os.path.join(self.output_dir, "generated_ppt.pptx")
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def to_dict(self, position: Optional[int] = None) -> dict:
+        data = {
+            "job_id": self.job_id,
+            "topic": self.topic,
+            "status": self.status,
+            "stage": self.stage,
+            "completed_stages": self.completed_stages,
+            "progress": self.progress,
+            "queue_position": position,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.corpus_id:
+            data["corpus_id"] = self.corpus_id
+        if self.trace_id:
+            data["trace_id"] = self.trace_id
+        if self.error:
+            data["error"] = self.error
+        if self.status == "completed":
+            data["download_url"] = f"/download/{self.job_id}"
+        return data
+
+
+class JobManager:
+    """
+    Bounded queue of generation jobs served by a fixed pool of async workers.
+    Finished jobs are kept for `ttl` seconds (at most `max_finished` of them),
+    then forgotten along with their output directory.
+    """
+
+    def __init__(
+        self,
+        concurrency: int,
+        queue_depth: int,
+        on_complete=None,
+        on_prune=None,
+        ttl: float = 3600,
+        max_finished: int = 100,
+    ):
+        self.concurrency = concurrency
+        self.queue_depth = queue_depth
+        self.on_complete = on_complete
+        self.on_prune = on_prune
+        self.ttl = ttl
+        self.max_finished = max_finished
+        self.jobs = {}
+        self._pending = deque()
+        self._queue = None
+        self._workers = []
+        self._durations = deque(maxlen=20)
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_depth)
+        self._workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+        if self.ttl > 0:
+            self._workers.append(asyncio.create_task(self._prune_periodically()))
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, job: Job) -> Job:
+        """Queue a job, raising QueueFullError when the queue is at capacity"""
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise QueueFullError(self.retry_after())
+        self.jobs[job.job_id] = job
+        self._pending.append(job.job_id)
+        return job
+
+    def position(self, job_id: str) -> Optional[int]:
+        """1-based position among queued jobs (None once the job has started)"""
+        try:
+            return self._pending.index(job_id) + 1
+        except ValueError:
+            return None
+
+    def retry_after(self) -> int:
+        """Rough seconds until a queue slot frees up, from recent job durations"""
+        average = (
+            sum(self._durations) / len(self._durations) if self._durations else 30.0
+        )
+        return max(1, int(average * max(1, len(self._pending)) / self.concurrency))
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return False
+
+        if job.status == "queued":
+            # The worker skips cancelled jobs when it dequeues them
+            self._pending.remove(job_id)
+            self._finish(job, "cancelled")
+        elif job.task is not None:
+            job.task.cancel()
+        return True
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status != "queued":
+                    continue
+                self._pending.remove(job.job_id)
+                job.task = asyncio.create_task(self._run(job))
+                try:
+                    await job.task
+                except asyncio.CancelledError:
+                    if not job.task.cancelled():
+                        raise  # the worker itself is shutting down
+                    self._finish(job, "cancelled")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            with trace("job", profile=job.profile, job_id=job.job_id) as job_trace:
+                job.trace_id = job_trace.trace_id if job_trace else None
+                if job.upload_dir:
+                    job.stage = "ingest"
+                    with span("ingest"):
+                        job.corpus_id = await asyncio.to_thread(
+                            ingest_corpus, job.upload_dir
+                        )
+                    job.completed_stages.append("ingest")
+
+                async for event in astream_ppt_events(
+                    topic=job.topic,
+                    slides=job.slides,
+                    context=job.context,
+                    output_dir=job.output_dir,
+                    use_cache=job.use_cache,
+                    corpus_id=job.corpus_id,
+                ):
+                    if event["event"] == "stage_started":
+                        job.stage = event["stage"]
+                    elif event["event"] == "stage_finished" and "slide" not in event:
+                        job.completed_stages.append(event["stage"])
+                    job.progress = event.get("progress", job.progress)
+
+            self._durations.append(time.time() - job.started_at)
+            self._finish(job, "completed")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            job.error = str(e)
+            self._finish(job, "failed")
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        if job.upload_dir:
+            shutil.rmtree(job.upload_dir, ignore_errors=True)
+        if self.on_complete is not None:
+            self.on_complete(job)
+        self.prune()
+
+    def prune(self, now: float = None) -> int:
+        """
+        Forget finished jobs past the TTL, and the oldest ones beyond
+        max_finished, deleting their outputs; returns how many were removed
+        """
+        finished = {
+            job_id: job.finished_at for job_id, job in self.jobs.items() if job.finished
+        }
+        removed = [
+            self.jobs[job_id]
+            for job_id in expired(finished, self.ttl, self.max_finished, now)
+        ]
+        for job in removed:
+            del self.jobs[job.job_id]
+            shutil.rmtree(job.output_dir, ignore_errors=True)
+            if self.on_prune is not None:
+                self.on_prune(job)
+        return len(removed)
+
+    async def _prune_periodically(self):
+        while True:
+            await asyncio.sleep(min(self.ttl, 60))
+            self.prune()
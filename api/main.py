@@ -1,26 +1,125 @@
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, File, UploadFile, Form, HTTPException, Request
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    PlainTextResponse,
+    StreamingResponse,
+)
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
+from contextlib import asynccontextmanager
 from typing import List, Optional
 import os
 import sys
 import shutil
 from pathlib import Path
 import uuid
+import asyncio
+import json
+import time
 import tempfile
 
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from orchestrator.ppt_graph import run_ppt_generation
-from orchestrator.agent_state import PPTAgentState
-from rag_pipeline.pipeline import RAGPipeline
-from agents.export_agent import ExportAgent
+from orchestrator.ppt_graph import astream_ppt_events, get_compiled_graph
+from rag_pipeline.corpus import ingest_corpus, corpus_exists
+from utils.metrics import REGISTRY
+from utils.tracing import trace, span
+from api.jobs import Job, JobManager, QueueFullError, expired
+from app.config import (
+    JOB_CONCURRENCY,
+    JOB_QUEUE_DEPTH,
+    JOB_TTL,
+    JOB_MAX_FINISHED,
+    PROFILE_REQUESTS,
+)
+from app.dependencies import close_http_clients
+
+# Global storage for sessions
+sessions = {}
+
+
+def _store_session(session_id: str, topic: str, output_dir: str):
+    sessions[session_id] = {
+        "status": "completed",
+        "topic": topic,
+        "ppt_path": os.path.join(output_dir, "generated_ppt.pptx"),
+        "output_dir": output_dir,
+        "finished_at": time.time(),
+    }
+
+
+def _remove_session(session_id: str):
+    """Forget a session and delete its output directory"""
+    session = sessions.pop(session_id, None)
+    if session and session.get("output_dir"):
+        shutil.rmtree(session["output_dir"], ignore_errors=True)
+
+
+def _prune_sessions(now: float = None) -> int:
+    """
+    Remove sessions of synchronous runs with the same TTL and cap as finished
+    jobs (job sessions are removed when their job is pruned)
+    """
+    finished = {
+        session_id: session["finished_at"]
+        for session_id, session in sessions.items()
+        if session_id not in jobs.jobs
+    }
+    removed = expired(finished, JOB_TTL, JOB_MAX_FINISHED, now)
+    for session_id in removed:
+        _remove_session(session_id)
+    return len(removed)
+
+
+async def _prune_sessions_periodically():
+    while True:
+        await asyncio.sleep(min(JOB_TTL, 60))
+        _prune_sessions()
+
+
+def _register_job_session(job: Job):
+    """Make finished jobs downloadable through the session endpoints"""
+    if job.status == "completed":
+        _store_session(job.job_id, job.topic, job.output_dir)
+
+
+def _forget_job_session(job: Job):
+    """Drop the session of a pruned job, whose output was deleted"""
+    sessions.pop(job.job_id, None)
+
+
+jobs = JobManager(
+    JOB_CONCURRENCY,
+    JOB_QUEUE_DEPTH,
+    on_complete=_register_job_session,
+    on_prune=_forget_job_session,
+    ttl=JOB_TTL,
+    max_finished=JOB_MAX_FINISHED,
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Compile the workflow once at startup instead of on every request
+    get_compiled_graph()
+    await jobs.start()
+    pruner = (
+        asyncio.create_task(_prune_sessions_periodically()) if JOB_TTL > 0 else None
+    )
+    yield
+    if pruner is not None:
+        pruner.cancel()
+    await jobs.stop()
+    await close_http_clients()
+
 
 app = FastAPI(
     title="AI PowerPoint Generator API",
     description="Multi-agent system for generating presentations from documents",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Add CORS middleware
@@ -32,9 +131,6 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Global storage for sessions
-sessions = {}
-
 
 @app.get("/")
 async def root():
@@ -46,73 +142,275 @@ async def root():
     }
 
 
+def _save_uploads(files: List[UploadFile]) -> str:
+    """Save uploaded files to a new temporary directory"""
+    temp_dir = tempfile.mkdtemp()
+    with span("upload.save", files=len(files)):
+        for file in files:
+            file_ext = Path(file.filename).suffix.lower()
+            if file_ext not in [".pdf", ".txt", ".docx", ".doc"]:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+                raise HTTPException(
+                    status_code=400, detail=f"Unsupported file type: {file_ext}"
+                )
+
+            file_path = os.path.join(temp_dir, file.filename)
+            with open(file_path, "wb") as buffer:
+                shutil.copyfileobj(file.file, buffer)
+    return temp_dir
+
+
+def _check_corpus(corpus_id: Optional[str]):
+    if corpus_id and not corpus_exists(corpus_id):
+        raise HTTPException(status_code=404, detail="Corpus not found")
+
+
+def _profile_requested(request: Request) -> bool:
+    """Sampling profiler opt-in: PROFILE_REQUESTS or an "X-Profile: 1" header"""
+    header = request.headers.get("x-profile", "").lower()
+    return PROFILE_REQUESTS or header in ("1", "true", "yes")
+
+
+def _sse(event: dict) -> str:
+    """Format an event dict as a Server-Sent Events message"""
+    return f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
 @app.post("/generate")
 async def generate_presentation(
+    request: Request,
     topic: str = Form(...),
     slides: int = Form(7),
     context: Optional[str] = Form(""),
     files: Optional[List[UploadFile]] = File(None),
+    background: bool = Form(False),
+    use_cache: bool = Form(True),
+    corpus_id: Optional[str] = Form(None),
 ):
     """
-    Generate PowerPoint presentation with optional document upload
+    Generate PowerPoint presentation with optional document upload.
+    Uploads are indexed in their own corpus (identical uploads share one);
+    corpus_id reuses a corpus returned by an earlier request.
+    With background=true the request is queued and a job id is returned immediately.
+    use_cache=false bypasses the LLM response cache.
+    An "X-Profile: 1" header runs the request under the sampling profiler.
     """
     try:
         session_id = str(uuid.uuid4())
-        temp_dir = None
-
-        # Handle file uploads if provided
-        if files:
-            temp_dir = tempfile.mkdtemp()
-
-            # Save uploaded files
-            for file in files:
-                file_ext = Path(file.filename).suffix.lower()
-                if file_ext not in [".pdf", ".txt", ".docx", ".doc"]:
-                    raise HTTPException(
-                        status_code=400, detail=f"Unsupported file type: {file_ext}"
-                    )
-
-                file_path = os.path.join(temp_dir, file.filename)
-                with open(file_path, "wb") as buffer:
-                    shutil.copyfileobj(file.file, buffer)
-
-            # Initialize RAG pipeline
-            rag = RAGPipeline()
-            rag.ingest(temp_dir)
-            rag.load()
-
-        # Run PPT generation
-        result_dict = run_ppt_generation(
-            topic=topic, slides=slides, context=context or ""
-        )
-
-        # Convert to PPTAgentState
-        result_state = PPTAgentState(**result_dict)
-
-        # Export to PowerPoint
-        output_dir = "outputs"
-        ExportAgent(result_state, output_dir=output_dir)
-
-        # Clean up temp directory
-        if temp_dir:
-            shutil.rmtree(temp_dir, ignore_errors=True)
+        profile = _profile_requested(request)
+        _check_corpus(corpus_id)
+
+        if background:
+            temp_dir = _save_uploads(files) if files else None
+            job = Job(
+                topic,
+                slides,
+                context or "",
+                upload_dir=temp_dir,
+                use_cache=use_cache,
+                profile=profile,
+                corpus_id=corpus_id,
+            )
+            try:
+                jobs.submit(job)
+            except QueueFullError as e:
+                if temp_dir:
+                    shutil.rmtree(temp_dir, ignore_errors=True)
+                raise HTTPException(
+                    status_code=429,
+                    detail="Job queue is full, retry later",
+                    headers={"Retry-After": str(e.retry_after)},
+                )
+            return JSONResponse(
+                status_code=202,
+                content={
+                    **job.to_dict(jobs.position(job.job_id)),
+                    "status_url": f"/jobs/{job.job_id}",
+                },
+            )
+
+        # Each request writes to its own directory so concurrent runs don't
+        # overwrite each other's presentation
+        output_dir = os.path.join("outputs", session_id)
+        with trace(
+            "generate", profile=profile, topic=topic, slides=slides
+        ) as request_trace:
+            # Handle file uploads if provided
+            temp_dir = _save_uploads(files) if files else None
+
+            started = time.perf_counter()
+            ingest_seconds = None
+            if temp_dir:
+                # Index the uploads in their corpus (blocking work runs off the event loop)
+                with span("ingest"):
+                    corpus_id = await run_in_threadpool(ingest_corpus, temp_dir)
+                ingest_seconds = round(time.perf_counter() - started, 3)
+
+            # Run PPT generation; the graph's export node writes the PowerPoint.
+            # The closing event carries the run's context savings and timings.
+            async for event in astream_ppt_events(
+                topic=topic,
+                slides=slides,
+                context=context or "",
+                output_dir=output_dir,
+                use_cache=use_cache,
+                corpus_id=corpus_id,
+            ):
+                result = event
+
+            timings = result["timings"]
+            timings["total"] = round(time.perf_counter() - started, 3)
+            if ingest_seconds is not None:
+                timings["stages"] = {"ingest": ingest_seconds, **timings["stages"]}
+
+            # Clean up temp directory
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
 
         # Store session info
-        sessions[session_id] = {
-            "status": "completed",
-            "topic": topic,
-            "ppt_path": os.path.join(output_dir, "generated_ppt.pptx"),
-        }
+        _store_session(session_id, topic, output_dir)
+        _prune_sessions()
 
         return {
             "session_id": session_id,
             "message": "Presentation generated successfully",
             "status": "completed",
             "download_url": f"/download/{session_id}",
+            "corpus_id": corpus_id,
+            "context": result["context"],
+            "timings": timings,
+            "trace_id": request_trace.trace_id if request_trace else None,
         }
 
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if session_id not in sessions:
+            shutil.rmtree(os.path.join("outputs", session_id), ignore_errors=True)
+
+
+@app.post("/generate/stream")
+async def generate_presentation_stream(
+    request: Request,
+    topic: str = Form(...),
+    slides: int = Form(7),
+    context: Optional[str] = Form(""),
+    files: Optional[List[UploadFile]] = File(None),
+    use_cache: bool = Form(True),
+    corpus_id: Optional[str] = Form(None),
+):
+    """
+    Generate a presentation, streaming progress as Server-Sent Events:
+    stage_started / stage_finished (with durations), stage_output (partial
+    outline and content), slide_progress, then run_finished or error.
+    """
+    session_id = str(uuid.uuid4())
+    output_dir = os.path.join("outputs", session_id)
+    profile = _profile_requested(request)
+    _check_corpus(corpus_id)
+    # Uploads are read before the response starts, outside the request trace
+    temp_dir = _save_uploads(files) if files else None
+
+    async def events():
+        nonlocal corpus_id
+        started = time.perf_counter()
+        ingest_seconds = None
+        try:
+            with trace(
+                "generate.stream", profile=profile, topic=topic, slides=slides
+            ) as request_trace:
+                yield _sse(
+                    {
+                        "event": "run_started",
+                        "session_id": session_id,
+                        "trace_id": request_trace.trace_id if request_trace else None,
+                    }
+                )
+
+                if temp_dir:
+                    yield _sse({"event": "stage_started", "stage": "ingest", "t": 0.0})
+                    with span("ingest"):
+                        corpus_id = await run_in_threadpool(ingest_corpus, temp_dir)
+                    ingest_seconds = round(time.perf_counter() - started, 3)
+                    yield _sse(
+                        {
+                            "event": "stage_finished",
+                            "stage": "ingest",
+                            "duration": ingest_seconds,
+                            "t": ingest_seconds,
+                        }
+                    )
+
+                async for event in astream_ppt_events(
+                    topic=topic,
+                    slides=slides,
+                    context=context or "",
+                    output_dir=output_dir,
+                    use_cache=use_cache,
+                    corpus_id=corpus_id,
+                ):
+                    if event["event"] == "run_finished":
+                        _store_session(session_id, topic, output_dir)
+                        _prune_sessions()
+                        event["session_id"] = session_id
+                        event["download_url"] = f"/download/{session_id}"
+                        event["corpus_id"] = corpus_id
+                        event["t"] = round(time.perf_counter() - started, 3)
+                        event["timings"]["total"] = event["t"]
+                        if ingest_seconds is not None:
+                            event["timings"]["stages"] = {
+                                "ingest": ingest_seconds,
+                                **event["timings"]["stages"],
+                            }
+                    yield _sse(event)
+
+        except Exception as e:
+            yield _sse({"event": "error", "detail": str(e)})
+        finally:
+            if temp_dir:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+            if session_id not in sessions:
+                # Failed or abandoned run: drop its partial output
+                shutil.rmtree(output_dir, ignore_errors=True)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/jobs")
+async def list_jobs():
+    """List background jobs"""
+    return {
+        "total_jobs": len(jobs.jobs),
+        "jobs": [
+            job.to_dict(jobs.position(job_id)) for job_id, job in jobs.jobs.items()
+        ],
+    }
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, current stage and queue position of a background job"""
+    job = jobs.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict(jobs.position(job_id))
+
+
+@app.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job"""
+    job = jobs.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not jobs.cancel(job_id):
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    return {"message": "Job cancelled", "job_id": job_id}
 
 
 @app.get("/download/{session_id}")
@@ -137,7 +435,14 @@ async def download_presentation(session_id: str):
 @app.get("/download")
 async def download_latest():
     """Download the latest generated presentation"""
-    ppt_path = "outputs/generated_ppt.pptx"
+    ppt_path = next(
+        (
+            session["ppt_path"]
+            for session in reversed(list(sessions.values()))
+            if session.get("status") == "completed"
+        ),
+        "outputs/generated_ppt.pptx",
+    )
 
     if not os.path.exists(ppt_path):
         raise HTTPException(status_code=404, detail="Presentation file not found")
@@ -151,11 +456,11 @@ async def download_latest():
 
 @app.delete("/session/{session_id}")
 async def delete_session(session_id: str):
-    """Delete session data"""
+    """Delete session data and its generated files"""
     if session_id not in sessions:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    del sessions[session_id]
+    _remove_session(session_id)
     return {"message": "Session deleted successfully", "session_id": session_id}
 
 
@@ -175,6 +480,14 @@ async def list_sessions():
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus metrics: ingestion, retrieval, node and LLM latency, tokens and cost"""
+    return PlainTextResponse(
+        REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
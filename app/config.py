@@ -10,5 +10,124 @@ TEMPERATURE = float(os.getenv("TEMPERATURE", 0))
 DIMENSIONS = float(os.getenv("DIMENSIONS", 512))
 CHUNK_SIZE = float(os.getenv("CHUNK_SIZE", 1000))
 
-if not OPENAI_API_KEY:
-    raise RuntimeError("OPENAI_API_KEY is missing")
\ No newline at end of file
+# "openai", or "fake" for deterministic offline models (benchmarks, local runs)
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")
+FAKE_LLM_LATENCY = float(os.getenv("FAKE_LLM_LATENCY", 0))
+FAKE_EMBED_LATENCY = float(os.getenv("FAKE_EMBED_LATENCY", 0))
+if LLM_PROVIDER == "fake":
+    # Keeps fake responses and vectors apart from real ones in the caches
+    MODEL_NAME = f"fake:{MODEL_NAME}"
+    EMBED_MODEL_NAME = f"fake:{EMBED_MODEL_NAME}"
+
+# Point the OpenAI clients at a compatible server (e.g. a local stub)
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None
+
+# Shared keep-alive HTTP connection pool of the OpenAI clients (timeouts in seconds)
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", 20))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", 30))
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", 10))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", 120))
+
+# Concurrent embedding engine (EMBED_CONCURRENCY=1 uses OpenAIEmbeddings)
+EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", 4))
+EMBED_BATCH_TOKENS = int(os.getenv("EMBED_BATCH_TOKENS", 8000))
+EMBED_RPM = float(os.getenv("EMBED_RPM", 3000))
+EMBED_TPM = float(os.getenv("EMBED_TPM", 1000000))
+EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", 6))
+
+# Persistent embedding cache (set EMBED_CACHE_MAX_ENTRIES=0 to disable)
+EMBED_CACHE_PATH = os.getenv("EMBED_CACHE_PATH", ".cache/embeddings.sqlite")
+EMBED_CACHE_MAX_ENTRIES = int(os.getenv("EMBED_CACHE_MAX_ENTRIES", 200000))
+
+# In-process query caches (TTL in seconds, 0 = no expiry)
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", 1024))
+QUERY_EMBED_CACHE_TTL = float(os.getenv("QUERY_EMBED_CACHE_TTL", 0))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", 512))
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", 0))
+
+# Document parsing (LOADER_WORKERS > 1 parses on a process pool)
+LOADER_WORKERS = int(os.getenv("LOADER_WORKERS", 1))
+PDF_PAGES_PER_TASK = int(os.getenv("PDF_PAGES_PER_TASK", 20))
+
+# Cache of extracted text and chunks per uploaded file (0 disables)
+PARSE_CACHE_DIR = os.getenv("PARSE_CACHE_DIR", ".cache/parsed")
+PARSE_CACHE_MAX_BYTES = int(os.getenv("PARSE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
+# Streaming ingestion
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 64))
+INGEST_CHECKPOINT_EVERY = int(os.getenv("INGEST_CHECKPOINT_EVERY", 10))
+
+# Uploads are indexed per corpus under CORPUS_INDEX_ROOT/<corpus_id>/; loaded
+# corpus indexes are kept in an LRU bounded by count and approximate memory.
+# On disk, indexes unused for CORPUS_TTL seconds (0 = no limit) and the least
+# recently used beyond CORPUS_MAX_INDEXES are deleted.
+CORPUS_INDEX_ROOT = os.getenv("CORPUS_INDEX_ROOT", "corpus_db")
+CORPUS_MAX_INDEXES = int(os.getenv("CORPUS_MAX_INDEXES", 100))
+CORPUS_TTL = float(os.getenv("CORPUS_TTL", 7 * 24 * 3600))
+CORPUS_CACHE_SIZE = int(os.getenv("CORPUS_CACHE_SIZE", 8))
+CORPUS_CACHE_MAX_MB = int(os.getenv("CORPUS_CACHE_MAX_MB", 1024))
+
+# FAISS index type: flat | ivf_flat | ivf_pq | hnsw | sq8 | fp16, or auto
+# (flat below INDEX_AUTO_IVF_MIN vectors, IVF-PQ from INDEX_AUTO_PQ_MIN)
+INDEX_TYPE = os.getenv("INDEX_TYPE", "auto")
+INDEX_AUTO_IVF_MIN = int(os.getenv("INDEX_AUTO_IVF_MIN", 20000))
+INDEX_AUTO_PQ_MIN = int(os.getenv("INDEX_AUTO_PQ_MIN", 500000))
+INDEX_NLIST = int(os.getenv("INDEX_NLIST", 0))  # 0 = about 4·sqrt(n)
+INDEX_PQ_M = int(os.getenv("INDEX_PQ_M", 0))  # 0 = dimension / 8
+INDEX_HNSW_M = int(os.getenv("INDEX_HNSW_M", 32))
+INDEX_TRAIN_SAMPLE = int(os.getenv("INDEX_TRAIN_SAMPLE", 100000))
+# Query-time recall/latency knobs
+INDEX_NPROBE = int(os.getenv("INDEX_NPROBE", 16))
+INDEX_EF_SEARCH = int(os.getenv("INDEX_EF_SEARCH", 64))
+
+# INDEX_SHARDS > 1 splits the index by source file into that many shards,
+# rebuilt independently and searched in parallel on SEARCH_WORKERS threads
+# (0 = one per CPU)
+INDEX_SHARDS = int(os.getenv("INDEX_SHARDS", 1))
+SEARCH_WORKERS = int(os.getenv("SEARCH_WORKERS", 0))
+
+# Reviewer agent: slides validated in parallel, failed slides retried
+REVIEW_CONCURRENCY = int(os.getenv("REVIEW_CONCURRENCY", 8))
+REVIEW_MAX_RETRIES = int(os.getenv("REVIEW_MAX_RETRIES", 2))
+
+# Workflow: "sequential" stages or "slide_parallel" per-slide branches
+GRAPH_MODE = os.getenv("GRAPH_MODE", "sequential")
+SLIDE_CONCURRENCY = int(os.getenv("SLIDE_CONCURRENCY", 8))
+
+# Per-slide retrieval: chunks given to each slide (0 = shared topic context)
+SLIDE_CONTEXT_K = int(os.getenv("SLIDE_CONTEXT_K", 3))
+
+# Context packing: prompt token budget per agent (per slide for expand/review)
+OUTLINE_CONTEXT_TOKENS = int(os.getenv("OUTLINE_CONTEXT_TOKENS", 1500))
+EXPAND_CONTEXT_TOKENS = int(os.getenv("EXPAND_CONTEXT_TOKENS", 500))
+REVIEW_CONTEXT_TOKENS = int(os.getenv("REVIEW_CONTEXT_TOKENS", 500))
+CONTEXT_MMR_LAMBDA = float(os.getenv("CONTEXT_MMR_LAMBDA", 0.7))
+CONTEXT_DUPLICATE_THRESHOLD = float(os.getenv("CONTEXT_DUPLICATE_THRESHOLD", 0.95))
+
+# API background jobs
+JOB_CONCURRENCY = int(os.getenv("JOB_CONCURRENCY", 2))
+JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", 20))
+# Finished jobs and sessions (and their outputs/<id>) are deleted after JOB_TTL
+# seconds (0 keeps them until the cap) or beyond the JOB_MAX_FINISHED most recent
+JOB_TTL = float(os.getenv("JOB_TTL", 3600))
+JOB_MAX_FINISHED = int(os.getenv("JOB_MAX_FINISHED", 100))
+
+# LLM response cache (only used when TEMPERATURE is 0; 0 entries disables it)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm.sqlite")
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", 10000))
+LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", 0))
+
+# Chat model prices (USD per 1M tokens) for the cost estimates in /metrics
+LLM_INPUT_COST_PER_1M = float(os.getenv("LLM_INPUT_COST_PER_1M", 0.15))
+LLM_OUTPUT_COST_PER_1M = float(os.getenv("LLM_OUTPUT_COST_PER_1M", 0.60))
+
+# Per-request span traces (<trace_id>.jsonl; off unless set, as files are not
+# rotated) and the opt-in sampling profiler (per request with the
+# "X-Profile: 1" header, or always; written to "traces" when TRACE_DIR is unset)
+TRACE_DIR = os.getenv("TRACE_DIR", "")
+PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "0").lower() in ("1", "true", "yes")
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", 0.005))
+
+if LLM_PROVIDER == "openai" and not OPENAI_API_KEY:
+    raise RuntimeError("OPENAI_API_KEY is missing")
@@ -1,27 +1,287 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import httpx
 from langchain_openai import ChatOpenAI
 from langchain_openai import OpenAIEmbeddings
-from app.config import MODEL_NAME, EMBED_MODEL_NAME, TEMPERATURE, DIMENSIONS, CHUNK_SIZE
+from app.config import (
+    MODEL_NAME,
+    EMBED_MODEL_NAME,
+    TEMPERATURE,
+    DIMENSIONS,
+    CHUNK_SIZE,
+    OPENAI_API_KEY,
+    OPENAI_BASE_URL,
+    LLM_PROVIDER,
+    FAKE_LLM_LATENCY,
+    FAKE_EMBED_LATENCY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_CONNECT_TIMEOUT,
+    HTTP_TIMEOUT,
+    EMBED_CONCURRENCY,
+    EMBED_BATCH_TOKENS,
+    EMBED_RPM,
+    EMBED_TPM,
+    EMBED_MAX_RETRIES,
+    EMBED_CACHE_PATH,
+    EMBED_CACHE_MAX_ENTRIES,
+    QUERY_EMBED_CACHE_SIZE,
+    QUERY_EMBED_CACHE_TTL,
+    SEARCH_CACHE_SIZE,
+    SEARCH_CACHE_TTL,
+    PARSE_CACHE_DIR,
+    PARSE_CACHE_MAX_BYTES,
+    LLM_CACHE_PATH,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_TTL,
+    CORPUS_CACHE_SIZE,
+    CORPUS_CACHE_MAX_MB,
+    SEARCH_WORKERS,
+)
 
 _rag_pipeline = None
+_corpus_pipelines = None
+_embedding_cache = None
+_query_embedding_cache = None
+_search_cache = None
+_search_pool = None
+_parse_cache = None
+_llm_cache = None
+_http_client = None
+_async_http_client = None
+_llms = {}
+_embed_model = None
+_clients_lock = threading.Lock()
 
 
-def llm():
-    """Initialized the Chat Model"""
-    return ChatOpenAI(model=MODEL_NAME, temperature=TEMPERATURE)
+def _http_settings() -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+        "timeout": httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+    }
+
+
+def http_client() -> httpx.Client:
+    """Process-wide keep-alive connection pool for sync OpenAI calls"""
+    global _http_client
+    with _clients_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(**_http_settings())
+    return _http_client
+
+
+def async_http_client() -> httpx.AsyncClient:
+    """Process-wide keep-alive connection pool for async OpenAI calls"""
+    global _async_http_client
+    with _clients_lock:
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(**_http_settings())
+    return _async_http_client
+
+
+async def close_http_clients():
+    """Close the shared connection pools (on application shutdown)"""
+    global _http_client, _async_http_client, _embed_model
+    with _clients_lock:
+        client, async_client = _http_client, _async_http_client
+        _http_client = _async_http_client = None
+        _llms.clear()
+        _embed_model = None
+    if client is not None:
+        client.close()
+    if async_client is not None:
+        await async_client.aclose()
+
+
+def llm(use_cache: bool = True):
+    """Shared Chat Model (one instance per cache setting, safe to share)"""
+    # Responses are only reusable when generation is deterministic
+    use_cache = use_cache and TEMPERATURE == 0 and llm_cache() is not None
+    model = _llms.get(use_cache)
+    if model is None:
+        model = _create_llm(use_cache)
+        with _clients_lock:
+            model = _llms.setdefault(use_cache, model)
+    return model
+
+
+def _create_llm(use_cache: bool):
+    cache = llm_cache() if use_cache else False
+    if LLM_PROVIDER == "fake":
+        from app.fake_providers import FakeChatModel
+
+        return FakeChatModel(
+            model_name=MODEL_NAME, latency=FAKE_LLM_LATENCY, cache=cache
+        )
+
+    return ChatOpenAI(
+        model=MODEL_NAME,
+        temperature=TEMPERATURE,
+        cache=cache,
+        base_url=OPENAI_BASE_URL,
+        http_client=http_client(),
+        http_async_client=async_http_client(),
+    )
+
+
+def llm_cache():
+    """Process-wide persistent LLM response cache (None when disabled)"""
+    from utils.llm_cache import SQLiteLLMCache
+
+    global _llm_cache
+    if _llm_cache is None and LLM_CACHE_MAX_ENTRIES > 0:
+        _llm_cache = SQLiteLLMCache(
+            LLM_CACHE_PATH, LLM_CACHE_MAX_ENTRIES, LLM_CACHE_TTL
+        )
+    return _llm_cache
 
 
 def embed_model():
-    """Initialed the Embedding Model"""
+    """Shared Embedding Model"""
+    global _embed_model
+    if _embed_model is None:
+        model = _create_embed_model()
+        with _clients_lock:
+            if _embed_model is None:
+                _embed_model = model
+    return _embed_model
+
+
+def _create_embed_model():
+    if LLM_PROVIDER == "fake":
+        from app.fake_providers import FakeEmbeddings
+
+        return FakeEmbeddings(size=int(DIMENSIONS), latency=FAKE_EMBED_LATENCY)
+
+    if EMBED_CONCURRENCY > 1:
+        import openai
+        from rag_pipeline.embedding_engine import EmbeddingEngine
+
+        return EmbeddingEngine(
+            model=EMBED_MODEL_NAME,
+            dimensions=int(DIMENSIONS),
+            client=openai.OpenAI(
+                api_key=OPENAI_API_KEY,
+                base_url=OPENAI_BASE_URL,
+                max_retries=0,
+                http_client=http_client(),
+            ),
+            concurrency=EMBED_CONCURRENCY,
+            max_batch_tokens=EMBED_BATCH_TOKENS,
+            requests_per_minute=EMBED_RPM,
+            tokens_per_minute=EMBED_TPM,
+            max_retries=EMBED_MAX_RETRIES,
+        )
+
     return OpenAIEmbeddings(
-        model=EMBED_MODEL_NAME, dimensions=DIMENSIONS, chunk_size=CHUNK_SIZE
+        model=EMBED_MODEL_NAME,
+        dimensions=DIMENSIONS,
+        chunk_size=CHUNK_SIZE,
+        base_url=OPENAI_BASE_URL,
+        http_client=http_client(),
+        http_async_client=async_http_client(),
     )
 
 
-def get_rag_pipeline():
+def embedding_cache():
+    """Process-wide persistent embedding cache (None when disabled)"""
+    from rag_pipeline.embedding_cache import EmbeddingCache
+
+    global _embedding_cache
+    if _embedding_cache is None and EMBED_CACHE_MAX_ENTRIES > 0:
+        _embedding_cache = EmbeddingCache(EMBED_CACHE_PATH, EMBED_CACHE_MAX_ENTRIES)
+    return _embedding_cache
+
+
+def query_embedding_cache():
+    """Process-wide LRU of query embeddings"""
+    from rag_pipeline.query_cache import LRUCache, vector_size
+
+    global _query_embedding_cache
+    if _query_embedding_cache is None:
+        _query_embedding_cache = LRUCache(
+            QUERY_EMBED_CACHE_SIZE, QUERY_EMBED_CACHE_TTL, sizeof=vector_size
+        )
+    return _query_embedding_cache
+
+
+def search_cache():
+    """Process-wide LRU of top-k search results"""
+    from rag_pipeline.query_cache import LRUCache, results_size
+
+    global _search_cache
+    if _search_cache is None:
+        _search_cache = LRUCache(
+            SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL, sizeof=results_size
+        )
+    return _search_cache
+
+
+def search_pool() -> ThreadPoolExecutor:
+    """Process-wide thread pool that searches index shards in parallel"""
+    global _search_pool
+    with _clients_lock:
+        if _search_pool is None:
+            _search_pool = ThreadPoolExecutor(
+                max_workers=SEARCH_WORKERS or os.cpu_count(),
+                thread_name_prefix="index-search",
+            )
+    return _search_pool
+
+
+def parse_cache():
+    """Process-wide cache of parsed documents (None when disabled)"""
+    from rag_pipeline.parse_cache import ParseCache
+
+    global _parse_cache
+    if _parse_cache is None and PARSE_CACHE_MAX_BYTES > 0:
+        _parse_cache = ParseCache(PARSE_CACHE_DIR, PARSE_CACHE_MAX_BYTES)
+    return _parse_cache
+
+
+def corpus_pipelines():
+    """Process-wide LRU of loaded per-corpus pipelines"""
+    from rag_pipeline.query_cache import LRUCache
+
+    global _corpus_pipelines
+    if _corpus_pipelines is None:
+        _corpus_pipelines = LRUCache(
+            CORPUS_CACHE_SIZE,
+            sizeof=lambda rag: rag.memory_bytes(),
+            max_bytes=CORPUS_CACHE_MAX_MB * 1024 * 1024,
+        )
+    return _corpus_pipelines
+
+
+def get_rag_pipeline(corpus_id: str = None):
+    """
+    Loaded pipeline of the shared knowledge base (vector_db/), or of an
+    uploaded corpus when corpus_id is given
+    """
     from rag_pipeline.pipeline import RAGPipeline
 
     global _rag_pipeline
-    if _rag_pipeline is None:
-        _rag_pipeline = RAGPipeline()
-        _rag_pipeline.load()
-    return _rag_pipeline
+    if corpus_id is None:
+        if _rag_pipeline is None:
+            _rag_pipeline = RAGPipeline()
+            _rag_pipeline.load()
+        return _rag_pipeline
+
+    from rag_pipeline.corpus import corpus_directory, is_corpus_id, touch_corpus
+
+    if not is_corpus_id(corpus_id):
+        raise ValueError(f"Invalid corpus id: {corpus_id!r}")
+    touch_corpus(corpus_id)
+    pipelines = corpus_pipelines()
+    rag = pipelines.get(corpus_id)
+    if rag is None:
+        rag = RAGPipeline(persist_directory=corpus_directory(corpus_id))
+        rag.load()
+        pipelines.set(corpus_id, rag)
+    return rag
@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import re
+import time
+from typing import Any, List, Optional
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+from orchestrator.agent_state import (
+    Bulletslides,
+    BulletslidesResponse,
+    ContentExpansion,
+    ExpandedContentResponse,
+    SlideValidation,
+    ValidationPoint,
+)
+from utils.tokens import count_tokens
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _digest(text: str) -> int:
+    return int(hashlib.sha256(text.encode("utf-8")).hexdigest()[:8], 16)
+
+
+def _prompt_slides(prompt: str):
+    """(title, points) of every "Slide: ..." block followed by "- " lines"""
+    slides = []
+    collecting = False
+    for line in prompt.splitlines():
+        if line.startswith("Slide: "):
+            slides.append((line[len("Slide: ") :].strip(), []))
+            collecting = True
+        elif collecting and line.startswith("- "):
+            slides[-1][1].append(line[2:].strip())
+        elif collecting and slides[-1][1]:
+            collecting = False
+    return slides
+
+
+def _outline(prompt: str) -> BulletslidesResponse:
+    match = re.search(r"EXACTLY (\d+) slides about: (.+)", prompt)
+    count, topic = (int(match.group(1)), match.group(2).strip()) if match else (3, "")
+    return BulletslidesResponse(
+        slides=[
+            Bulletslides(
+                title=f"{topic} – part {i + 1}",
+                bullet_points=[
+                    f"Key idea {j + 1} of {topic} part {i + 1}" for j in range(3)
+                ],
+            )
+            for i in range(count)
+        ]
+    )
+
+
+def _expansion(title: str, points: List[str]) -> ContentExpansion:
+    return ContentExpansion(
+        title=title,
+        detailed_points=[
+            f"{point} explained with a short factual sentence for the audience."
+            for point in points
+        ],
+    )
+
+
+def _validation(title: str, points: List[str]) -> SlideValidation:
+    results = []
+    for point in points:
+        # Deterministically flag a few points so both paths get exercised
+        if _digest(point) % 7 == 0:
+            results.append(
+                ValidationPoint(
+                    point=point,
+                    status="needs_review",
+                    reason="Not covered by the reference information",
+                )
+            )
+        else:
+            results.append(ValidationPoint(point=point, status="accurate"))
+    return SlideValidation(title=title, validation=results)
+
+
+def fake_response(schema, prompt: str) -> BaseModel:
+    """Deterministic instance of one of the agents' output schemas for a prompt"""
+    slides = _prompt_slides(prompt)
+    if schema is BulletslidesResponse:
+        return _outline(prompt)
+    if schema is ExpandedContentResponse:
+        return ExpandedContentResponse(
+            slides=[_expansion(title, points) for title, points in slides]
+        )
+    if schema is ContentExpansion:
+        title, points = slides[0] if slides else ("Slide", [])
+        return _expansion(title, points)
+    if schema is SlideValidation:
+        title, points = slides[0] if slides else ("Slide", [])
+        return _validation(title, points)
+    raise ValueError(f"No fake response for schema {schema.__name__}")
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Offline chat model with a fixed latency per call. Structured output
+    returns deterministic instances of the agents' schemas, serialized as
+    JSON in the AI message like a real provider would.
+    """
+
+    model_name: str = "fake"
+    latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"model_name": self.model_name}
+
+    def _respond(self, messages: List[BaseMessage], schema) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        if schema is not None:
+            content = fake_response(schema, prompt).model_dump_json()
+        else:
+            content = f"Response {_digest(prompt):08x}"
+
+        message = AIMessage(
+            content=content,
+            usage_metadata={
+                "input_tokens": count_tokens(prompt),
+                "output_tokens": count_tokens(content),
+                "total_tokens": count_tokens(prompt) + count_tokens(content),
+            },
+        )
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        response_schema=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        time.sleep(self.latency)
+        return self._respond(messages, response_schema)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager=None,
+        response_schema=None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency)
+        return self._respond(messages, response_schema)
+
+    def with_structured_output(self, schema, **kwargs):
+        parse = RunnableLambda(
+            lambda message: schema.model_validate_json(message.content)
+        )
+        return self.bind(response_schema=schema) | parse
+
+
+class FakeEmbeddings(Embeddings):
+    """
+    Deterministic offline embeddings: hashed bag of words, L2-normalized, so
+    texts sharing words are close. Each call waits `latency` seconds.
+    """
+
+    def __init__(self, size: int = 512, latency: float = 0.0):
+        self.size = size
+        self.latency = latency
+
+    def _embed(self, text: str) -> List[float]:
+        vector = np.zeros(self.size, dtype=np.float32)
+        for word in _WORD.findall(text.lower()):
+            vector[_digest(word) % self.size] += 1.0
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            vector[_digest(text) % self.size] = 1.0
+            norm = 1.0
+        return (vector / norm).tolist()
+
+    def embed_documents(self, texts):
+        time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
@@ -0,0 +1,173 @@
+"""
+Recall vs latency of the approximate FAISS index types against exact search.
+
+    python -m benchmarks.ann
+    python -m benchmarks.ann --vectors 200000 --types ivf_flat ivf_pq hnsw
+    python -m benchmarks.ann --index-dir vector_db
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+# Only index building is exercised; no model provider is needed
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+import faiss  # noqa: E402
+import numpy as np  # noqa: E402
+from benchmarks.run import _git_commit, _percentiles  # noqa: E402
+from rag_pipeline.ann_index import (  # noqa: E402
+    INDEX_TYPES,
+    build_index,
+    configure_search,
+    factory_string,
+    restore_direct_map,
+    stored_vectors,
+)
+
+# Query-time settings swept per index type
+SWEEPS = {
+    "ivf_flat": ("nprobe", [1, 4, 16, 64]),
+    "ivf_pq": ("nprobe", [1, 4, 16, 64]),
+    "hnsw": ("ef_search", [16, 32, 64, 128]),
+}
+
+
+def clustered_vectors(count: int, dimension: int, clusters: int, seed: int):
+    """Gaussian clusters, L2-normalized like text embeddings"""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dimension)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=count)
+    vectors = centers[labels] + 0.5 * rng.normal(size=(count, dimension)).astype(
+        np.float32
+    )
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def load_dataset(args):
+    """(corpus vectors, query vectors) from an index on disk or synthetic data"""
+    if args.index_dir:
+        index = restore_direct_map(
+            faiss.read_index(os.path.join(args.index_dir, "index.faiss"))
+        )
+        vectors = stored_vectors(index)
+        # Queries near stored vectors, as a stand-in for real questions
+        rng = np.random.default_rng(args.seed)
+        rows = rng.choice(len(vectors), min(args.queries, len(vectors)), replace=False)
+        noise = rng.normal(
+            scale=vectors.std() * 0.3, size=(len(rows), vectors.shape[1])
+        )
+        return vectors, (vectors[rows] + noise).astype(np.float32)
+
+    data = clustered_vectors(
+        args.vectors + args.queries, args.dimension, args.clusters, args.seed
+    )
+    return data[: args.vectors], data[args.vectors :]
+
+
+def _search_latencies(index, queries, k):
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(row) & set(expected)) for row, expected in zip(found, truth))
+    return hits / truth.size
+
+
+def evaluate(index_type, vectors, queries, truth, k):
+    """Build one index type and measure it at each query-time setting"""
+    started = time.perf_counter()
+    index = build_index(vectors, index_type)
+    build_seconds = time.perf_counter() - started
+    size_bytes = faiss.serialize_index(index).nbytes
+
+    param, values = SWEEPS.get(index_type, (None, [None]))
+    rows = []
+    for value in values:
+        if param is not None:
+            configure_search(index, **{param: value})
+        _, found = index.search(queries, k)
+        row = {
+            "index_type": index_type,
+            "factory": factory_string(index_type, vectors.shape[1], len(vectors)),
+            "build_seconds": round(build_seconds, 3),
+            "size_mb": round(size_bytes / 1e6, 2),
+            "recall_at_k": round(recall_at_k(found, truth), 4),
+            "latency": _percentiles(_search_latencies(index, queries, k)),
+        }
+        if param is not None:
+            row[param] = value
+        rows.append(row)
+        print(
+            f"{index_type:<9} {param or '':>9}={value if value is not None else '-':<4} "
+            f"recall@{k} {row['recall_at_k']:.3f}  p50 {row['latency']['p50_ms']:.3f}ms  "
+            f"p99 {row['latency']['p99_ms']:.3f}ms  {row['size_mb']}MB  "
+            f"build {row['build_seconds']}s"
+        )
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--index-dir", help="Use the vectors of an existing index")
+    parser.add_argument("--vectors", type=int, default=50000)
+    parser.add_argument("--dimension", type=int, default=512)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--types", nargs="+", default=list(INDEX_TYPES))
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument(
+        "--output", help="Results file (default benchmarks/results/ann-<commit>.json)"
+    )
+    args = parser.parse_args(argv)
+
+    vectors, queries = load_dataset(args)
+    print(f"{len(vectors)} vectors x {vectors.shape[1]} dims, {len(queries)} queries")
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, args.k)
+
+    rows = []
+    for index_type in args.types:
+        rows += evaluate(index_type, vectors, queries, truth, args.k)
+
+    commit = _git_commit()
+    output = Path(
+        args.output or project_root / "benchmarks" / "results" / f"ann-{commit}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(
+        json.dumps(
+            {
+                "meta": {
+                    "commit": commit,
+                    "vectors": len(vectors),
+                    "dimension": int(vectors.shape[1]),
+                    "queries": len(queries),
+                    "k": args.k,
+                    "source": args.index_dir or "synthetic",
+                },
+                "results": rows,
+            },
+            indent=2,
+        )
+    )
+    print(f"\nResults written to {output}")
+    return rows
+
+
+if __name__ == "__main__":
+    main()
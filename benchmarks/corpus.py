@@ -0,0 +1,63 @@
+import os
+import random
+
+THEMES = [
+    "solar",
+    "battery",
+    "grid",
+    "turbine",
+    "hydrogen",
+    "storage",
+    "efficiency",
+    "policy",
+    "carbon",
+    "market",
+]
+
+
+def _vocabulary(rng: random.Random, size: int = 2000):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    return [
+        "".join(rng.choice(letters) for _ in range(rng.randint(3, 9)))
+        for _ in range(size)
+    ]
+
+
+def generate_corpus(
+    directory: str, documents: int, paragraphs: int = 30, seed: int = 7
+) -> list:
+    """
+    Write `documents` deterministic text files (about 10 KB each) and return
+    their paths. Each file leans on one theme word so retrieval has structure.
+    """
+    os.makedirs(directory, exist_ok=True)
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(rng)
+
+    paths = []
+    for index in range(documents):
+        theme = THEMES[index % len(THEMES)]
+        lines = []
+        for _ in range(paragraphs):
+            sentences = []
+            for _ in range(5):
+                words = rng.sample(vocabulary, 11) + [theme]
+                rng.shuffle(words)
+                sentences.append(" ".join(words).capitalize() + ".")
+            lines.append(" ".join(sentences))
+
+        path = os.path.join(directory, f"doc_{index:05d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(lines))
+        paths.append(path)
+    return paths
+
+
+def sample_queries(count: int, seed: int = 11) -> list:
+    """Deterministic queries mixing theme words with corpus vocabulary"""
+    rng = random.Random(seed)
+    vocabulary = _vocabulary(random.Random(7))
+    return [
+        f"{rng.choice(THEMES)} " + " ".join(rng.sample(vocabulary, 4))
+        for _ in range(count)
+    ]
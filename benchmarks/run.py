@@ -0,0 +1,304 @@
+"""
+Offline benchmark suite: runs the whole stack against the deterministic fake
+chat model and embeddings, so numbers are free and comparable across commits.
+
+    python -m benchmarks.run
+    python -m benchmarks.run --llm-latency 0.5 --output results.json
+    python -m benchmarks.run --compare benchmarks/results/<old>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+project_root = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def _configure(args):
+    """Environment for app.config; must run before any project import"""
+    os.environ["LLM_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.llm_latency)
+    os.environ["FAKE_EMBED_LATENCY"] = str(args.embed_latency)
+    # Measure real work, not cache hits
+    for name in (
+        "EMBED_CACHE_MAX_ENTRIES",
+        "LLM_CACHE_MAX_ENTRIES",
+        "PARSE_CACHE_MAX_BYTES",
+        "QUERY_EMBED_CACHE_SIZE",
+        "SEARCH_CACHE_SIZE",
+    ):
+        os.environ[name] = "0"
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=project_root,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except Exception:
+        return "unknown"
+
+
+def _percentiles(samples_ms) -> dict:
+    ordered = sorted(samples_ms)
+
+    def at(q):
+        return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+        "p50_ms": round(at(0.50), 3),
+        "p90_ms": round(at(0.90), 3),
+        "p99_ms": round(at(0.99), 3),
+        "max_ms": round(ordered[-1], 3),
+    }
+
+
+def bench_ingest(sizes):
+    """Ingestion wall time and throughput vs corpus size"""
+    from benchmarks.corpus import generate_corpus
+    from rag_pipeline.pipeline import RAGPipeline
+
+    results = []
+    for documents in sizes:
+        corpus = f"corpus_{documents}"
+        generate_corpus(corpus, documents)
+        rag = RAGPipeline(persist_directory=f"vector_db_{documents}")
+
+        started = time.perf_counter()
+        rag.ingest(corpus)
+        seconds = time.perf_counter() - started
+
+        rag.load()
+        chunks = rag.chunk_count()
+        results.append(
+            {
+                "documents": documents,
+                "chunks": chunks,
+                "seconds": round(seconds, 4),
+                "documents_per_s": round(documents / seconds, 2),
+                "chunks_per_s": round(chunks / seconds, 2),
+            }
+        )
+        print(f"ingest {documents} docs: {seconds:.2f}s ({chunks} chunks)")
+    return results
+
+
+def bench_query(persist_directory, queries, k=5):
+    """Single and batched query latency percentiles"""
+    from benchmarks.corpus import sample_queries
+    from rag_pipeline.pipeline import RAGPipeline
+
+    rag = RAGPipeline(persist_directory=persist_directory)
+    rag.load()
+    texts = sample_queries(queries)
+
+    single = []
+    for text in texts:
+        started = time.perf_counter()
+        rag.query_with_scores(text, k=k)
+        single.append((time.perf_counter() - started) * 1000)
+
+    batched = []
+    for start in range(0, len(texts), 20):
+        started = time.perf_counter()
+        rag.query_batch_with_scores(texts[start : start + 20], k=k)
+        batched.append((time.perf_counter() - started) * 1000)
+
+    result = {
+        "index_size": rag.chunk_count(),
+        "k": k,
+        "single": _percentiles(single),
+        "batch_of_20": _percentiles(batched),
+    }
+    print(
+        f"query p50 {result['single']['p50_ms']}ms p99 {result['single']['p99_ms']}ms"
+    )
+    return result
+
+
+def _run_pipeline(topic, slides, mode):
+    from orchestrator.ppt_graph import stream_ppt_events
+
+    stages = {}
+    slide_durations = []
+    started = time.perf_counter()
+    for event in stream_ppt_events(
+        topic=topic, slides=slides, mode=mode, output_dir=f"outputs/{mode}-{slides}"
+    ):
+        if event["event"] != "stage_finished":
+            continue
+        if "slide" in event:
+            slide_durations.append(event["duration"])
+        else:
+            stages[event["stage"]] = event["duration"]
+    total = time.perf_counter() - started
+
+    if slide_durations:
+        stages["slide_mean"] = round(statistics.fmean(slide_durations), 4)
+    return total, stages
+
+
+def bench_pipeline(slide_counts, modes, repeat):
+    """End-to-end and per-agent latency vs slide count, per graph mode"""
+    results = []
+    for mode in modes:
+        for slides in slide_counts:
+            runs = [
+                _run_pipeline("solar battery storage", slides, mode)
+                for _ in range(repeat)
+            ]
+            totals = [total for total, _ in runs]
+            median_run = runs[totals.index(statistics.median_low(totals))]
+            results.append(
+                {
+                    "mode": mode,
+                    "slides": slides,
+                    "seconds": round(statistics.median(totals), 4),
+                    "stages": median_run[1],
+                }
+            )
+            print(f"pipeline {mode} {slides} slides: {statistics.median(totals):.2f}s")
+    return results
+
+
+def bench_export(slide_counts, repeat):
+    """PPTX export time vs slide count"""
+    from agents.export_agent import ExportAgent
+    from orchestrator.agent_state import PPTAgentState
+    from orchestrator.ppt_graph import run_ppt_generation
+
+    results = []
+    for slides in slide_counts:
+        state = PPTAgentState(
+            **run_ppt_generation("solar battery storage", slides, mode="sequential")
+        )
+        state.output_dir = f"outputs/export-{slides}"
+
+        durations = []
+        for _ in range(repeat):
+            started = time.perf_counter()
+            ExportAgent(state)
+            durations.append((time.perf_counter() - started) * 1000)
+        results.append({"slides": slides, **_percentiles(durations)})
+        print(f"export {slides} slides: {statistics.median(durations):.1f}ms")
+    return results
+
+
+def _flatten(results: dict) -> dict:
+    """Headline metrics keyed by a stable name, for comparisons"""
+    metrics = {}
+    for row in results.get("ingest", []):
+        metrics[f"ingest/{row['documents']}docs/seconds"] = row["seconds"]
+    query = results.get("query") or {}
+    for kind in ("single", "batch_of_20"):
+        if kind in query:
+            metrics[f"query/{kind}/p50_ms"] = query[kind]["p50_ms"]
+            metrics[f"query/{kind}/p99_ms"] = query[kind]["p99_ms"]
+    for row in results.get("pipeline", []):
+        metrics[f"pipeline/{row['mode']}/{row['slides']}slides/seconds"] = row[
+            "seconds"
+        ]
+    for row in results.get("export", []):
+        metrics[f"export/{row['slides']}slides/p50_ms"] = row["p50_ms"]
+    return metrics
+
+
+def compare(current: dict, baseline: dict):
+    """Print metric changes vs a baseline results file (lower is better)"""
+    before, after = _flatten(baseline), _flatten(current)
+    print(f"\nvs {baseline['meta']['commit']} (now {current['meta']['commit']}):")
+    for name in sorted(set(before) & set(after)):
+        change = (
+            (after[name] - before[name]) / before[name] * 100 if before[name] else 0
+        )
+        print(f"  {name:<45} {before[name]:>10} -> {after[name]:>10} ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus-sizes", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--slides", type=int, nargs="+", default=[5, 10, 20])
+    parser.add_argument("--modes", nargs="+", default=["sequential", "slide_parallel"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--llm-latency", type=float, default=0.2, help="Seconds per fake LLM call"
+    )
+    parser.add_argument(
+        "--embed-latency",
+        type=float,
+        default=0.02,
+        help="Seconds per fake embeddings request",
+    )
+    parser.add_argument(
+        "--output", help="Results file (default benchmarks/results/<commit>.json)"
+    )
+    parser.add_argument("--compare", help="Baseline results file to compare against")
+    args = parser.parse_args(argv)
+
+    _configure(args)
+    commit = _git_commit()
+    output = Path(
+        args.output or project_root / "benchmarks" / "results" / f"{commit}.json"
+    ).resolve()
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+
+    # Indexes, caches and exports live in a scratch directory
+    with tempfile.TemporaryDirectory(prefix="ppt-bench-") as workdir:
+        cwd = os.getcwd()
+        os.chdir(workdir)
+        try:
+            ingest = bench_ingest(args.corpus_sizes)
+            largest = f"vector_db_{max(args.corpus_sizes)}"
+            query = bench_query(largest, args.queries)
+
+            # Agents retrieve from the default index location
+            os.rename(largest, "vector_db")
+            pipeline = bench_pipeline(args.slides, args.modes, args.repeat)
+            export = bench_export(args.slides, args.repeat)
+        finally:
+            os.chdir(cwd)
+
+    results = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {
+                "llm_latency": args.llm_latency,
+                "embed_latency": args.embed_latency,
+                "repeat": args.repeat,
+            },
+        },
+        "ingest": ingest,
+        "query": query,
+        "pipeline": pipeline,
+        "export": export,
+    }
+
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2))
+    print(f"\nResults written to {output}")
+
+    if baseline is not None:
+        compare(results, baseline)
+    return results
+
+
+if __name__ == "__main__":
+    main()
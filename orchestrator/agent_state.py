@@ -1,4 +1,4 @@
-from typing import Literal, Optional, List
+from typing import Annotated, Any, Dict, Literal, Optional, List
 from pydantic import BaseModel, Field
 
 
@@ -43,6 +43,56 @@ class ExpandedContentResponse(BaseModel):
     slides: List[ContentExpansion] = Field(description="List of expanded slides")
 
 
+class RetrievedChunk(BaseModel):
+    """Knowledge base chunk retrieved for a query"""
+
+    id: Optional[str] = Field(None, description="Docstore id of the chunk")
+    content: str = Field(description="Chunk text")
+    metadata: Dict[str, Any] = Field(default_factory=dict, description="Chunk metadata")
+    score: Optional[float] = Field(
+        None, description="Distance to the query (lower is closer)"
+    )
+
+
+class SlideTask(BaseModel):
+    """Work item for one slide in slide-parallel mode"""
+
+    index: int = Field(description="Position of the slide in the outline")
+    topic: str = Field(description="PPT topic")
+    slide: Bulletslides = Field(description="Outline slide to expand and review")
+    context_chunks: List[RetrievedChunk] = Field(
+        default_factory=list, description="Knowledge base chunks for this slide"
+    )
+    use_cache: bool = Field(default=True, description="Allow cached LLM responses")
+    corpus_id: Optional[str] = Field(
+        default=None, description="Uploaded corpus to retrieve from"
+    )
+
+
+class SlideResult(BaseModel):
+    """Expanded and reviewed content of one slide"""
+
+    index: int = Field(description="Position of the slide in the outline")
+    expanded: ContentExpansion
+    validation: SlideValidation
+
+
+def merge_slide_results(
+    left: List[SlideResult], right: List[SlideResult]
+) -> List[SlideResult]:
+    """Reducer for results of parallel slide branches, keyed by slide index"""
+    merged = {result.index: result for result in left or []}
+    merged.update({result.index: result for result in right or []})
+    return [merged[index] for index in sorted(merged)]
+
+
+def merge_context_stats(
+    left: Dict[str, dict], right: Dict[str, dict]
+) -> Dict[str, dict]:
+    """Reducer for context packing stats, keyed by agent (and slide)"""
+    return {**(left or {}), **(right or {})}
+
+
 class PPTAgentState(BaseModel):
     """Unified Pydantic state for all PPT generation agents"""
 
@@ -50,6 +100,22 @@ class PPTAgentState(BaseModel):
     topic: str = Field(description="PPT topic")
     slides: int = Field(default=7, description="Number of slides to generate")
 
+    # Uploaded corpus whose index the agents retrieve from (None: shared vector_db/)
+    corpus_id: Optional[str] = Field(
+        default=None, description="Corpus handle returned by ingest_corpus()"
+    )
+
+    # Retrieval output (shared by all agents)
+    retrieved_context: Optional[List[RetrievedChunk]] = Field(
+        default=None, description="Chunks retrieved once for the topic"
+    )
+    retrieval_cache: Dict[str, List[RetrievedChunk]] = Field(
+        default_factory=dict, description="Targeted lookups made by agents, by query"
+    )
+    slide_contexts: Optional[List[List[RetrievedChunk]]] = Field(
+        default=None, description="Chunks retrieved for each outline slide"
+    )
+
     # Outline Generator output
     outline: Optional[BulletslidesResponse] = Field(
         default=None, description="Generated outline"
@@ -60,10 +126,26 @@ class PPTAgentState(BaseModel):
         default=None, description="Expanded content"
     )
 
+    # Slide-parallel mode output (expanded + reviewed per slide)
+    slide_results: Annotated[List[SlideResult], merge_slide_results] = Field(
+        default_factory=list, description="Per-slide results"
+    )
+
     # Reviewer output
     validation_results: Optional[List[SlideValidation]] = Field(
         default=None, description="Validation results"
     )
 
+    # Context packing stats of every prompt built in this run
+    context_stats: Annotated[Dict[str, dict], merge_context_stats] = Field(
+        default_factory=dict, description="Prompt context tokens used and saved"
+    )
+
     # Metadata
     context: Optional[str] = Field(default=None, description="Additional context")
+    output_dir: Optional[str] = Field(
+        default=None, description="Export directory (defaults to outputs/)"
+    )
+    use_cache: bool = Field(
+        default=True, description="Allow cached LLM responses for this run"
+    )
@@ -1,41 +1,298 @@
+import asyncio
+import threading
+import time
+from typing import List, Union
+from langchain_core.runnables import RunnableLambda
+from langgraph.config import get_stream_writer
 from langgraph.graph import StateGraph, END
-from orchestrator.agent_state import PPTAgentState
-from agents.outline_generator_agent import OutlineAgent
-from agents.content_expansion_agent import ContentExpansionAgent
-from agents.reviewer_agent import ReviewerAgent
-from agents.export_agent import ExportAgent
+from langgraph.types import Send
+from orchestrator.agent_state import PPTAgentState, SlideTask
+from orchestrator.progress import ProgressTracker
+from agents.retrieval_agent import (
+    RetrievalAgent,
+    RetrievalAgentAsync,
+    get_slide_contexts,
+)
+from agents.outline_generator_agent import OutlineAgent, OutlineAgentAsync
+from agents.content_expansion_agent import (
+    ContentExpansionAgent,
+    ContentExpansionAgentAsync,
+)
+from agents.reviewer_agent import ReviewerAgent, ReviewerAgentAsync
+from agents.slide_agent import SlideAgent, SlideAgentAsync, CollectSlidesAgent
+from agents.export_agent import ExportAgent, ExportAgentAsync
+from app.config import GRAPH_MODE, SLIDE_CONCURRENCY
+from rag_pipeline.corpus import lease_corpus
+from utils.metrics import NODE_SECONDS, LLMUsageCallback
+from utils.tracing import span, TracingCallback
 
+_compiled_graphs = {}
+_compile_lock = threading.Lock()
 
-def create_ppt_graph() -> StateGraph:
+
+def _slide_fields(state) -> dict:
+    return {"slide": state.index} if isinstance(state, SlideTask) else {}
+
+
+def _stage_event(event: str, stage: str, state, **fields):
+    fields.update(_slide_fields(state))
+    # No-op unless the graph is streamed with the "custom" mode
+    get_stream_writer()({"event": event, "stage": stage, **fields})
+
+
+def _node(stage: str, func, afunc=None):
+    """
+    Graph node usable from both invoke() (func) and ainvoke() (afunc) that
+    reports stage_started / stage_finished events with the stage's wall time
+    """
+
+    def run(state):
+        _stage_event("stage_started", stage, state)
+        started = time.perf_counter()
+        with span(f"node.{stage}", **_slide_fields(state)):
+            result = func(state)
+        duration = round(time.perf_counter() - started, 3)
+        NODE_SECONDS.observe(duration, node=stage)
+        _stage_event("stage_finished", stage, state, duration=duration)
+        return result
+
+    async def arun(state):
+        _stage_event("stage_started", stage, state)
+        started = time.perf_counter()
+        with span(f"node.{stage}", **_slide_fields(state)):
+            if afunc is not None:
+                result = await afunc(state)
+            else:
+                result = await asyncio.to_thread(func, state)
+        duration = round(time.perf_counter() - started, 3)
+        NODE_SECONDS.observe(duration, node=stage)
+        _stage_event("stage_finished", stage, state, duration=duration)
+        return result
+
+    return RunnableLambda(run, afunc=arun, name=func.__name__)
+
+
+def create_ppt_graph(mode: str = None) -> StateGraph:
     """Create the PowerPoint generation workflow graph"""
+    mode = mode or GRAPH_MODE
+    if mode == "slide_parallel":
+        return create_slide_parallel_graph()
+
     workflow = StateGraph(PPTAgentState)
 
     # Add agent nodes
-    workflow.add_node("outline", OutlineAgent)
-    workflow.add_node("expand", ContentExpansionAgent)
-    workflow.add_node("review", ReviewerAgent)
-    workflow.add_node("export", ExportAgent)
+    workflow.add_node(
+        "retrieve", _node("retrieve", RetrievalAgent, RetrievalAgentAsync)
+    )
+    workflow.add_node("outline", _node("outline", OutlineAgent, OutlineAgentAsync))
+    workflow.add_node(
+        "expand", _node("expand", ContentExpansionAgent, ContentExpansionAgentAsync)
+    )
+    workflow.add_node("review", _node("review", ReviewerAgent, ReviewerAgentAsync))
+    workflow.add_node("export", _node("export", ExportAgent, ExportAgentAsync))
 
-    # Define workflow: Outline → Expand → Review → Export
+    # Define workflow: Retrieve → Outline → Expand → Review → Export
+    workflow.add_edge("retrieve", "outline")
     workflow.add_edge("outline", "expand")
     workflow.add_edge("expand", "review")
     workflow.add_edge("review", "export")
     workflow.add_edge("export", END)
 
-    workflow.set_entry_point("outline")
+    workflow.set_entry_point("retrieve")
     return workflow
 
 
-def run_ppt_generation(topic: str, slides: int = 7, context: str = "") -> PPTAgentState:
+def _fan_out_slides(state: PPTAgentState) -> Union[str, List[Send]]:
+    """Send every outline slide to its own expand → review branch"""
+    if not state.outline or not state.outline.slides:
+        return "collect"
+
+    # One batched retrieval for all slides, each gets its own chunks
+    contexts = get_slide_contexts(state)
+    return [
+        Send(
+            "slide",
+            SlideTask(
+                index=i,
+                topic=state.topic,
+                slide=slide,
+                context_chunks=chunks,
+                use_cache=state.use_cache,
+                corpus_id=state.corpus_id,
+            ),
+        )
+        for i, (slide, chunks) in enumerate(zip(state.outline.slides, contexts))
+    ]
+
+
+def create_slide_parallel_graph() -> StateGraph:
+    """
+    Create the slide-parallel workflow: after the outline, each slide is
+    expanded and reviewed on its own branch and export joins the results
+    """
+    workflow = StateGraph(PPTAgentState)
+
+    workflow.add_node(
+        "retrieve", _node("retrieve", RetrievalAgent, RetrievalAgentAsync)
+    )
+    workflow.add_node("outline", _node("outline", OutlineAgent, OutlineAgentAsync))
+    workflow.add_node("slide", _node("slide", SlideAgent, SlideAgentAsync))
+    workflow.add_node("collect", _node("collect", CollectSlidesAgent))
+    workflow.add_node("export", _node("export", ExportAgent, ExportAgentAsync))
+
+    # Retrieve → Outline → [Expand → Review] per slide → Collect → Export
+    workflow.add_edge("retrieve", "outline")
+    workflow.add_conditional_edges("outline", _fan_out_slides, ["slide", "collect"])
+    workflow.add_edge("slide", "collect")
+    workflow.add_edge("collect", "export")
+    workflow.add_edge("export", END)
+
+    workflow.set_entry_point("retrieve")
+    return workflow
+
+
+def get_compiled_graph(mode: str = None):
+    """Return the compiled graph for a mode, compiling it once per process"""
+    mode = mode or GRAPH_MODE
+    if mode not in _compiled_graphs:
+        with _compile_lock:
+            if mode not in _compiled_graphs:
+                _compiled_graphs[mode] = create_ppt_graph(mode).compile()
+    return _compiled_graphs[mode]
+
+
+def _run_config(usage: LLMUsageCallback = None) -> dict:
+    """Invocation config: slide concurrency cap, LLM usage metrics and spans"""
+    return {
+        "max_concurrency": SLIDE_CONCURRENCY,
+        "callbacks": [usage or LLMUsageCallback(), TracingCallback()],
+    }
+
+
+def run_ppt_generation(
+    topic: str,
+    slides: int = 7,
+    context: str = "",
+    mode: str = None,
+    use_cache: bool = True,
+    corpus_id: str = None,
+    output_dir: str = None,
+) -> PPTAgentState:
     """Execute the complete PowerPoint generation pipeline"""
-    app = create_ppt_graph().compile()
+    app = get_compiled_graph(mode)
+
+    initial_state = PPTAgentState(
+        topic=topic,
+        slides=slides,
+        context=context,
+        use_cache=use_cache,
+        corpus_id=corpus_id,
+        output_dir=output_dir,
+    )
+
+    # Caps the number of slides in flight in slide-parallel mode
+    with lease_corpus(corpus_id):
+        result = app.invoke(initial_state, config=_run_config())
+    return result
+
+
+async def arun_ppt_generation(
+    topic: str,
+    slides: int = 7,
+    context: str = "",
+    mode: str = None,
+    use_cache: bool = True,
+    corpus_id: str = None,
+    output_dir: str = None,
+) -> PPTAgentState:
+    """Execute the complete PowerPoint generation pipeline without blocking the event loop"""
+    app = get_compiled_graph(mode)
 
-    initial_state = PPTAgentState(topic=topic, slides=slides, context=context)
+    initial_state = PPTAgentState(
+        topic=topic,
+        slides=slides,
+        context=context,
+        use_cache=use_cache,
+        corpus_id=corpus_id,
+        output_dir=output_dir,
+    )
 
-    result = app.invoke(initial_state)
+    with lease_corpus(corpus_id):
+        result = await app.ainvoke(initial_state, config=_run_config())
     return result
 
 
+def stream_ppt_events(
+    topic: str,
+    slides: int = 7,
+    context: str = "",
+    mode: str = None,
+    output_dir: str = None,
+    use_cache: bool = True,
+    corpus_id: str = None,
+):
+    """Execute the pipeline, yielding progress events as it runs"""
+    mode = mode or GRAPH_MODE
+    app = get_compiled_graph(mode)
+    tracker = ProgressTracker(mode)
+    usage = LLMUsageCallback()
+
+    initial_state = PPTAgentState(
+        topic=topic,
+        slides=slides,
+        context=context,
+        output_dir=output_dir,
+        use_cache=use_cache,
+        corpus_id=corpus_id,
+    )
+
+    with lease_corpus(corpus_id):
+        for stream_mode, chunk in app.stream(
+            initial_state,
+            config=_run_config(usage),
+            stream_mode=["updates", "custom"],
+        ):
+            yield from tracker.events(stream_mode, chunk)
+
+    yield tracker.finished(usage.summary())
+
+
+async def astream_ppt_events(
+    topic: str,
+    slides: int = 7,
+    context: str = "",
+    mode: str = None,
+    output_dir: str = None,
+    use_cache: bool = True,
+    corpus_id: str = None,
+):
+    """Execute the pipeline asynchronously, yielding progress events as it runs"""
+    mode = mode or GRAPH_MODE
+    app = get_compiled_graph(mode)
+    tracker = ProgressTracker(mode)
+    usage = LLMUsageCallback()
+
+    initial_state = PPTAgentState(
+        topic=topic,
+        slides=slides,
+        context=context,
+        output_dir=output_dir,
+        use_cache=use_cache,
+        corpus_id=corpus_id,
+    )
+
+    with lease_corpus(corpus_id):
+        async for stream_mode, chunk in app.astream(
+            initial_state,
+            config=_run_config(usage),
+            stream_mode=["updates", "custom"],
+        ):
+            for event in tracker.events(stream_mode, chunk):
+                yield event
+
+    yield tracker.finished(usage.summary())
+
+
 def get_workflow_status(state: PPTAgentState) -> str:
     """Get current workflow status"""
     if state.validation_results:
@@ -0,0 +1,124 @@
+import time
+from pydantic import BaseModel
+from rag_pipeline.context_packer import summarize_stats
+
+SEQUENTIAL_STAGES = ["retrieve", "outline", "expand", "review", "export"]
+SLIDE_PARALLEL_STAGES = ["retrieve", "outline", "slide", "collect", "export"]
+
+# State field carrying each stage's partial result
+STAGE_OUTPUTS = {
+    "outline": "outline",
+    "expand": "expanded_content",
+    "review": "validation_results",
+    "collect": "validation_results",
+}
+
+
+def _jsonable(value):
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    if isinstance(value, (list, tuple)):
+        return [_jsonable(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _jsonable(item) for key, item in value.items()}
+    return value
+
+
+class ProgressTracker:
+    """
+    Turns LangGraph ("updates" / "custom") stream chunks into progress events:
+    stage_started, stage_finished (with duration and partial output),
+    slide_progress and an overall progress fraction.
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.stages = (
+            SLIDE_PARALLEL_STAGES if mode == "slide_parallel" else SEQUENTIAL_STAGES
+        )
+        self.started_at = time.perf_counter()
+        self.finished_stages = set()
+        self.total_slides = None
+        self.slides_done = 0
+        self.context_stats = {}
+        self.durations = {}
+        self.slide_window = None
+
+    def elapsed(self) -> float:
+        return round(time.perf_counter() - self.started_at, 3)
+
+    def progress(self) -> float:
+        done = len(self.finished_stages)
+        if "slide" in self.stages and "slide" not in self.finished_stages:
+            if self.total_slides:
+                done += self.slides_done / self.total_slides
+        return round(min(done / len(self.stages), 1.0), 3)
+
+    def _record_timing(self, event: dict, t: float):
+        if "slide" not in event:
+            if event["event"] == "stage_finished":
+                self.durations[event["stage"]] = event["duration"]
+            return
+        # Slides overlap: the slide stage's wall time spans first start to last finish
+        first, _ = self.slide_window or (t, t)
+        self.slide_window = (first, t)
+        self.durations[event["stage"]] = round(t - first, 3)
+
+    def finished(self, llm_usage: dict = None) -> dict:
+        """Closing event with the run's prompt context savings and timings"""
+        return {
+            "event": "run_finished",
+            "progress": 1.0,
+            "t": self.elapsed(),
+            "context": summarize_stats(self.context_stats),
+            "timings": {
+                "total": self.elapsed(),
+                "stages": dict(self.durations),
+                "llm": llm_usage or {},
+            },
+        }
+
+    def events(self, stream_mode: str, chunk):
+        """Translate one stream chunk into zero or more event dicts"""
+        if stream_mode == "custom":
+            t = self.elapsed()
+            self._record_timing(chunk, t)
+            yield {**chunk, "progress": self.progress(), "t": t}
+            return
+
+        for node, update in chunk.items():
+            update = update or {}
+            self.context_stats.update(update.get("context_stats") or {})
+            if node == "outline" and update.get("outline") is not None:
+                self.total_slides = len(update["outline"].slides)
+
+            if node == "slide":
+                self.slides_done += 1
+                results = update.get("slide_results") or []
+                if self.slides_done == self.total_slides:
+                    self.finished_stages.add("slide")
+                yield {
+                    "event": "slide_progress",
+                    "completed": self.slides_done,
+                    "total": self.total_slides,
+                    "data": _jsonable(results),
+                    "progress": self.progress(),
+                    "t": self.elapsed(),
+                }
+                continue
+
+            self.finished_stages.add(node)
+            event = {
+                "event": "stage_output",
+                "stage": node,
+                "progress": self.progress(),
+                "t": self.elapsed(),
+            }
+            field = STAGE_OUTPUTS.get(node)
+            if field and update.get(field) is not None:
+                event["data"] = _jsonable(update[field])
+            elif node == "retrieve":
+                event["data"] = {"chunks": len(update.get("retrieved_context") or [])}
+            elif node == "export":
+                event["data"] = {"output_dir": update.get("output_dir") or "outputs"}
+            yield event
@@ -0,0 +1,208 @@
+import math
+import faiss
+import numpy as np
+from app.config import (
+    INDEX_TYPE,
+    INDEX_AUTO_IVF_MIN,
+    INDEX_AUTO_PQ_MIN,
+    INDEX_NLIST,
+    INDEX_PQ_M,
+    INDEX_HNSW_M,
+    INDEX_TRAIN_SAMPLE,
+    INDEX_NPROBE,
+    INDEX_EF_SEARCH,
+)
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw", "sq8", "fp16")
+
+# Types whose stored codes are too coarse to rebuild from: re-quantizing
+# their reconstructions compounds the error on every rebuild
+LOSSY_TYPES = ("ivf_pq", "sq8")
+
+# faiss k-means wants at least this many training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+def choose_index_type(ntotal: int, index_type: str = None) -> str:
+    """
+    Index type for a corpus of ntotal vectors: INDEX_TYPE when set, otherwise
+    exact search for small corpora, IVF-Flat for medium ones and IVF-PQ
+    (compressed) for large ones
+    """
+    index_type = index_type or INDEX_TYPE
+    if index_type != "auto":
+        if index_type not in INDEX_TYPES:
+            raise ValueError(
+                f"Unknown index type {index_type!r} (expected one of {INDEX_TYPES} or auto)"
+            )
+        return index_type
+    if ntotal < INDEX_AUTO_IVF_MIN:
+        return "flat"
+    if ntotal < INDEX_AUTO_PQ_MIN:
+        return "ivf_flat"
+    return "ivf_pq"
+
+
+def index_type_of(index) -> str:
+    """Which of INDEX_TYPES a faiss index is (None for anything else)"""
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexFlat):
+        return "flat"
+    if isinstance(index, faiss.IndexIVFPQ):
+        return "ivf_pq"
+    if isinstance(index, faiss.IndexIVFFlat):
+        return "ivf_flat"
+    if isinstance(index, faiss.IndexHNSWFlat):
+        return "hnsw"
+    if isinstance(index, faiss.IndexScalarQuantizer):
+        if index.sq.qtype == faiss.ScalarQuantizer.QT_8bit:
+            return "sq8"
+        if index.sq.qtype == faiss.ScalarQuantizer.QT_fp16:
+            return "fp16"
+    return None
+
+
+def _nlist(ntotal: int) -> int:
+    if INDEX_NLIST > 0:
+        return INDEX_NLIST
+    # ~4·sqrt(n) lists, with enough points per list to train the centroids
+    return max(1, min(int(4 * math.sqrt(ntotal)), ntotal // MIN_POINTS_PER_CENTROID))
+
+
+def _pq_params(dimension: int, ntotal: int):
+    """Sub-quantizer count dividing the dimension and bits per code"""
+    m = INDEX_PQ_M or max(1, dimension // 8)
+    while dimension % m:
+        m -= 1
+    # 8-bit codes need 256 centroids per sub-quantizer; small corpora get fewer
+    nbits = 8
+    while nbits > 4 and ntotal < (1 << nbits) * MIN_POINTS_PER_CENTROID:
+        nbits -= 1
+    return m, nbits
+
+
+def factory_string(index_type: str, dimension: int, ntotal: int) -> str:
+    if index_type == "flat":
+        return "Flat"
+    if index_type == "ivf_flat":
+        return f"IVF{_nlist(ntotal)},Flat"
+    if index_type == "ivf_pq":
+        m, nbits = _pq_params(dimension, ntotal)
+        return f"IVF{_nlist(ntotal)},PQ{m}x{nbits}"
+    if index_type == "hnsw":
+        return f"HNSW{INDEX_HNSW_M}"
+    if index_type == "sq8":
+        return "SQ8"
+    if index_type == "fp16":
+        return "SQfp16"
+    raise ValueError(f"Unknown index type {index_type!r}")
+
+
+def configure_search(index, nprobe: int = None, ef_search: int = None):
+    """Set query-time accuracy/speed knobs: IVF nprobe and HNSW efSearch"""
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = min(nprobe or INDEX_NPROBE, ivf.nlist)
+    hnsw = faiss.downcast_index(index)
+    if isinstance(hnsw, faiss.IndexHNSW):
+        hnsw.hnsw.efSearch = ef_search or INDEX_EF_SEARCH
+    return index
+
+
+def restore_direct_map(index):
+    """
+    Rebuild an IVF index's id -> list map after reading it from disk or
+    adding vectors, which both leave the hashtable without the new ids
+    """
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None and ivf.direct_map.type == faiss.DirectMap.Hashtable:
+        ivf.set_direct_map_type(faiss.DirectMap.NoMap)
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+    return index
+
+
+def build_index(vectors: np.ndarray, index_type: str, seed: int = 1234):
+    """
+    Build and fill a faiss index of the given type (L2 distance, like the
+    default LangChain index). Trainable indexes are trained on a random
+    sample of at most INDEX_TRAIN_SAMPLE vectors.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    ntotal, dimension = vectors.shape
+    index = faiss.index_factory(
+        dimension, factory_string(index_type, dimension, ntotal), faiss.METRIC_L2
+    )
+
+    if not index.is_trained:
+        sample = vectors
+        if ntotal > INDEX_TRAIN_SAMPLE:
+            rows = np.random.default_rng(seed).choice(
+                ntotal, INDEX_TRAIN_SAMPLE, replace=False
+            )
+            sample = vectors[np.sort(rows)]
+        index.train(sample)
+
+    index.add(vectors)
+    ivf = faiss.try_extract_index_ivf(index)
+    if ivf is not None:
+        # Keeps reconstruct() (chunk vectors for MMR) and remove_ids() working;
+        # set after add() so the map is built from the filled inverted lists
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+    return configure_search(index)
+
+
+def supports_removal(index) -> bool:
+    """
+    Whether remove_ids() keeps the remaining vectors at contiguous positions,
+    as the vectorstore's position -> chunk id map expects. Flat-code indexes
+    shift them down; IVF keeps the old ids and HNSW cannot remove at all.
+    """
+    return index_type_of(index) in ("flat", "sq8", "fp16")
+
+
+def stored_vectors(index) -> np.ndarray:
+    """All vectors of an index in id order (approximate for quantized indexes)"""
+    if index.ntotal == 0:
+        return np.zeros((0, index.d), dtype=np.float32)
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def is_lossy(index) -> bool:
+    return index_type_of(index) in LOSSY_TYPES
+
+
+def exact_vectors(vectorstore) -> np.ndarray:
+    """
+    All vectors of a vectorstore in id order. Lossy indexes only hold
+    approximations, so their chunks are embedded again instead, which is
+    served from the persistent embedding cache.
+    """
+    if not is_lossy(vectorstore.index):
+        return stored_vectors(vectorstore.index)
+    texts = [
+        vectorstore.docstore.search(doc_id).page_content
+        for _, doc_id in sorted(vectorstore.index_to_docstore_id.items())
+    ]
+    return np.asarray(
+        vectorstore.embedding_function.embed_documents(texts), dtype=np.float32
+    )
+
+
+def convert_index(vectorstore, index_type: str):
+    """Rebuild the vectorstore's index as index_type, keeping ids and order"""
+    vectors = exact_vectors(vectorstore)
+    vectorstore.index = build_index(vectors, index_type)
+    return vectorstore
+
+
+def optimize_index(vectorstore, index_type: str = None):
+    """
+    Convert the index to the type chosen for its current size (no-op when
+    it already has that type). Ingestion accumulates into whatever index
+    exists and calls this before saving.
+    """
+    target = choose_index_type(vectorstore.index.ntotal, index_type)
+    if index_type_of(vectorstore.index) == target or vectorstore.index.ntotal == 0:
+        return vectorstore
+    print(f"Building {target} index over {vectorstore.index.ntotal} vectors")
+    return convert_index(vectorstore, target)
@@ -0,0 +1,132 @@
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Mapping
+from langchain_community.docstore.base import Docstore
+from langchain_core.documents import Document
+
+CHUNK_STORE_FILE = "chunks.sqlite"
+
+
+def write_chunk_store(path: str, vectorstore):
+    """Write the chunk texts and metadata of a vectorstore keyed by FAISS position"""
+    docstore = vectorstore.docstore
+    rows = (
+        (
+            int(position),
+            doc_id,
+            document.page_content,
+            json.dumps(document.metadata, default=str),
+        )
+        for position, doc_id in sorted(vectorstore.index_to_docstore_id.items())
+        for document in (docstore.search(doc_id),)
+    )
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("""CREATE TABLE chunks (
+                position INTEGER PRIMARY KEY,
+                doc_id TEXT NOT NULL UNIQUE,
+                text TEXT NOT NULL,
+                metadata TEXT NOT NULL
+            )""")
+        conn.executemany("INSERT INTO chunks VALUES (?, ?, ?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class ChunkStore:
+    """
+    Read-only view of a chunk store. The file is never modified after it is
+    written (saves replace it), so it is opened immutable and memory-mapped:
+    worker processes share its pages through the OS page cache and only the
+    rows of retrieved chunks are read.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            f"file:{path}?mode=ro&immutable=1", uri=True, check_same_thread=False
+        )
+        self._conn.execute(f"PRAGMA mmap_size={os.path.getsize(path)}")
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()
+
+    def __len__(self):
+        return self._count
+
+    def _one(self, query: str, params):
+        with self._lock:
+            return self._conn.execute(query, params).fetchone()
+
+    def _all(self, query: str):
+        with self._lock:
+            return self._conn.execute(query).fetchall()
+
+    def get(self, doc_id: str):
+        row = self._one("SELECT text, metadata FROM chunks WHERE doc_id = ?", (doc_id,))
+        if row is None:
+            return None
+        return Document(id=doc_id, page_content=row[0], metadata=json.loads(row[1]))
+
+    def doc_id(self, position: int):
+        row = self._one("SELECT doc_id FROM chunks WHERE position = ?", (position,))
+        return row[0] if row is not None else None
+
+    def position(self, doc_id: str):
+        row = self._one("SELECT position FROM chunks WHERE doc_id = ?", (doc_id,))
+        return row[0] if row is not None else None
+
+    def ids(self):
+        """(position, doc_id) of every chunk in position order"""
+        return self._all("SELECT position, doc_id FROM chunks ORDER BY position")
+
+    def documents(self):
+        return [
+            Document(id=doc_id, page_content=text, metadata=json.loads(metadata))
+            for doc_id, text, metadata in self._all(
+                "SELECT doc_id, text, metadata FROM chunks ORDER BY position"
+            )
+        ]
+
+
+class ChunkDocstore(Docstore):
+    """LangChain docstore that fetches chunks from a ChunkStore on lookup"""
+
+    def __init__(self, store: ChunkStore):
+        self.store = store
+
+    def search(self, search: str):
+        document = self.store.get(search)
+        if document is None:
+            return f"ID {search} not found."
+        return document
+
+
+class ChunkIdMap(Mapping):
+    """FAISS position -> docstore id, looked up in a ChunkStore"""
+
+    def __init__(self, store: ChunkStore):
+        self.store = store
+
+    def __getitem__(self, position):
+        doc_id = self.store.doc_id(int(position))
+        if doc_id is None:
+            raise KeyError(position)
+        return doc_id
+
+    def __len__(self):
+        return len(self.store)
+
+    def __iter__(self):
+        return (position for position, _ in self.store.ids())
+
+    def items(self):
+        return self.store.ids()
+
+    def values(self):
+        return [doc_id for _, doc_id in self.store.ids()]
+
+    def position(self, doc_id: str):
+        return self.store.position(doc_id)
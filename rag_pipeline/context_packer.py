@@ -0,0 +1,184 @@
+import os
+from dataclasses import dataclass
+import numpy as np
+from utils.tokens import count_tokens
+
+# Shortest shared run of text treated as chunk overlap rather than coincidence
+MIN_OVERLAP_CHARS = 40
+
+
+@dataclass
+class PackedContext:
+    """Prompt context block and what packing it saved"""
+
+    text: str
+    tokens: int
+    naive_tokens: int
+    chunks_used: int
+    chunks_dropped: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.naive_tokens - self.tokens)
+
+    def stats(self) -> dict:
+        return {
+            "tokens": self.tokens,
+            "naive_tokens": self.naive_tokens,
+            "tokens_saved": self.tokens_saved,
+            "chunks_used": self.chunks_used,
+            "chunks_dropped": self.chunks_dropped,
+        }
+
+
+def citation(metadata: dict) -> str:
+    """Compact source tag such as [report.pdf p.3] (pages are 1-based)"""
+    name = metadata.get("filename") or os.path.basename(
+        str(metadata.get("source", "source"))
+    )
+    page = metadata.get("page")
+    if isinstance(page, int):
+        return f"[{name} p.{page + 1}]"
+    return f"[{name}]"
+
+
+def trim_overlap(text: str, previous: str) -> str:
+    """
+    Remove the part of text that repeats previous: either text is contained
+    in it, or they share a run at the seam left by the splitter's overlap.
+    """
+    if text in previous:
+        return ""
+
+    longest = min(len(text), len(previous))
+    for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+        if previous.endswith(text[:size]):
+            return text[size:].lstrip(" .,;\n")
+        if previous.startswith(text[-size:]):
+            return text[:-size].rstrip()
+    return text
+
+
+def mmr_order(
+    vectors: np.ndarray,
+    relevance: np.ndarray,
+    lambda_mult: float = 0.7,
+    duplicate_threshold: float = 0.95,
+):
+    """
+    Maximal marginal relevance ordering of candidates. Candidates whose cosine
+    similarity to an already selected one exceeds duplicate_threshold are dropped.
+    Returns (selected indices in order, dropped indices).
+    """
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    unit = vectors / np.where(norms == 0, 1, norms)
+    similarity = unit @ unit.T
+
+    remaining = list(range(len(vectors)))
+    selected, dropped = [], []
+    max_similarity = np.full(len(vectors), -np.inf)
+    while remaining:
+        candidates = np.array(remaining)
+        redundancy = np.where(
+            np.isinf(max_similarity[candidates]), 0, max_similarity[candidates]
+        )
+        scores = lambda_mult * relevance[candidates] - (1 - lambda_mult) * redundancy
+        best = int(candidates[int(np.argmax(scores))])
+        remaining.remove(best)
+
+        if max_similarity[best] >= duplicate_threshold:
+            dropped.append(best)
+            continue
+        selected.append(best)
+        max_similarity = np.maximum(max_similarity, similarity[best])
+    return selected, dropped
+
+
+def _relevance(chunks) -> np.ndarray:
+    """Map distances (lower is closer) to relevance in [0, 1]"""
+    scores = [chunk.score for chunk in chunks]
+    if any(score is None for score in scores):
+        return np.linspace(1.0, 0.0, num=len(chunks))
+    distances = np.asarray(scores, dtype=np.float32)
+    spread = distances.max() - distances.min()
+    if spread == 0:
+        return np.ones(len(chunks))
+    return 1.0 - (distances - distances.min()) / spread
+
+
+def summarize_stats(context_stats: dict) -> dict:
+    """Totals over the per-prompt packing stats of a run"""
+    totals = {"prompts": len(context_stats or {}), "tokens": 0, "naive_tokens": 0}
+    for stats in (context_stats or {}).values():
+        totals["tokens"] += stats.get("tokens", 0)
+        totals["naive_tokens"] += stats.get("naive_tokens", 0)
+    totals["tokens_saved"] = max(0, totals["naive_tokens"] - totals["tokens"])
+    return totals
+
+
+def naive_context(chunks, limit: int = 5) -> str:
+    """The unpacked context: the first chunks joined as they are"""
+    return "\n\n".join(chunk.content for chunk in chunks[:limit])
+
+
+def pack_context(
+    chunks,
+    budget: int,
+    vectors: np.ndarray = None,
+    lambda_mult: float = 0.7,
+    duplicate_threshold: float = 0.95,
+) -> PackedContext:
+    """
+    Pack retrieved chunks (content, metadata, score) into at most `budget`
+    tokens. Chunks are ordered by MMR over their vectors when available
+    (dropping near duplicates), text already present from an overlapping
+    chunk is trimmed, and every block is prefixed with its citation.
+    """
+    naive_tokens = count_tokens(naive_context(chunks)) if chunks else 0
+    if not chunks:
+        return PackedContext("", 0, naive_tokens, 0, 0)
+
+    if vectors is not None and len(vectors) == len(chunks):
+        order, dropped = mmr_order(
+            np.asarray(vectors, dtype=np.float32),
+            _relevance(chunks),
+            lambda_mult,
+            duplicate_threshold,
+        )
+    else:
+        order, dropped = list(range(len(chunks))), []
+
+    blocks, used_texts = [], {}
+    tokens = 0
+    dropped_count = len(dropped)
+    for index in order:
+        chunk = chunks[index]
+        text = chunk.content.strip()
+        source = chunk.metadata.get("source")
+        for previous in used_texts.get(source, []):
+            text = trim_overlap(text, previous)
+            if not text:
+                break
+        if not text:
+            dropped_count += 1
+            continue
+
+        block = f"{citation(chunk.metadata)} {text}"
+        block_tokens = count_tokens(block)
+        if tokens + block_tokens > budget:
+            # A smaller chunk further down may still fit
+            dropped_count += 1
+            continue
+
+        blocks.append(block)
+        used_texts.setdefault(source, []).append(chunk.content)
+        tokens += block_tokens
+
+    text = "\n\n".join(blocks)
+    return PackedContext(
+        text,
+        count_tokens(text) if text else 0,
+        naive_tokens,
+        len(blocks),
+        dropped_count,
+    )
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from contextlib import contextmanager, suppress
+from rag_pipeline.loader import list_files
+from rag_pipeline.manifest import file_hash
+from rag_pipeline.pipeline import RAGPipeline
+from rag_pipeline.splitter import SPLIT_CHUNK_SIZE, SPLIT_CHUNK_OVERLAP
+from rag_pipeline.vector_store import vectorstore_exists
+from app.dependencies import corpus_pipelines
+from app.config import (
+    CORPUS_INDEX_ROOT,
+    CORPUS_MAX_INDEXES,
+    CORPUS_TTL,
+    EMBED_MODEL_NAME,
+    DIMENSIONS,
+)
+
+_CORPUS_ID = re.compile(r"[0-9a-f]{16}")
+
+_ingest_locks = {}
+_ingest_locks_guard = threading.Lock()
+# Corpus id -> number of runs reading its index (guarded by _ingest_locks_guard)
+_leases = {}
+
+
+def corpus_id(data_dir: str) -> str:
+    """
+    Content address of a set of uploaded files: the same file names and
+    bytes, embedded with the same model and splitter settings, give the
+    same id wherever the files were saved
+    """
+    digest = hashlib.sha256(
+        f"{EMBED_MODEL_NAME}:{DIMENSIONS}:{SPLIT_CHUNK_SIZE}:{SPLIT_CHUNK_OVERLAP}".encode()
+    )
+    for path in sorted(list_files(data_dir)):
+        name = os.path.relpath(path, data_dir).replace(os.sep, "/")
+        digest.update(f"\n{name}:{file_hash(path)}".encode())
+    return digest.hexdigest()[:16]
+
+
+def is_corpus_id(value: str) -> bool:
+    """Whether value is well-formed (and so safe to use as a directory name)"""
+    return bool(value) and _CORPUS_ID.fullmatch(value) is not None
+
+
+def corpus_directory(corpus_id: str) -> str:
+    return os.path.join(CORPUS_INDEX_ROOT, corpus_id)
+
+
+def corpus_exists(corpus_id: str) -> bool:
+    return is_corpus_id(corpus_id) and vectorstore_exists(corpus_directory(corpus_id))
+
+
+def _ingest_lock(corpus_id: str) -> threading.Lock:
+    with _ingest_locks_guard:
+        return _ingest_locks.setdefault(corpus_id, threading.Lock())
+
+
+def ingest_corpus(data_dir: str) -> str:
+    """
+    Index uploaded files into their own namespace and return its corpus id.
+    An identical upload reuses the index already built for it; concurrent
+    identical uploads are indexed once.
+    """
+    cid = corpus_id(data_dir)
+    with _ingest_lock(cid):
+        if vectorstore_exists(corpus_directory(cid)):
+            print(f"Reusing index of corpus {cid}")
+            touch_corpus(cid)
+        else:
+            RAGPipeline(persist_directory=corpus_directory(cid)).ingest(data_dir)
+    prune_corpora(keep=cid)
+    return cid
+
+
+def touch_corpus(corpus_id: str):
+    """Record a use of a corpus index; its directory mtime orders eviction"""
+    with suppress(FileNotFoundError):
+        os.utime(corpus_directory(corpus_id))
+
+
+@contextmanager
+def lease_corpus(corpus_id: str = None):
+    """Keep a corpus index from being pruned while a run reads it"""
+    if not corpus_id:
+        yield
+        return
+    with _ingest_locks_guard:
+        _leases[corpus_id] = _leases.get(corpus_id, 0) + 1
+    try:
+        yield
+    finally:
+        with _ingest_locks_guard:
+            _leases[corpus_id] -= 1
+            if not _leases[corpus_id]:
+                del _leases[corpus_id]
+        touch_corpus(corpus_id)
+
+
+def _remove_unleased(corpus_id: str) -> bool:
+    """Delete a corpus index unless a run holds a lease on it"""
+    trash = os.path.join(CORPUS_INDEX_ROOT, f".deleted-{uuid.uuid4().hex}")
+    with _ingest_locks_guard:
+        if _leases.get(corpus_id):
+            return False
+        try:
+            os.rename(corpus_directory(corpus_id), trash)
+        except FileNotFoundError:
+            return False
+    shutil.rmtree(trash, ignore_errors=True)
+    return True
+
+
+def prune_corpora(keep: str = None, now: float = None) -> list:
+    """
+    Delete corpus indexes unused for CORPUS_TTL seconds, then the least
+    recently used beyond CORPUS_MAX_INDEXES; returns the deleted ids.
+    Corpora being ingested or leased by a running generation are skipped.
+    """
+    now = time.time() if now is None else now
+    try:
+        names = os.listdir(CORPUS_INDEX_ROOT)
+    except FileNotFoundError:
+        return []
+    last_used = {}
+    for name in names:
+        if is_corpus_id(name):
+            with suppress(FileNotFoundError):
+                last_used[name] = os.stat(corpus_directory(name)).st_mtime
+
+    by_recency = sorted(last_used, key=last_used.get, reverse=True)
+    if keep in last_used:
+        by_recency.remove(keep)
+        by_recency.insert(0, keep)
+    deleted = []
+    for n, cid in enumerate(by_recency):
+        expired = CORPUS_TTL > 0 and now - last_used[cid] > CORPUS_TTL
+        if cid == keep or (n < CORPUS_MAX_INDEXES and not expired):
+            continue
+        lock = _ingest_lock(cid)
+        if not lock.acquire(blocking=False):
+            continue
+        try:
+            if _remove_unleased(cid):
+                deleted.append(cid)
+        finally:
+            lock.release()
+
+    if deleted:
+        corpus_pipelines().discard_where(lambda key: key in deleted)
+        print(f"Deleted {len(deleted)} unused corpus indexes")
+    return deleted
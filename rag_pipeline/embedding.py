@@ -1,5 +1,84 @@
+from langchain_core.embeddings import Embeddings
+from app.config import EMBED_MODEL_NAME, DIMENSIONS
 from app.dependencies import embed_model as embed_model_factory
+from app.dependencies import embedding_cache as embedding_cache_factory
+from app.dependencies import query_embedding_cache as query_cache_factory
+from rag_pipeline.embedding_cache import embedding_key
+from rag_pipeline.query_cache import normalize_query
+
+
+class CachedEmbeddings(Embeddings):
+    """Embeddings wrapper that serves document vectors from the persistent cache
+    and query vectors from an in-process LRU, calling the model only on misses"""
+
+    def __init__(self, embeddings: Embeddings, cache=None, query_cache=None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.query_cache = query_cache
+
+    def embed_documents(self, texts):
+        if self.cache is None:
+            return self.embeddings.embed_documents(texts)
+
+        keys = [embedding_key(text, EMBED_MODEL_NAME, DIMENSIONS) for text in texts]
+        vectors = self.cache.get_many(keys)
+
+        # Embed each missing text once, even if it repeats in the batch
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors and key not in missing:
+                missing[key] = text
+
+        if missing:
+            new_vectors = self.embeddings.embed_documents(list(missing.values()))
+            computed = dict(zip(missing.keys(), new_vectors))
+            self.cache.put_many(computed)
+            vectors.update(computed)
+
+        return [vectors[key] for key in keys]
+
+    def embed_query(self, text):
+        if self.query_cache is None:
+            return self.embeddings.embed_query(text)
+
+        key = (EMBED_MODEL_NAME, int(DIMENSIONS), normalize_query(text))
+        vector = self.query_cache.get(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.query_cache.set(key, vector)
+        return list(vector)
+
+    def embed_queries(self, texts):
+        """Embed several queries, sending all LRU misses in one batched request"""
+        keys = [
+            (EMBED_MODEL_NAME, int(DIMENSIONS), normalize_query(text)) for text in texts
+        ]
+        vectors = {}
+        missing = {}
+        for key, text in zip(keys, texts):
+            vector = self.query_cache.get(key) if self.query_cache is not None else None
+            if vector is not None:
+                vectors[key] = vector
+            elif key not in missing:
+                missing[key] = text
+
+        if missing:
+            new_vectors = self.embeddings.embed_documents(list(missing.values()))
+            for key, vector in zip(missing.keys(), new_vectors):
+                if self.query_cache is not None:
+                    self.query_cache.set(key, vector)
+                vectors[key] = vector
+
+        return [list(vectors[key]) for key in keys]
 
 
 def get_embedding_function():
-    return embed_model_factory()
+    return CachedEmbeddings(
+        embed_model_factory(), embedding_cache_factory(), query_cache_factory()
+    )
+
+
+def get_embedding_cache_stats():
+    """Hit/miss counters of the persistent embedding cache"""
+    cache = embedding_cache_factory()
+    return cache.stats() if cache is not None else {}
@@ -0,0 +1,182 @@
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import openai
+from langchain_core.embeddings import Embeddings
+from utils.tokens import count_tokens, split_tokens
+from utils.tracing import span, bind_context
+
+RETRYABLE_ERRORS = (
+    openai.RateLimitError,
+    openai.APIConnectionError,
+    openai.APITimeoutError,
+    openai.InternalServerError,
+)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate"""
+
+    def __init__(self, per_minute: float):
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self.rate = per_minute / 60.0
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, amount: float = 1):
+        # Requests larger than the bucket are let through once it is full
+        amount_needed = min(amount, self.capacity)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= amount_needed:
+                    self.tokens -= amount
+                    return
+                wait = (amount_needed - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class EmbeddingEngine(Embeddings):
+    """
+    Embedding client that sends token-bounded batches concurrently while
+    staying within requests-per-minute and tokens-per-minute budgets.
+    429s and transient errors are retried with exponential backoff, and
+    vectors are returned in input order. Texts longer than max_input_tokens
+    (the model's context) are embedded in pieces and averaged, weighted by
+    token count, as OpenAIEmbeddings does.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        dimensions: int = None,
+        client: openai.OpenAI = None,
+        concurrency: int = 4,
+        max_batch_tokens: int = 8000,
+        max_batch_size: int = 2048,
+        requests_per_minute: float = 3000,
+        tokens_per_minute: float = 1_000_000,
+        max_retries: int = 6,
+        max_input_tokens: int = 8191,
+    ):
+        self.model = model
+        self.dimensions = dimensions
+        self.client = client or openai.OpenAI(max_retries=0)
+        self.concurrency = concurrency
+        self.max_batch_tokens = max_batch_tokens
+        self.max_batch_size = max_batch_size
+        self.max_retries = max_retries
+        self.max_input_tokens = max_input_tokens
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+
+    def _batches(self, texts):
+        """Group texts into (token_count, texts) batches under the token/size caps"""
+        batches = []
+        batch, batch_tokens = [], 0
+        for text in texts:
+            tokens = count_tokens(text)
+            if batch and (
+                batch_tokens + tokens > self.max_batch_tokens
+                or len(batch) >= self.max_batch_size
+            ):
+                batches.append((batch_tokens, batch))
+                batch, batch_tokens = [], 0
+            batch.append(text)
+            batch_tokens += tokens
+        if batch:
+            batches.append((batch_tokens, batch))
+        return batches
+
+    def _retry_delay(self, error, attempt):
+        response = getattr(error, "response", None)
+        retry_after = (
+            response.headers.get("retry-after") if response is not None else None
+        )
+        if retry_after:
+            try:
+                return float(retry_after)
+            except ValueError:
+                pass
+        return min(60.0, 0.5 * 2**attempt) * (0.5 + random.random())
+
+    def _embed_batch(self, batch):
+        tokens, texts = batch
+        kwargs = {"model": self.model, "input": texts}
+        if self.dimensions:
+            kwargs["dimensions"] = self.dimensions
+
+        with span("embed.batch", texts=len(texts), tokens=tokens) as batch_span:
+            for attempt in range(self.max_retries + 1):
+                self.request_bucket.acquire(1)
+                self.token_bucket.acquire(tokens)
+                try:
+                    response = self.client.embeddings.create(**kwargs)
+                except RETRYABLE_ERRORS as e:
+                    if attempt == self.max_retries:
+                        raise
+                    time.sleep(self._retry_delay(e, attempt))
+                    continue
+                if batch_span is not None:
+                    batch_span.set(attempts=attempt + 1)
+                data = sorted(response.data, key=lambda item: item.index)
+                return [item.embedding for item in data]
+
+    def _embed_pieces(self, texts):
+        batches = self._batches(texts)
+        if len(batches) == 1 or self.concurrency <= 1:
+            results = [self._embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self.concurrency, len(batches))
+            ) as pool:
+                results = list(pool.map(bind_context(self._embed_batch), batches))
+
+        return [vector for batch_vectors in results for vector in batch_vectors]
+
+    def _split(self, texts):
+        """(pieces, owner index of each piece) with no piece over max_input_tokens"""
+        pieces, owners = [], []
+        for n, text in enumerate(texts):
+            if count_tokens(text) > self.max_input_tokens:
+                parts = split_tokens(text, self.max_input_tokens)
+            else:
+                parts = [text]
+            pieces.extend(parts)
+            owners.extend([n] * len(parts))
+        return pieces, owners
+
+    def embed_documents(self, texts):
+        if not texts:
+            return []
+
+        pieces, owners = self._split(texts)
+        vectors = self._embed_pieces(pieces)
+        if len(pieces) == len(texts):
+            return vectors
+
+        groups = {}
+        for i, owner in enumerate(owners):
+            groups.setdefault(owner, []).append(i)
+        combined = []
+        for indexes in groups.values():
+            if len(indexes) == 1:
+                combined.append(vectors[indexes[0]])
+                continue
+            average = np.average(
+                [vectors[i] for i in indexes],
+                axis=0,
+                weights=[count_tokens(pieces[i]) for i in indexes],
+            )
+            combined.append((average / np.linalg.norm(average)).tolist())
+        return combined
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
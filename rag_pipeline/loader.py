@@ -1,33 +1,162 @@
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from langchain_community.document_loaders import (
     PyPDFLoader,
     TextLoader,
     Docx2txtLoader,
 )
+from langchain_core.documents import Document
+from pypdf import PdfReader
+from app.config import LOADER_WORKERS, PDF_PAGES_PER_TASK
 import os
 
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".docx")
 
-def load_documents(file_path):
+
+def list_files(file_path):
+    """Expand a directory path into the list of files under it"""
+    if not isinstance(file_path, str):
+        return list(file_path)
+
+    file_paths = []
+    for root, _, files in os.walk(file_path):
+        for file in files:
+            file_paths.append(os.path.join(root, file))
+    return file_paths
+
+
+def _get_loader(path):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".pdf":
+        return PyPDFLoader(path)
+    elif ext == ".txt":
+        return TextLoader(path)
+    elif ext == ".docx":
+        return Docx2txtLoader(path)
+    return None
+
+
+def load_documents(file_path, workers=None):
+    """
+    Load documents from a directory or list of files.
+
+    With workers > 1 files (and page ranges of large PDFs) are parsed on a
+    process pool; documents are returned in the same order as sequential loading.
+    """
+    workers = LOADER_WORKERS if workers is None else workers
+    paths = list_files(file_path)
+    if workers > 1:
+        return _load_documents_parallel(paths, workers)
 
     documents = []
-    if isinstance(file_path, str):
-        # Handle directory path
-        file_paths = []
-        for root, _, files in os.walk(file_path):
-            for file in files:
-                file_paths.append(os.path.join(root, file))
-        file_path = file_paths
-
-    for path in file_path:
-        ext = os.path.splitext(path)[1].lower()
-        if ext == ".pdf":
-            loader = PyPDFLoader(path)
-        elif ext == ".txt":
-            loader = TextLoader(path)
-        elif ext == ".docx":
-            loader = Docx2txtLoader(path)
-        else:
+    for path in paths:
+        loader = _get_loader(path)
+        if loader is None:
             print(f"Skipping unsuported files: {path}")
             continue
         documents.extend(loader.load())
 
     return documents
+
+
+def iter_documents(file_path):
+    """Lazily yield documents (pages) file by file"""
+    for path in list_files(file_path):
+        loader = _get_loader(path)
+        if loader is None:
+            print(f"Skipping unsuported files: {path}")
+            continue
+        yield from loader.lazy_load()
+
+
+def _load_file(path):
+    return _get_loader(path).load()
+
+
+def _pdf_metadata(reader, path):
+    """
+    Document metadata as PyPDFLoader sets it: lower-case keys without the
+    leading "/", ISO creation and modification dates, source and total_pages
+    """
+    metadata = {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+    for key, value in (reader.metadata or {}).items():
+        key = key.lstrip("/").lower()
+        value = value if type(value) in (str, int) else str(value)
+        if key in ("creationdate", "moddate"):
+            try:
+                value = datetime.strptime(
+                    value.replace("'", ""), "D:%Y%m%d%H%M%S%z"
+                ).isoformat("T")
+            except ValueError:
+                pass
+        elif isinstance(value, str):
+            value = value.strip()
+        metadata[key] = value
+    metadata.update(source=path, total_pages=len(reader.pages))
+    return metadata
+
+
+def _load_pdf_pages(path, start, stop):
+    """Parse pages [start, stop) of a PDF the way PyPDFLoader does"""
+    reader = PdfReader(path)
+    metadata = _pdf_metadata(reader, path)
+
+    documents = []
+    for page_number in range(start, stop):
+        text = reader.pages[page_number].extract_text(extraction_mode="plain")
+        documents.append(
+            Document(
+                page_content=text.strip(),
+                metadata=metadata
+                | {
+                    "page": page_number,
+                    "page_label": reader.page_labels[page_number],
+                },
+            )
+        )
+    return documents
+
+
+def _page_count(path):
+    return len(PdfReader(path).pages)
+
+
+def _run_task(task):
+    path, page_range = task
+    if page_range is None:
+        return _load_file(path)
+    return _load_pdf_pages(path, *page_range)
+
+
+def _plan_tasks(paths, pool):
+    """One task per file, large PDFs split into page ranges"""
+    supported = []
+    for path in paths:
+        if _get_loader(path) is None:
+            print(f"Skipping unsuported files: {path}")
+            continue
+        supported.append(path)
+
+    # Page counts open every PDF, so they are read on the pool too
+    pdfs = [path for path in supported if path.lower().endswith(".pdf")]
+    page_counts = dict(zip(pdfs, pool.map(_page_count, pdfs)))
+
+    tasks = []
+    for path in supported:
+        page_count = page_counts.get(path, 0)
+        if page_count > PDF_PAGES_PER_TASK:
+            for start in range(0, page_count, PDF_PAGES_PER_TASK):
+                stop = min(start + PDF_PAGES_PER_TASK, page_count)
+                tasks.append((path, (start, stop)))
+        else:
+            tasks.append((path, None))
+    return tasks
+
+
+def _load_documents_parallel(paths, workers):
+    documents = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # map() yields results in task order, keeping output deterministic
+        for task_documents in pool.map(_run_task, _plan_tasks(paths, pool)):
+            documents.extend(task_documents)
+    return documents
@@ -0,0 +1,101 @@
+import hashlib
+import json
+import os
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+
+def file_hash(path: str) -> str:
+    """SHA-256 of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def load_manifest(persist_directory="vector_db"):
+    """Return {path: entry} for the files the index was built from"""
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_manifest(files, persist_directory="vector_db"):
+    os.makedirs(persist_directory, exist_ok=True)
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "files": files}, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def scan_files(paths, previous=None):
+    """
+    Build manifest entries (size, mtime, content hash) for the given files.
+    Files whose size and mtime match the previous manifest are not re-hashed.
+    """
+    previous = previous or {}
+    entries = {}
+    for path in paths:
+        stat = os.stat(path)
+        old = previous.get(path)
+        if old and old["size"] == stat.st_size and old["mtime"] == stat.st_mtime:
+            sha256 = old["sha256"]
+        else:
+            sha256 = file_hash(path)
+        entries[path] = {
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": sha256,
+            "chunk_ids": [],
+        }
+    return entries
+
+
+def diff_manifest(previous, current):
+    """Split files into (added, modified, deleted, unchanged) path lists"""
+    added, modified, unchanged = [], [], []
+    for path, entry in current.items():
+        old = previous.get(path)
+        if old is None:
+            added.append(path)
+        elif old["sha256"] != entry["sha256"]:
+            modified.append(path)
+        else:
+            unchanged.append(path)
+    deleted = [path for path in previous if path not in current]
+    return added, modified, deleted, unchanged
+
+
+def chunk_id_prefix(source: str, content_hash: str) -> str:
+    """Stable chunk id prefix for one version of one file"""
+    raw = f"{source}\x00{content_hash}".encode("utf-8")
+    return hashlib.sha256(raw).hexdigest()[:16]
+
+
+def assign_chunk_ids(chunks, entries):
+    """
+    Give every chunk a stable id derived from its file's path and content hash,
+    and record the ids on the file's manifest entry
+    """
+    counters = {}
+    for chunk in chunks:
+        source = chunk.metadata.get("source", "unknown")
+        entry = entries.get(source)
+        content_hash = entry["sha256"] if entry else "unknown"
+        n = counters.get(source, 0)
+        counters[source] = n + 1
+
+        chunk_id = f"{chunk_id_prefix(source, content_hash)}-{n}"
+        chunk.metadata["chunk_id"] = chunk_id
+        if entry is not None:
+            entry["chunk_ids"].append(chunk_id)
+
+    return [chunk.metadata["chunk_id"] for chunk in chunks]
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+from langchain_core.documents import Document
+
+# Bumped when loaders change the documents they produce
+CACHE_FORMAT_VERSION = 2
+
+
+def _dump(documents):
+    return [
+        {"page_content": doc.page_content, "metadata": doc.metadata}
+        for doc in documents
+    ]
+
+
+def _restore(items, source):
+    """Rebuild documents, pointing them at the file they were loaded from now"""
+    documents = []
+    for item in items:
+        metadata = item["metadata"]
+        metadata["source"] = source
+        if "filename" in metadata:
+            metadata["filename"] = os.path.basename(source)
+        documents.append(Document(page_content=item["page_content"], metadata=metadata))
+    return documents
+
+
+class ParseCache:
+    """
+    Disk cache of extracted page text (keyed by file content hash) and of
+    produced chunks (keyed by content hash and splitter parameters).
+    Total size is bounded; least recently used entries are evicted first.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def splitter_key(chunk_size, chunk_overlap, separators) -> str:
+        raw = json.dumps([CACHE_FORMAT_VERSION, chunk_size, chunk_overlap, separators])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def _read(self, name):
+        path = self._path(name)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                items = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        # Touch the entry so eviction treats it as recently used
+        os.utime(path)
+        return items
+
+    def _write(self, name, documents):
+        path = self._path(name)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(_dump(documents), f, default=str)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def get_pages(self, content_hash, source):
+        items = self._read(f"{content_hash}-v{CACHE_FORMAT_VERSION}.pages.json")
+        return None if items is None else _restore(items, source)
+
+    def put_pages(self, content_hash, pages):
+        self._write(f"{content_hash}-v{CACHE_FORMAT_VERSION}.pages.json", pages)
+
+    def get_chunks(self, content_hash, splitter_key, source):
+        items = self._read(f"{content_hash}-{splitter_key}.chunks.json")
+        with self._lock:
+            if items is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return None if items is None else _restore(items, source)
+
+    def put_chunks(self, content_hash, splitter_key, chunks):
+        self._write(f"{content_hash}-{splitter_key}.chunks.json", chunks)
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for entry in os.scandir(self.directory):
+                if entry.is_file() and entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
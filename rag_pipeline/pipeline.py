@@ -1,39 +1,626 @@
-from rag_pipeline.loader import load_documents
-from rag_pipeline.splitter import split_documents
-from rag_pipeline.vector_store import build_vectorstore, load_vectorstore
+import os
+import shutil
+import sys
+import threading
+from itertools import islice
+import numpy as np
+from rag_pipeline.loader import load_documents, list_files, iter_documents
+from rag_pipeline.splitter import (
+    split_documents,
+    iter_split_documents,
+    SPLIT_CHUNK_SIZE,
+    SPLIT_CHUNK_OVERLAP,
+    SEPARATORS,
+)
+from rag_pipeline.vector_store import (
+    load_vectorstore,
+    save_vectorstore,
+    add_embeddings,
+    vectorstore_exists,
+    index_version,
+)
 from rag_pipeline.retriever import get_retriever
+from rag_pipeline.ann_index import (
+    convert_index,
+    is_lossy,
+    optimize_index,
+    stored_vectors,
+    supports_removal,
+)
+from rag_pipeline.chunk_store import CHUNK_STORE_FILE, ChunkIdMap, ChunkStore
+from rag_pipeline.shards import (
+    shard_key,
+    read_shard_layout,
+    load_shards,
+    load_shard,
+    split_vectorstore,
+    save_shards,
+    search_shards,
+)
+from rag_pipeline.embedding import get_embedding_function, get_embedding_cache_stats
+from rag_pipeline.query_cache import normalize_query
+from rag_pipeline.parse_cache import ParseCache
+from app.dependencies import (
+    query_embedding_cache,
+    search_cache,
+    search_pool,
+    parse_cache,
+)
+from rag_pipeline.manifest import (
+    load_manifest,
+    save_manifest,
+    scan_files,
+    diff_manifest,
+    assign_chunk_ids,
+    chunk_id_prefix,
+)
+from app.config import INGEST_BATCH_SIZE, INGEST_CHECKPOINT_EVERY, INDEX_SHARDS
+from utils.metrics import INGEST_STAGE_SECONDS, INGEST_CHUNKS, QUERY_SECONDS
+from utils.tracing import span
+
+CHECKPOINT_DIR = ".checkpoint"
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _chunk_prefixes(entries):
+    return {chunk_id_prefix(path, entry["sha256"]) for path, entry in entries.items()}
+
+
+def _segments(checkpoint_dir):
+    """Directories of the saved checkpoint segments, oldest first"""
+    try:
+        names = os.listdir(checkpoint_dir)
+    except FileNotFoundError:
+        return []
+    return [
+        os.path.join(checkpoint_dir, name)
+        for name in sorted(names)
+        if name.startswith("segment-") and not name.endswith(".tmp")
+    ]
+
+
+def _save_segment(checkpoint_dir, vectorstore):
+    """Save the chunks embedded since the last checkpoint as a new segment"""
+    path = os.path.join(checkpoint_dir, f"segment-{len(_segments(checkpoint_dir)):06d}")
+    # Renamed into place once complete, so a crash never leaves half a segment
+    shutil.rmtree(path + ".tmp", ignore_errors=True)
+    save_vectorstore(vectorstore, path + ".tmp")
+    os.rename(path + ".tmp", path)
+
+
+def _append_segment(vectorstore, segment, prefixes):
+    """Add the chunks of segment whose id prefix is in prefixes to vectorstore"""
+    vectors = stored_vectors(segment.index)
+    rows = [
+        (position, doc_id)
+        for position, doc_id in sorted(segment.index_to_docstore_id.items())
+        if doc_id.rsplit("-", 1)[0] in prefixes
+    ]
+    if not rows:
+        return vectorstore
+    documents = [segment.docstore.search(doc_id) for _, doc_id in rows]
+    return add_embeddings(
+        vectorstore,
+        [document.page_content for document in documents],
+        vectors[[position for position, _ in rows]],
+        [document.metadata for document in documents],
+        [doc_id for _, doc_id in rows],
+    )
 
 
 class RAGPipeline:
-    def __init__(self):
+    def __init__(self, persist_directory: str = "vector_db"):
+        self.persist_directory = persist_directory
         self.retriever = None
+        self.shards = None
+        self.index_version = None
+        # (shards, version) published together so readers never mix the two
+        self._loaded = None
+        self._positions = None
+        self._reload_lock = threading.Lock()
 
-    def ingest(self, data_dir: str):
+    def ingest(self, data_dir: str, incremental: bool = False):
         """
         Run ingestion: load → split → embed → store
+
+        With incremental=True only new or changed files are parsed and embedded,
+        and vectors of deleted or changed files are removed from the index.
         """
-        documents = load_documents(data_dir)
-        chunks = split_documents(documents, 800, 120)
-        build_vectorstore(chunks)
+        if incremental and vectorstore_exists(self.persist_directory):
+            previous = load_manifest(self.persist_directory)
+            if previous and self._ingest_incremental(data_dir, previous):
+                self._print_cache_stats()
+                return
+
+        paths = list_files(data_dir)
+        entries = scan_files(paths)
+        chunks = self._load_and_split(paths, entries)
+        if not chunks:
+            raise ValueError("No chunks provided to build vectorDB")
+        ids = assign_chunk_ids(chunks, entries)
+        vectorstore = self._embed_and_add(None, chunks, ids)
+        self._publish(vectorstore, entries, data_dir)
 
         print(f"Ingested {len(chunks)} chunks")
+        self._print_cache_stats()
+
+    def ingest_streaming(self, data_dir: str, batch_size: int = None):
+        """
+        Run ingestion as a bounded-memory stream:
+        load → clean → split → embed → add to index, over fixed-size batches.
+
+        Every INGEST_CHECKPOINT_EVERY batches the chunks embedded since the
+        last checkpoint are saved as a segment and dropped from memory, so
+        each checkpoint only writes new data. Rerunning after a crash skips
+        chunks already in a segment; segments are merged at the end.
+        """
+        batch_size = batch_size or INGEST_BATCH_SIZE
+        paths = list_files(data_dir)
+        entries = scan_files(paths)
+        checkpoint_dir = os.path.join(self.persist_directory, CHECKPOINT_DIR)
+
+        done_ids = self._checkpointed_ids(checkpoint_dir, entries)
+        if done_ids:
+            print(f"Resuming from checkpoint with {len(done_ids)} chunks")
+
+        segment = None
+        chunk_count = 0
+        batch_count = 0
+        for batch in _batched(self._iter_chunks(paths, entries), batch_size):
+            chunk_count += len(batch)
+            batch = [c for c in batch if c.metadata["chunk_id"] not in done_ids]
+            if not batch:
+                continue
+
+            segment = self._embed_and_add(
+                segment, batch, [chunk.metadata["chunk_id"] for chunk in batch]
+            )
+
+            batch_count += 1
+            if batch_count % INGEST_CHECKPOINT_EVERY == 0:
+                _save_segment(checkpoint_dir, segment)
+                segment = None
+
+        vectorstore = self._merge_segments(checkpoint_dir, segment, entries)
+        if vectorstore is None:
+            raise ValueError("No chunks provided to build vectorDB")
+
+        self._publish(vectorstore, entries, data_dir)
+        shutil.rmtree(checkpoint_dir, ignore_errors=True)
+
+        print(f"Ingested {chunk_count} chunks")
+        self._print_cache_stats()
+
+    def _publish(self, vectorstore, entries, data_dir):
+        """
+        Save a freshly built index (split into INDEX_SHARDS shards by source
+        file when sharding is on) with its manifest and start serving it
+        """
+        with span("index.save", shards=INDEX_SHARDS), INGEST_STAGE_SECONDS.time(
+            stage="index"
+        ):
+            if INDEX_SHARDS > 1:
+                for path, entry in entries.items():
+                    entry["shard"] = shard_key(path, data_dir, INDEX_SHARDS)
+                shards = split_vectorstore(
+                    vectorstore,
+                    lambda document: shard_key(
+                        document.metadata.get("source", "unknown"),
+                        data_dir,
+                        INDEX_SHARDS,
+                    ),
+                )
+                version = save_shards(self.persist_directory, shards, INDEX_SHARDS)
+                shards = load_shards(self.persist_directory)
+            else:
+                vectorstore = optimize_index(vectorstore)
+                version = save_vectorstore(vectorstore, self.persist_directory)
+                shards = [vectorstore]
+        save_manifest(entries, self.persist_directory)
+        self._swap(shards, version)
+
+    def _delete(self, vectorstore, ids):
+        """Remove chunks by id from the vectorstore"""
+        if not supports_removal(vectorstore.index):
+            # Delete from a flat copy; optimize_index() rebuilds the
+            # configured index type before saving
+            vectorstore = convert_index(vectorstore, "flat")
+        vectorstore.delete(ids)
+        return vectorstore
+
+    def _embed_and_add(self, vectorstore, chunks, ids):
+        """Embed chunks and add them to the index (created when None)"""
+        texts = [chunk.page_content for chunk in chunks]
+        with span("embed_documents", texts=len(texts)), INGEST_STAGE_SECONDS.time(
+            stage="embed"
+        ):
+            vectors = get_embedding_function().embed_documents(texts)
+        with span("index.add", vectors=len(vectors)), INGEST_STAGE_SECONDS.time(
+            stage="index"
+        ):
+            vectorstore = add_embeddings(
+                vectorstore,
+                texts,
+                vectors,
+                [chunk.metadata for chunk in chunks],
+                ids,
+            )
+        INGEST_CHUNKS.inc(len(chunks))
+        return vectorstore
+
+    def _iter_chunks(self, paths, entries):
+        """Stream chunks file by file with stable per-file chunk ids"""
+        for path in paths:
+            entry = entries[path]
+            prefix = chunk_id_prefix(path, entry["sha256"])
+            chunks = iter_split_documents(
+                iter_documents([path]), SPLIT_CHUNK_SIZE, SPLIT_CHUNK_OVERLAP
+            )
+            for n, chunk in enumerate(chunks):
+                chunk_id = f"{prefix}-{n}"
+                chunk.metadata["chunk_id"] = chunk_id
+                entry["chunk_ids"].append(chunk_id)
+                yield chunk
+
+    def _checkpointed_ids(self, checkpoint_dir, entries):
+        """
+        Ids of chunks saved by an interrupted streaming ingest, leaving out
+        chunks of files that changed since (only the chunk ids are read)
+        """
+        prefixes = _chunk_prefixes(entries)
+        return {
+            doc_id
+            for segment in _segments(checkpoint_dir)
+            for _, doc_id in ChunkStore(os.path.join(segment, CHUNK_STORE_FILE)).ids()
+            if doc_id.rsplit("-", 1)[0] in prefixes
+        }
+
+    def _merge_segments(self, checkpoint_dir, segment, entries):
+        """
+        One vectorstore with the chunks of all saved segments (except those
+        of changed files) followed by the unsaved last segment
+        """
+        prefixes = _chunk_prefixes(entries)
+        vectorstore = None
+        for path in _segments(checkpoint_dir):
+            vectorstore = _append_segment(
+                vectorstore, load_vectorstore(path, writable=True), prefixes
+            )
+        if segment is not None:
+            vectorstore = _append_segment(vectorstore, segment, prefixes)
+        return vectorstore
+
+    def _ingest_incremental(self, data_dir: str, previous: dict) -> bool:
+        """
+        Apply file changes to the saved index, touching only the shards of
+        changed files. Returns False when the index must be rebuilt instead
+        because INDEX_SHARDS no longer matches its layout.
+        """
+        layout = read_shard_layout(self.persist_directory)
+        if (layout["count"] if layout else 1) != max(INDEX_SHARDS, 1):
+            print("Shard count changed, rebuilding the index")
+            return False
+
+        entries = scan_files(list_files(data_dir), previous)
+        added, modified, deleted, unchanged = diff_manifest(previous, entries)
+
+        for path in unchanged:
+            entries[path]["chunk_ids"] = previous[path]["chunk_ids"]
+            if layout:
+                entries[path]["shard"] = previous[path]["shard"]
+
+        if not (added or modified or deleted):
+            # Picks up refreshed mtimes so unchanged files are not re-hashed
+            save_manifest(entries, self.persist_directory)
+            print("Index is up to date")
+            return True
+
+        changed = added + modified
+        chunks = self._load_and_split(changed, entries) if changed else []
+        ids = assign_chunk_ids(chunks, entries)
+
+        if layout is None:
+            vectorstore = load_vectorstore(self.persist_directory, writable=True)
+            stale_ids = [
+                chunk_id
+                for path in modified + deleted
+                for chunk_id in previous[path]["chunk_ids"]
+            ]
+            vectorstore, removed = self._update(vectorstore, stale_ids, chunks, ids)
+            with span("index.save"), INGEST_STAGE_SECONDS.time(stage="index"):
+                vectorstore = optimize_index(vectorstore)
+                version = save_vectorstore(vectorstore, self.persist_directory)
+            shards = [vectorstore]
+        else:
+            # {shard key: (stale chunk ids, new chunks, new chunk ids)}
+            updates = {}
+            for path in modified + deleted:
+                update = updates.setdefault(previous[path]["shard"], ([], [], []))
+                update[0].extend(previous[path]["chunk_ids"])
+            for path in changed:
+                entries[path]["shard"] = shard_key(path, data_dir, INDEX_SHARDS)
+            for chunk, chunk_id in zip(chunks, ids):
+                key = shard_key(
+                    chunk.metadata.get("source", "unknown"), data_dir, INDEX_SHARDS
+                )
+                update = updates.setdefault(key, ([], [], []))
+                update[1].append(chunk)
+                update[2].append(chunk_id)
+
+            rebuilt = {}
+            removed = 0
+            for key, (stale_ids, new_chunks, new_ids) in updates.items():
+                vectorstore = load_shard(self.persist_directory, layout, key)
+                rebuilt[key], count = self._update(
+                    vectorstore, stale_ids, new_chunks, new_ids
+                )
+                removed += count
+            with span("index.save", shards=len(rebuilt)), INGEST_STAGE_SECONDS.time(
+                stage="index"
+            ):
+                version = save_shards(
+                    self.persist_directory, rebuilt, INDEX_SHARDS, update=True
+                )
+            shards = load_shards(self.persist_directory)
+            print(f"Rebuilt {len(rebuilt)} of {INDEX_SHARDS} shards")
+
+        save_manifest(entries, self.persist_directory)
+        self._swap(shards, version)
+
+        print(
+            f"Incremental ingest: {len(added)} added, {len(modified)} modified, "
+            f"{len(deleted)} deleted, {len(unchanged)} unchanged files "
+            f"({len(chunks)} new chunks, {removed} removed)"
+        )
+        return True
+
+    def _update(self, vectorstore, stale_ids, chunks, ids):
+        """
+        Remove stale chunks from a writable vectorstore (None for a new
+        shard) and add new ones; returns it with the number removed
+        """
+        if vectorstore is not None:
+            stored_ids = set(vectorstore.index_to_docstore_id.values())
+            stale_ids = [chunk_id for chunk_id in stale_ids if chunk_id in stored_ids]
+            if is_lossy(vectorstore.index) and (stale_ids or chunks):
+                # Retrain on exact vectors rather than coding new chunks with
+                # a stale quantizer; optimize_index() rebuilds it before saving
+                vectorstore = convert_index(vectorstore, "flat")
+            if stale_ids:
+                vectorstore = self._delete(vectorstore, stale_ids)
+        else:
+            stale_ids = []
+        if chunks:
+            vectorstore = self._embed_and_add(vectorstore, chunks, ids)
+        return vectorstore, len(stale_ids)
+
+    def _load_and_split(self, paths, entries):
+        """
+        Parse and split files. Files whose content was seen before are served
+        from the parse cache and skip extraction and/or splitting.
+        """
+        cache = parse_cache()
+        splitter_key = ParseCache.splitter_key(
+            SPLIT_CHUNK_SIZE, SPLIT_CHUNK_OVERLAP, SEPARATORS
+        )
+
+        chunks_by_path = {}
+        pages_by_path = {}
+        to_parse = []
+        for path in paths:
+            content_hash = entries[path]["sha256"]
+            if cache is not None:
+                chunks = cache.get_chunks(content_hash, splitter_key, path)
+                if chunks is not None:
+                    chunks_by_path[path] = chunks
+                    continue
+                pages = cache.get_pages(content_hash, path)
+                if pages is not None:
+                    pages_by_path[path] = pages
+                    continue
+            to_parse.append(path)
+
+        if to_parse:
+            with span("load_documents", files=len(to_parse)), INGEST_STAGE_SECONDS.time(
+                stage="parse"
+            ):
+                for doc in load_documents(to_parse):
+                    source = doc.metadata.get("source")
+                    pages_by_path.setdefault(source, []).append(doc)
+
+        for path, pages in pages_by_path.items():
+            with span("split_documents", source=path), INGEST_STAGE_SECONDS.time(
+                stage="split"
+            ):
+                chunks = split_documents(pages, SPLIT_CHUNK_SIZE, SPLIT_CHUNK_OVERLAP)
+            chunks_by_path[path] = chunks
+            if cache is not None and path in entries:
+                content_hash = entries[path]["sha256"]
+                if path in to_parse:
+                    cache.put_pages(content_hash, pages)
+                cache.put_chunks(content_hash, splitter_key, chunks)
+
+        return [chunk for path in paths for chunk in chunks_by_path.get(path, [])]
+
+    def _print_cache_stats(self):
+        cache_stats = get_embedding_cache_stats()
+        if cache_stats:
+            print(
+                f"Embedding cache: {cache_stats['hits']} hits, "
+                f"{cache_stats['misses']} misses"
+            )
 
     def load(self):
         """
-        Load existing vectorstore and create retriever
+        Load existing vectorstore (all of its shards) and create retriever.
+        Returns the loaded (shards, index version).
         """
-        vectorstore = load_vectorstore()
-        if not vectorstore:
+        version = index_version(self.persist_directory)
+        if version is None:
             raise RuntimeError("Vector DB not found. Run ingest() first.")
 
-        self.retriever = get_retriever(vectorstore)
+        with self._reload_lock:
+            self._load_version(version)
+            return self._loaded
+
+    def memory_bytes(self) -> int:
+        """Approximate memory held by the loaded index and its chunk texts"""
+        if self.shards is None:
+            return 0
+        total = 0
+        for vectorstore in self.shards:
+            index = vectorstore.index
+            documents = getattr(vectorstore.docstore, "_dict", {}).values()
+            total += index.ntotal * index.d * 4 + sum(
+                sys.getsizeof(doc.page_content) for doc in documents
+            )
+        return total
+
+    def chunk_count(self) -> int:
+        shards, _ = self.get_shards()
+        return sum(vectorstore.index.ntotal for vectorstore in shards)
+
+    def _load_version(self, version):
+        shards = load_shards(self.persist_directory)
+        # An ingest may have published a newer index while this one was loading
+        latest = index_version(self.persist_directory)
+        if latest != version:
+            version = latest
+            shards = load_shards(self.persist_directory)
+        self._swap(shards, version)
+
+    def _swap(self, shards, version):
+        # A LangChain retriever can only wrap an unsharded index
+        self.retriever = get_retriever(shards[0]) if len(shards) == 1 else None
+        self.shards = shards
+        self.index_version = version
+        self._positions = None
+        self._loaded = (shards, version)
+
+        # Results of the previous index version can no longer be hit
+        persist_directory = self.persist_directory
+        search_cache().discard_where(
+            lambda key: key[0] == persist_directory and key[1] != version
+        )
+
+    def get_shards(self):
+        """
+        Return the resident (index shards, index version), reloading them
+        first if a newer version was published on disk (e.g. by an ingest
+        in another pipeline/process)
+        """
+        if self._loaded is None:
+            raise RuntimeError("Pipeline not loaded. Call load() first.")
+
+        version = index_version(self.persist_directory)
+        if version is not None and version != self._loaded[1]:
+            with self._reload_lock:
+                if version != self._loaded[1]:
+                    self._load_version(version)
+        return self._loaded
 
     def query(self, question: str):
         """
         Retrieve relevant documents for a query
         """
-        if not self.retriever:
-            raise RuntimeError("Pipeline not loaded. Call load() first.")
+        return [doc for doc, _ in self.query_with_scores(question, k=5)]
+
+    def query_with_scores(self, question: str, k: int = 5):
+        """
+        Retrieve (document, distance) pairs for a query.
+        Results are cached per (index version, query, k).
+        """
+        with QUERY_SECONDS.time(kind="single"):
+            shards, version = self.get_shards()
+            key = (self.persist_directory, version, normalize_query(question), k)
+
+            cache = search_cache()
+            results = cache.get(key)
+            if results is None:
+                matrix = np.asarray(
+                    [get_embedding_function().embed_query(question)], dtype=np.float32
+                )
+                with span("faiss.search", queries=1, k=k, shards=len(shards)):
+                    results = search_shards(shards, matrix, k, search_pool())[0]
+                cache.set(key, results)
+        return list(results)
+
+    def query_batch_with_scores(self, questions, k: int = 5):
+        """
+        Retrieve (document, distance) pairs for several queries at once:
+        uncached queries are embedded in one request and searched with a
+        single FAISS call per shard over the query matrix.
+        """
+        with QUERY_SECONDS.time(kind="batch"):
+            shards, version = self.get_shards()
+            cache = search_cache()
+            keys = [
+                (self.persist_directory, version, normalize_query(q), k)
+                for q in questions
+            ]
+
+            results = [cache.get(key) for key in keys]
+            missing = [i for i, cached in enumerate(results) if cached is None]
+            if missing:
+                vectors = get_embedding_function().embed_queries(
+                    [questions[i] for i in missing]
+                )
+                matrix = np.asarray(vectors, dtype=np.float32)
+                with span(
+                    "faiss.search", queries=len(missing), k=k, shards=len(shards)
+                ):
+                    hits = search_shards(shards, matrix, k, search_pool())
+
+                for row, i in enumerate(missing):
+                    cache.set(keys[i], hits[row])
+                    results[i] = hits[row]
+
+        return [list(hits) for hits in results]
+
+    def _locate(self, shards, doc_id):
+        """(shard number, position) of a chunk by docstore id, or None"""
+        if self._positions is None:
+            self._positions = {
+                doc_id: (n, position)
+                for n, vectorstore in enumerate(shards)
+                if not isinstance(vectorstore.index_to_docstore_id, ChunkIdMap)
+                for position, doc_id in vectorstore.index_to_docstore_id.items()
+            }
+        if doc_id in self._positions:
+            return self._positions[doc_id]
+        for n, vectorstore in enumerate(shards):
+            id_map = vectorstore.index_to_docstore_id
+            if isinstance(id_map, ChunkIdMap):
+                position = id_map.position(doc_id)
+                if position is not None:
+                    return n, position
+        return None
+
+    def chunk_vectors(self, ids):
+        """Stored vectors of chunks by docstore id (None if any is unavailable)"""
+        if not ids:
+            return None
+
+        shards, _ = self.get_shards()
+        located = [self._locate(shards, doc_id) for doc_id in ids]
+        if None in located:
+            return None
+        try:
+            return np.vstack(
+                [shards[n].index.reconstruct(position) for n, position in located]
+            )
+        except RuntimeError:
+            return None
 
-        vectorstore = load_vectorstore()
-        return vectorstore.similarity_search(question, k=5)
+    def cache_stats(self) -> dict:
+        """Hit rates and memory use of the retrieval caches"""
+        return {
+            "query_embeddings": query_embedding_cache().stats(),
+            "search_results": search_cache().stats(),
+            "embeddings": get_embedding_cache_stats(),
+        }
@@ -0,0 +1,99 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+
+def normalize_query(text: str) -> str:
+    """Case- and whitespace-insensitive form of a query used in cache keys"""
+    return " ".join(text.split()).casefold()
+
+
+def vector_size(vector) -> int:
+    """Approximate memory held by a list/tuple of Python floats"""
+    return sys.getsizeof(vector) + 24 * len(vector)
+
+
+def results_size(results) -> int:
+    """Approximate memory held by a list of (Document, score) pairs"""
+    size = sys.getsizeof(results)
+    for doc, _ in results:
+        size += sys.getsizeof(doc.page_content) + sys.getsizeof(doc.metadata)
+    return size
+
+
+class LRUCache:
+    """
+    Thread-safe in-process LRU cache with optional TTL and size accounting.
+    With max_bytes > 0 entries are also evicted to stay under that size
+    (the most recent entry is always kept).
+    """
+
+    def __init__(
+        self, max_entries: int, ttl: float = 0, sizeof=sys.getsizeof, max_bytes=0
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None:
+                value, expires_at, size = item
+                if expires_at is None or expires_at > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.bytes -= size
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        expires_at = time.monotonic() + self.ttl if self.ttl > 0 else None
+        size = self.sizeof(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[2]
+            self._data[key] = (value, expires_at, size)
+            self.bytes += size
+            while len(self._data) > self.max_entries or (
+                self.max_bytes and self.bytes > self.max_bytes and len(self._data) > 1
+            ):
+                _, (_, _, evicted_size) = self._data.popitem(last=False)
+                self.bytes -= evicted_size
+
+    def discard_where(self, predicate):
+        """Drop every entry whose key matches the predicate"""
+        with self._lock:
+            for key in [key for key in self._data if predicate(key)]:
+                _, _, size = self._data.pop(key)
+                self.bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+            }
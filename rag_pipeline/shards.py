@@ -0,0 +1,158 @@
+import hashlib
+import heapq
+import json
+import os
+import shutil
+import uuid
+from contextlib import suppress
+from itertools import islice
+from rag_pipeline.ann_index import exact_vectors, optimize_index
+from rag_pipeline.vector_store import (
+    INDEX_FILES,
+    LEGACY_DOCSTORE_FILE,
+    SHARDS_DIR,
+    SHARDS_FILE,
+    add_embeddings,
+    load_vectorstore,
+    publish_version,
+    save_vectorstore,
+)
+from utils.tracing import bind_context, span
+
+
+def shard_key(source: str, data_dir: str, count: int) -> str:
+    """Shard of a source file: a stable hash of its path within data_dir"""
+    name = os.path.relpath(source, data_dir).replace(os.sep, "/")
+    digest = hashlib.sha256(name.encode("utf-8")).digest()
+    return f"{int.from_bytes(digest[:8], 'big') % count:04d}"
+
+
+def shard_directory(persist_directory: str, name: str) -> str:
+    return os.path.join(persist_directory, SHARDS_DIR, name)
+
+
+def read_shard_layout(persist_directory="vector_db"):
+    """
+    {"count": shard count, "shards": {shard key: directory name}} of a
+    sharded index (None for a single index)
+    """
+    try:
+        with open(os.path.join(persist_directory, SHARDS_FILE), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def load_shards(persist_directory="vector_db"):
+    """Read-only vectorstores of all shards (just the index when unsharded)"""
+    layout = read_shard_layout(persist_directory)
+    if layout is None:
+        return [load_vectorstore(persist_directory)]
+    return [
+        load_vectorstore(shard_directory(persist_directory, name))
+        for _, name in sorted(layout["shards"].items())
+    ]
+
+
+def load_shard(persist_directory: str, layout: dict, key: str):
+    """Writable copy of one shard (None if it does not exist yet)"""
+    name = layout["shards"].get(key)
+    if name is None:
+        return None
+    return load_vectorstore(shard_directory(persist_directory, name), writable=True)
+
+
+def split_vectorstore(vectorstore, key_of):
+    """Split a vectorstore into {shard key: vectorstore}; key_of maps a Document to its key"""
+    vectors = exact_vectors(vectorstore)
+    groups = {}
+    for position, doc_id in sorted(vectorstore.index_to_docstore_id.items()):
+        document = vectorstore.docstore.search(doc_id)
+        groups.setdefault(key_of(document), []).append((position, doc_id, document))
+
+    shards = {}
+    for key, members in groups.items():
+        shards[key] = add_embeddings(
+            None,
+            [document.page_content for _, _, document in members],
+            vectors[[position for position, _, _ in members]],
+            [document.metadata for _, _, document in members],
+            [doc_id for _, doc_id, _ in members],
+        )
+    return shards
+
+
+def save_shards(persist_directory: str, shards: dict, count: int, update=False) -> str:
+    """
+    Save shards and publish the layout listing them. With update=True the
+    given shards replace their previous versions and the others are kept;
+    a None or empty vectorstore drops its shard. Each save goes to a new
+    directory, so files of a published shard never change under readers.
+    """
+    published = read_shard_layout(persist_directory) or {"shards": {}}
+    current = dict(published["shards"]) if update else {}
+    for key, vectorstore in sorted(shards.items()):
+        if vectorstore is None or vectorstore.index.ntotal == 0:
+            current.pop(key, None)
+            continue
+        name = f"{key}-{uuid.uuid4().hex[:8]}"
+        save_vectorstore(
+            optimize_index(vectorstore), shard_directory(persist_directory, name)
+        )
+        current[key] = name
+
+    path = os.path.join(persist_directory, SHARDS_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({"count": count, "shards": current}, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+    # Replaces a single index
+    for name in INDEX_FILES + (LEGACY_DOCSTORE_FILE,):
+        with suppress(FileNotFoundError):
+            os.remove(os.path.join(persist_directory, name))
+    # Keeps the previous generation for readers still loading it
+    keep = set(current.values()) | set(published["shards"].values())
+    for name in os.listdir(os.path.join(persist_directory, SHARDS_DIR)):
+        if name not in keep:
+            shutil.rmtree(shard_directory(persist_directory, name), ignore_errors=True)
+    return publish_version(persist_directory)
+
+
+def search_shards(shards, matrix, k: int, pool=None):
+    """
+    Top-k (document, distance) pairs per query row across all shards.
+    Shards are searched concurrently on pool (FAISS releases the GIL) and
+    their sorted hit lists are merged with a heap.
+    """
+
+    def search(n):
+        with span("faiss.shard", shard=n, vectors=shards[n].index.ntotal):
+            return shards[n].index.search(matrix, k)
+
+    if pool is not None and len(shards) > 1:
+        results = list(pool.map(bind_context(search), range(len(shards))))
+    else:
+        results = [search(n) for n in range(len(shards))]
+
+    merged = []
+    for row in range(len(matrix)):
+        hits = heapq.merge(
+            *(
+                [
+                    (float(distance), n, int(position))
+                    for distance, position in zip(distances[row], positions[row])
+                    if position != -1
+                ]
+                for n, (distances, positions) in enumerate(results)
+            )
+        )
+        merged.append(
+            [
+                (
+                    shards[n].docstore.search(shards[n].index_to_docstore_id[position]),
+                    distance,
+                )
+                for distance, n, position in islice(hits, k)
+            ]
+        )
+    return merged
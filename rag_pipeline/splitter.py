@@ -1,8 +1,12 @@
 import re
 import os
-from copy import deepcopy
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
+SPLIT_CHUNK_SIZE = 800
+SPLIT_CHUNK_OVERLAP = 120
+SEPARATORS = ["\n\n", "\n", ".", ";", " ", ""]
+
 
 def clean_text(text: str) -> str:
     """Clean and normalize text to reduce redundancy."""
@@ -12,26 +16,32 @@ def clean_text(text: str) -> str:
     return text.strip()
 
 
-def split_documents(documents, chunk_size, chunk_overlap):
+def iter_split_documents(documents, chunk_size, chunk_overlap):
+    """
+    Lazily clean and split documents one at a time.
+    Documents are never copied wholesale; each chunk gets a shallow copy of
+    its page's metadata.
+    """
     splitter = RecursiveCharacterTextSplitter(
         chunk_size=chunk_size,
         chunk_overlap=chunk_overlap,
-        separators=["\n\n", "\n", ".", ";", " ", ""],
+        separators=SEPARATORS,
     )
-    cleaned_docs = []
+    idx = 0
     for doc in documents:
-        new_doc = deepcopy(doc)
-        new_doc.page_content = clean_text(doc.page_content)
+        metadata = dict(doc.metadata)
+        source = metadata.get("source", "unknown")
+        metadata["filename"] = os.path.basename(source)
 
-        source = new_doc.metadata.get("source", "unknown")
-        new_doc.metadata["filename"] = os.path.basename(source)
+        for text in splitter.split_text(clean_text(doc.page_content)):
+            chunk = Document(page_content=text, metadata=dict(metadata))
+            chunk.metadata["chunk_id"] = idx
+            idx += 1
+            yield chunk
 
-        cleaned_docs.append(new_doc)
 
-    chunks = splitter.split_documents(cleaned_docs)
-    
-    for idx, chunk in enumerate(chunks):
-        chunk.metadata["chunk_id"] = idx
+def split_documents(documents, chunk_size, chunk_overlap):
+    chunks = list(iter_split_documents(documents, chunk_size, chunk_overlap))
 
     # print(f"Total chunks created: {len(chunks)}")
     return chunks
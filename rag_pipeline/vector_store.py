@@ -1,19 +1,147 @@
+import os
+import shutil
+import time
+import uuid
+from contextlib import suppress
+import faiss
+from langchain_community.docstore.in_memory import InMemoryDocstore
 from langchain_community.vectorstores import FAISS
 from rag_pipeline.embedding import get_embedding_function
+from rag_pipeline.ann_index import configure_search, restore_direct_map
+from rag_pipeline.chunk_store import (
+    CHUNK_STORE_FILE,
+    ChunkStore,
+    ChunkDocstore,
+    ChunkIdMap,
+    write_chunk_store,
+)
 
+VERSION_FILE = "index_version"
+INDEX_FILE = "index.faiss"
+INDEX_FILES = (INDEX_FILE, CHUNK_STORE_FILE)
+# Docstore pickled by FAISS.save_local() in indexes saved by older versions
+LEGACY_DOCSTORE_FILE = "index.pkl"
+# Sharded indexes list their shards, saved under SHARDS_DIR, in SHARDS_FILE
+SHARDS_FILE = "shards.json"
+SHARDS_DIR = "shards"
 
-def build_vectorstore(chunks, persist_directory="vector_db"):
+
+def build_vectorstore(chunks, persist_directory="vector_db", ids=None):
     if not chunks:
         raise ValueError("No chunks provided to build vectorDB")
     embeddings = get_embedding_function()
-    vectorstore = FAISS.from_documents(chunks, embeddings)
-    vectorstore.save_local(persist_directory)
+    vectorstore = FAISS.from_documents(chunks, embeddings, ids=ids)
+    save_vectorstore(vectorstore, persist_directory)
+    return vectorstore
+
+
+def add_embeddings(vectorstore, texts, vectors, metadatas, ids):
+    """Add precomputed embeddings, creating the vectorstore on the first batch"""
+    text_embeddings = list(zip(texts, vectors))
+    if vectorstore is None:
+        return FAISS.from_embeddings(
+            text_embeddings, get_embedding_function(), metadatas=metadatas, ids=ids
+        )
+    vectorstore.add_embeddings(text_embeddings, metadatas=metadatas, ids=ids)
+    restore_direct_map(vectorstore.index)
+    return vectorstore
+
+
+def save_vectorstore(vectorstore, persist_directory="vector_db") -> str:
+    """
+    Persist the index and its chunk store and publish a new index version.
+
+    Files are written to a staging directory and moved into place before the
+    version token is bumped, so readers polling index_version() only reload
+    once the new files are complete.
+    """
+    os.makedirs(persist_directory, exist_ok=True)
+    staging = os.path.join(persist_directory, f".staging-{uuid.uuid4().hex}")
+    try:
+        os.makedirs(staging)
+        faiss.write_index(vectorstore.index, os.path.join(staging, INDEX_FILE))
+        write_chunk_store(os.path.join(staging, CHUNK_STORE_FILE), vectorstore)
+        for name in INDEX_FILES:
+            os.replace(os.path.join(staging, name), os.path.join(persist_directory, name))
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+    # Replaces a legacy pickled docstore or a sharded layout
+    for name in (LEGACY_DOCSTORE_FILE, SHARDS_FILE):
+        with suppress(FileNotFoundError):
+            os.remove(os.path.join(persist_directory, name))
+    shutil.rmtree(os.path.join(persist_directory, SHARDS_DIR), ignore_errors=True)
+    return publish_version(persist_directory)
+
+
+def publish_version(persist_directory="vector_db") -> str:
+    """Bump the version token that readers poll to pick up a new index"""
+    version = f"{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+    version_path = os.path.join(persist_directory, VERSION_FILE)
+    with open(version_path + ".tmp", "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(version_path + ".tmp", version_path)
+    return version
+
+
+def load_vectorstore(persist_directory="vector_db", writable: bool = False):
+    """
+    Load a saved index. By default the FAISS file is memory-mapped and chunk
+    texts are read from the chunk store only for search hits, so load time
+    and per-process memory stay flat as the corpus grows. writable=True
+    loads both into memory so chunks can be added and deleted.
+    Indexes saved with a pickled docstore are still loaded (into memory).
+    """
+    store_path = os.path.join(persist_directory, CHUNK_STORE_FILE)
+    index_path = os.path.join(persist_directory, INDEX_FILE)
+    if not os.path.exists(store_path):
+        vectorstore = FAISS.load_local(
+            persist_directory,
+            embeddings=get_embedding_function(),
+            allow_dangerous_deserialization=True,
+        )
+    elif writable:
+        store = ChunkStore(store_path)
+        vectorstore = FAISS(
+            get_embedding_function(),
+            faiss.read_index(index_path),
+            InMemoryDocstore({doc.id: doc for doc in store.documents()}),
+            dict(store.ids()),
+        )
+    else:
+        # Mapped codes cannot be added to: the docstore is not addable either,
+        # so FAISS.add_*() fails with a ValueError before touching the index
+        store = ChunkStore(store_path)
+        vectorstore = FAISS(
+            get_embedding_function(),
+            faiss.read_index(
+                index_path, faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+            ),
+            ChunkDocstore(store),
+            ChunkIdMap(store),
+        )
+    configure_search(restore_direct_map(vectorstore.index))
     return vectorstore
 
 
-def load_vectorstore(persist_directory="vector_db"):
-    return FAISS.load_local(
-        persist_directory,
-        embeddings=get_embedding_function(),
-        allow_dangerous_deserialization=True,
+def vectorstore_exists(persist_directory="vector_db") -> bool:
+    return any(
+        os.path.exists(os.path.join(persist_directory, name))
+        for name in (INDEX_FILE, SHARDS_FILE)
     )
+
+
+def index_version(persist_directory="vector_db"):
+    """
+    Cheap token identifying the index currently on disk (None if there is none).
+    Indexes saved before versioning fall back to the index file's mtime.
+    """
+    try:
+        with open(os.path.join(persist_directory, VERSION_FILE), encoding="utf-8") as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        pass
+    try:
+        stat = os.stat(os.path.join(persist_directory, INDEX_FILE))
+    except FileNotFoundError:
+        return None
+    return f"mtime-{stat.st_mtime_ns}-{stat.st_size}"
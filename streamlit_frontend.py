@@ -11,10 +11,18 @@ project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
 # Import local modules
-from orchestrator.ppt_graph import run_ppt_generation
-from orchestrator.agent_state import PPTAgentState
-from rag_pipeline.pipeline import RAGPipeline
-from agents.export_agent import ExportAgent
+from orchestrator.ppt_graph import stream_ppt_events
+from rag_pipeline.corpus import ingest_corpus
+
+STAGE_LABELS = {
+    "retrieve": "Retrieving context",
+    "outline": "Generating outline",
+    "expand": "Expanding content",
+    "review": "Reviewing content",
+    "slide": "Writing slides",
+    "collect": "Assembling slides",
+    "export": "Exporting presentation",
+}
 
 # Page configuration
 st.set_page_config(
@@ -160,6 +168,7 @@ with col1:
             try:
                 # Create temporary directory for uploaded files
                 temp_dir = tempfile.mkdtemp()
+                # Where the export node writes by default (the draft goes to data/draft.txt)
                 output_dir = "outputs"
 
                 with st.spinner("📁 Processing uploaded files..."):
@@ -172,33 +181,53 @@ with col1:
                     st.info(f"✅ Saved {len(uploaded_files)} files")
 
                 with st.spinner("🔄 Ingesting documents into RAG pipeline..."):
-                    # Initialize RAG pipeline and ingest documents
-                    rag = RAGPipeline()
-                    rag.ingest(temp_dir)
-                    rag.load()
+                    # Index the uploads in their own corpus (reused for identical uploads)
+                    corpus_id = ingest_corpus(temp_dir)
                     st.info("✅ Documents processed and indexed")
 
-                with st.spinner("🤖 Generating presentation outline..."):
-                    # Run the PPT generation workflow
-                    progress_bar = st.progress(0)
-                    st.session_state["current_stage"] = "Outline Generation"
-                    progress_bar.progress(25)
-
-                    result_dict = run_ppt_generation(
-                        topic=topic, slides=slides_count, context=context or ""
+                # Run the PPT generation workflow, following its progress events
+                progress_bar = st.progress(0)
+                status = st.empty()
+                outline_box = st.empty()
+                timings = {}
+
+                for event in stream_ppt_events(
+                    topic=topic,
+                    slides=slides_count,
+                    context=context or "",
+                    corpus_id=corpus_id,
+                ):
+                    progress_bar.progress(int(event.get("progress", 0) * 100))
+
+                    if event["event"] == "stage_started" and "slide" not in event:
+                        label = STAGE_LABELS.get(event["stage"], event["stage"])
+                        st.session_state["current_stage"] = label
+                        status.info(f"🔄 {label}...")
+                    elif event["event"] == "stage_finished" and "slide" not in event:
+                        timings[event["stage"]] = event["duration"]
+                    elif event["event"] == "slide_progress":
+                        status.info(
+                            f"🔄 Slides ready: {event['completed']}/{event['total']}"
+                        )
+                    elif (
+                        event["event"] == "stage_output" and event["stage"] == "outline"
+                    ):
+                        # Show the outline as soon as it exists
+                        with outline_box.container():
+                            with st.expander("📝 Outline", expanded=True):
+                                for slide in event["data"]["slides"]:
+                                    st.markdown(f"**{slide['title']}**")
+                                    for bullet in slide["bullet_points"]:
+                                        st.markdown(f"- {bullet}")
+
+                st.session_state["current_stage"] = "Complete"
+                status.success(
+                    "✅ "
+                    + ", ".join(
+                        f"{STAGE_LABELS.get(stage, stage)} {duration:.1f}s"
+                        for stage, duration in timings.items()
                     )
-
-                    # Convert dict result to PPTAgentState object
-                    result_state = PPTAgentState(**result_dict)
-
-                    progress_bar.progress(75)
-                    st.session_state["current_stage"] = "Exporting presentation"
-
-                with st.spinner("📊 Exporting PowerPoint file..."):
-                    # Export to PowerPoint
-                    ExportAgent(result_state, output_dir=output_dir)
-                    progress_bar.progress(100)
-                    st.session_state["current_stage"] = "Complete"
+                )
 
                 # Clean up temp directory
                 shutil.rmtree(temp_dir, ignore_errors=True)
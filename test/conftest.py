@@ -0,0 +1,30 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+# Script-style examples that need a real model provider and index
+collect_ignore = ["agent_test.py", "rag_test.py"]
+
+# Fake providers and throwaway caches, set before app.config is imported
+_cache_root = tempfile.mkdtemp(prefix="test-cache-")
+os.environ["LLM_PROVIDER"] = "fake"
+os.environ["FAKE_LLM_LATENCY"] = "0"
+os.environ["FAKE_EMBED_LATENCY"] = "0"
+os.environ["EMBED_CACHE_PATH"] = os.path.join(_cache_root, "embeddings.sqlite")
+os.environ["LLM_CACHE_PATH"] = os.path.join(_cache_root, "llm.sqlite")
+os.environ["PARSE_CACHE_DIR"] = os.path.join(_cache_root, "parsed")
+os.environ["TRACE_DIR"] = ""
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    """Directory of 20 generated text documents (about 200 chunks)"""
+    from benchmarks.corpus import generate_corpus
+
+    directory = tmp_path / "corpus"
+    generate_corpus(str(directory), 20)
+    return directory
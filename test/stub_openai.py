@@ -0,0 +1,169 @@
+"""
+Minimal OpenAI-compatible embeddings server for offline tests and load runs.
+
+    python -m test.stub_openai --port 8089
+    OPENAI_BASE_URL=http://127.0.0.1:8089/v1 OPENAI_API_KEY=stub ...
+
+Vectors come from FakeEmbeddings, so they are deterministic per text.
+"""
+
+import argparse
+import base64
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from app.fake_providers import FakeEmbeddings
+from utils.tokens import count_tokens
+
+
+class StubOpenAIServer:
+    """
+    Serves POST /v1/embeddings on a background thread and records every
+    request. The first `rate_limit_first` requests get a 429 with the given
+    Retry-After header, and `shuffle` returns the data items out of order
+    (each still carries its index, as the real API does). Inputs over
+    `max_input_tokens` get a 400, like texts over the model's context.
+    """
+
+    def __init__(
+        self,
+        port: int = 0,
+        dimensions: int = 16,
+        rate_limit_first: int = 0,
+        retry_after: str = "0",
+        shuffle: bool = False,
+        latency: float = 0.0,
+        max_input_tokens: int = 8191,
+    ):
+        self.embeddings = FakeEmbeddings(size=dimensions)
+        self.rate_limit_first = rate_limit_first
+        self.retry_after = retry_after
+        self.shuffle = shuffle
+        self.latency = latency
+        self.max_input_tokens = max_input_tokens
+        # (arrival time, status, input texts) per request
+        self.requests = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/v1"
+
+    def embed(self, texts):
+        """Vectors the server returns for texts (for expected values in tests)"""
+        return self.embeddings.embed_documents(texts)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _respond(self, body: dict):
+        """(status, headers, payload) for one embeddings request"""
+        texts = body["input"]
+        texts = [texts] if isinstance(texts, str) else texts
+        with self._lock:
+            limited = len(self.requests) < self.rate_limit_first
+            self.requests.append(
+                (time.monotonic(), 429 if limited else 200, list(texts))
+            )
+        if limited:
+            error = {"message": "Rate limit reached", "type": "requests"}
+            return 429, {"Retry-After": self.retry_after}, {"error": error}
+
+        if any(count_tokens(text) > self.max_input_tokens for text in texts):
+            error = {
+                "message": "This model's maximum context length was exceeded",
+                "type": "invalid_request_error",
+            }
+            return 400, {}, {"error": error}
+
+        time.sleep(self.latency)
+        data = []
+        for index, vector in enumerate(self.embed(texts)):
+            if body.get("encoding_format") == "base64":
+                vector = base64.b64encode(
+                    np.asarray(vector, dtype="<f4").tobytes()
+                ).decode()
+            data.append({"object": "embedding", "index": index, "embedding": vector})
+        if self.shuffle:
+            random.shuffle(data)
+        tokens = sum(count_tokens(text) for text in texts)
+        return (
+            200,
+            {},
+            {
+                "object": "list",
+                "data": data,
+                "model": body.get("model", "stub"),
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+            },
+        )
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.rstrip("/").endswith("/embeddings"):
+                    status, headers, payload = server._respond(body)
+                else:
+                    status, headers, payload = (
+                        404,
+                        {},
+                        {"error": {"message": "Not found"}},
+                    )
+                content = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--dimensions", type=int, default=512)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    server = StubOpenAIServer(
+        port=args.port, dimensions=args.dimensions, latency=args.latency
+    )
+    print(f"Serving embeddings on {server.base_url}")
+    server._server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
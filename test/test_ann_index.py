@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+
+import rag_pipeline.ann_index as ann_index
+from rag_pipeline.ann_index import build_index, convert_index, index_type_of
+from rag_pipeline.pipeline import RAGPipeline
+from rag_pipeline.vector_store import load_vectorstore
+
+
+def _all_chunk_ids(rag):
+    return [
+        doc_id
+        for vectorstore in rag.get_shards()[0]
+        for doc_id in vectorstore.index_to_docstore_id.values()
+    ]
+
+
+@pytest.mark.parametrize("index_type", ["ivf_flat", "ivf_pq"])
+def test_built_ivf_index_reconstructs(index_type):
+    vectors = np.random.default_rng(0).random((2000, 32), dtype=np.float32)
+    index = build_index(vectors, index_type)
+    assert index.reconstruct(5).shape == (32,)
+    if index_type == "ivf_flat":
+        np.testing.assert_array_equal(index.reconstruct(5), vectors[5])
+
+
+def test_ivf_chunk_vectors_after_full_and_incremental_ingest(
+    monkeypatch, tmp_path, corpus
+):
+    monkeypatch.setattr(ann_index, "INDEX_TYPE", "ivf_flat")
+    rag = RAGPipeline(persist_directory=str(tmp_path / "index"))
+
+    rag.ingest(str(corpus))
+    assert index_type_of(rag.get_shards()[0][0].index) == "ivf_flat"
+    ids = _all_chunk_ids(rag)
+    vectors = rag.chunk_vectors(ids[:5])
+    assert vectors is not None and vectors.shape[0] == 5
+
+    (corpus / "doc_00000.txt").write_text("Battery storage is new here.\n" * 40)
+    (corpus / "doc_00001.txt").unlink()
+    rag.ingest(str(corpus), incremental=True)
+    ids = _all_chunk_ids(rag)
+    assert rag.chunk_vectors(ids) is not None
+
+    reloaded = RAGPipeline(persist_directory=str(tmp_path / "index"))
+    reloaded.load()
+    assert reloaded.chunk_vectors(ids) is not None
+
+
+def _reconstruction_error(vectorstore):
+    """Mean L2 distance between stored and freshly embedded chunk vectors"""
+    positions = sorted(vectorstore.index_to_docstore_id.items())
+    texts = [
+        vectorstore.docstore.search(doc_id).page_content for _, doc_id in positions
+    ]
+    exact = np.asarray(vectorstore.embedding_function.embed_documents(texts))
+    stored = vectorstore.index.reconstruct_n(0, vectorstore.index.ntotal)
+    return float(np.linalg.norm(stored - exact, axis=1).mean())
+
+
+@pytest.mark.parametrize("index_type", ["ivf_pq", "sq8"])
+def test_lossy_index_rebuilds_from_exact_vectors(
+    monkeypatch, tmp_path, corpus, index_type
+):
+    monkeypatch.setattr(ann_index, "INDEX_TYPE", index_type)
+    # Fewer sub-quantizers keep PQ training fast
+    monkeypatch.setattr(ann_index, "INDEX_PQ_M", 16)
+    persist_directory = str(tmp_path / "index")
+    rag = RAGPipeline(persist_directory=persist_directory)
+    rag.ingest(str(corpus))
+    vectorstore = load_vectorstore(persist_directory, writable=True)
+    assert index_type_of(vectorstore.index) == index_type
+    baseline = _reconstruction_error(vectorstore)
+
+    for round in range(3):
+        (corpus / f"doc_{round:05d}.txt").write_text(
+            f"Turbine grid update number {round}.\n" * 40
+        )
+        (corpus / f"extra_{round}.txt").write_text(
+            f"Hydrogen market outlook {round} with brand new words.\n" * 40
+        )
+        rag.ingest(str(corpus), incremental=True)
+
+    vectorstore = load_vectorstore(persist_directory, writable=True)
+    assert index_type_of(vectorstore.index) == index_type
+    assert _reconstruction_error(vectorstore) < baseline * 1.5
+
+    flat = convert_index(vectorstore, "flat")
+    assert _reconstruction_error(flat) < 1e-5
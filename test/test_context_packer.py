@@ -0,0 +1,118 @@
+import numpy as np
+
+from orchestrator.agent_state import RetrievedChunk
+from rag_pipeline.context_packer import (
+    MIN_OVERLAP_CHARS,
+    citation,
+    mmr_order,
+    pack_context,
+    trim_overlap,
+)
+from utils.tokens import count_tokens
+
+SEAM = "Battery storage smooths the daily output of solar farms"
+
+
+def _chunk(content, source="report.pdf", page=None, score=None):
+    metadata = {"source": f"/uploads/{source}"}
+    if page is not None:
+        metadata["page"] = page
+    return RetrievedChunk(content=content, metadata=metadata, score=score)
+
+
+def test_citation_labels():
+    assert citation({"source": "/data/report.pdf", "page": 0}) == "[report.pdf p.1]"
+    assert citation({"source": "/data/report.pdf", "page": 4}) == "[report.pdf p.5]"
+    assert citation({"source": "/data/notes.txt"}) == "[notes.txt]"
+    assert citation({"filename": "deck.docx", "source": "/tmp/x"}) == "[deck.docx]"
+    assert citation({}) == "[source]"
+
+
+def test_trim_overlap_removes_the_shared_seam():
+    assert len(SEAM) >= MIN_OVERLAP_CHARS
+    previous = f"Grid operators plan ahead. {SEAM}"
+    following = f"{SEAM}. Costs fell sharply."
+
+    # Tail of the previous chunk repeated at the head of this one, and vice versa
+    assert trim_overlap(following, previous) == "Costs fell sharply."
+    assert trim_overlap(previous, following) == "Grid operators plan ahead."
+    assert trim_overlap(SEAM, previous) == ""
+    # Runs shorter than MIN_OVERLAP_CHARS are coincidence, not overlap
+    assert trim_overlap("solar farms. New text", "daily output of solar farms") == (
+        "solar farms. New text"
+    )
+
+
+def test_pack_context_trims_overlap_within_a_source_only():
+    chunks = [
+        _chunk(f"Grid operators plan ahead. {SEAM}", page=0),
+        _chunk(f"{SEAM}. Costs fell sharply.", page=1),
+        _chunk(f"{SEAM}. Costs fell sharply.", source="other.txt"),
+    ]
+
+    packed = pack_context(chunks, budget=1000)
+
+    assert packed.text.split("\n\n") == [
+        f"[report.pdf p.1] Grid operators plan ahead. {SEAM}",
+        "[report.pdf p.2] Costs fell sharply.",
+        f"[other.txt] {SEAM}. Costs fell sharply.",
+    ]
+    assert packed.chunks_used == 3 and packed.chunks_dropped == 0
+    assert packed.tokens == count_tokens(packed.text) < packed.naive_tokens
+
+
+def test_pack_context_stays_within_the_budget():
+    long_text = "Offshore wind capacity keeps growing every year. " * 20
+    chunks = [
+        _chunk(long_text, source="a.txt"),
+        _chunk("Short note on tariffs.", source="b.txt"),
+        _chunk(long_text.replace("wind", "solar"), source="c.txt"),
+    ]
+    budget = count_tokens(f"[a.txt] {long_text.strip()}") + 10
+
+    packed = pack_context(chunks, budget=budget)
+
+    assert packed.tokens <= budget
+    # The second long chunk no longer fits, but the short one after it does
+    assert packed.chunks_used == 2 and packed.chunks_dropped == 1
+    assert "[b.txt] Short note on tariffs." in packed.text
+    assert "[c.txt]" not in packed.text
+    assert pack_context(chunks, budget=5).text == ""
+
+
+def test_mmr_prefers_diverse_chunks_and_drops_near_duplicates():
+    vectors = np.array(
+        [
+            [1.0, 0.0, 0.0],
+            [0.99, 0.01, 0.0],  # near duplicate of 0
+            [0.8, 0.6, 0.0],  # close to 0
+            [0.0, 0.0, 1.0],  # unrelated to 0
+        ]
+    )
+    relevance = np.array([1.0, 0.95, 0.9, 0.6])
+
+    selected, dropped = mmr_order(vectors, relevance, lambda_mult=0.5)
+
+    assert selected == [0, 3, 2]
+    assert dropped == [1]
+    # Pure relevance keeps the original order, still without the duplicate
+    assert mmr_order(vectors, relevance, lambda_mult=1.0) == ([0, 2, 3], [1])
+
+
+def test_pack_context_orders_by_mmr_when_vectors_are_given():
+    chunks = [
+        _chunk("Solar output data.", source="a.txt", score=0.1),
+        _chunk("Solar output data, again.", source="b.txt", score=0.15),
+        _chunk("Wind policy summary.", source="c.txt", score=0.4),
+    ]
+    vectors = np.array([[1.0, 0.0], [1.0, 0.001], [0.0, 1.0]])
+
+    packed = pack_context(chunks, budget=1000, vectors=vectors, lambda_mult=0.5)
+
+    assert [block.split("]")[0] for block in packed.text.split("\n\n")] == [
+        "[a.txt",
+        "[c.txt",
+    ]
+    assert packed.chunks_dropped == 1
+    # Without vectors the retrieval order is kept
+    assert pack_context(chunks, budget=1000).chunks_used == 3
@@ -0,0 +1,100 @@
+import os
+import time
+
+import rag_pipeline.corpus as corpus
+from orchestrator.ppt_graph import stream_ppt_events
+from rag_pipeline.corpus import (
+    corpus_directory,
+    corpus_exists,
+    ingest_corpus,
+    lease_corpus,
+    prune_corpora,
+)
+
+
+def _upload(tmp_path, name, text):
+    directory = tmp_path / "uploads" / name
+    directory.mkdir(parents=True)
+    (directory / "notes.txt").write_text(text)
+    return str(directory)
+
+
+def _fake_corpus(cid, last_used):
+    os.makedirs(corpus_directory(cid))
+    os.utime(corpus_directory(cid), (last_used, last_used))
+
+
+def test_identical_uploads_share_a_corpus(monkeypatch, tmp_path):
+    monkeypatch.setattr(corpus, "CORPUS_INDEX_ROOT", str(tmp_path / "corpora"))
+    first = ingest_corpus(_upload(tmp_path, "a", "Solar storage notes."))
+    again = ingest_corpus(_upload(tmp_path, "b", "Solar storage notes."))
+    other = ingest_corpus(_upload(tmp_path, "c", "Wind turbine notes."))
+
+    assert first == again != other
+    assert corpus_exists(first) and corpus_exists(other)
+    assert sorted(os.listdir(tmp_path / "corpora")) == sorted({first, other})
+
+
+def test_prune_evicts_least_recently_used_beyond_cap(monkeypatch, tmp_path):
+    monkeypatch.setattr(corpus, "CORPUS_INDEX_ROOT", str(tmp_path))
+    monkeypatch.setattr(corpus, "CORPUS_MAX_INDEXES", 2)
+    monkeypatch.setattr(corpus, "CORPUS_TTL", 0)
+    for n, last_used in enumerate([100, 300, 200, 50]):
+        _fake_corpus(f"{n:016x}", last_used)
+    os.makedirs(tmp_path / "not-a-corpus")
+
+    deleted = prune_corpora(keep=f"{3:016x}", now=1000)
+
+    assert sorted(deleted) == [f"{0:016x}", f"{2:016x}"]
+    assert sorted(os.listdir(tmp_path)) == [f"{1:016x}", f"{3:016x}", "not-a-corpus"]
+
+
+def test_prune_evicts_corpora_past_ttl(monkeypatch, tmp_path):
+    monkeypatch.setattr(corpus, "CORPUS_INDEX_ROOT", str(tmp_path))
+    monkeypatch.setattr(corpus, "CORPUS_MAX_INDEXES", 10)
+    monkeypatch.setattr(corpus, "CORPUS_TTL", 100)
+    _fake_corpus("a" * 16, 850)
+    _fake_corpus("b" * 16, 950)
+
+    assert prune_corpora(now=1000) == ["a" * 16]
+    assert os.listdir(tmp_path) == ["b" * 16]
+
+
+def test_prune_skips_corpora_being_ingested(monkeypatch, tmp_path):
+    monkeypatch.setattr(corpus, "CORPUS_INDEX_ROOT", str(tmp_path))
+    monkeypatch.setattr(corpus, "CORPUS_TTL", 100)
+    _fake_corpus("c" * 16, 0)
+
+    with corpus._ingest_lock("c" * 16):
+        assert prune_corpora(now=1000) == []
+    assert prune_corpora(now=1000) == ["c" * 16]
+
+
+def test_prune_skips_leased_corpora(monkeypatch, tmp_path):
+    monkeypatch.setattr(corpus, "CORPUS_INDEX_ROOT", str(tmp_path))
+    monkeypatch.setattr(corpus, "CORPUS_TTL", 100)
+    _fake_corpus("d" * 16, 0)
+
+    with lease_corpus("d" * 16), lease_corpus("d" * 16):
+        assert prune_corpora(now=time.time() + 1000) == []
+    assert corpus._leases == {}
+    assert prune_corpora(now=time.time() + 1000) == ["d" * 16]
+    assert os.listdir(tmp_path) == []
+
+
+def test_generation_leases_its_corpus(monkeypatch, tmp_path):
+    monkeypatch.setattr(corpus, "CORPUS_INDEX_ROOT", str(tmp_path / "corpora"))
+    monkeypatch.setattr(corpus, "CORPUS_TTL", 100)
+    cid = ingest_corpus(_upload(tmp_path, "a", "Solar storage notes. " * 50))
+
+    events = stream_ppt_events(
+        "Solar storage", slides=2, output_dir=str(tmp_path / "out"), corpus_id=cid
+    )
+    next(events)
+    assert corpus._leases == {cid: 1}
+    assert prune_corpora(now=time.time() + 1000) == []
+    for _ in events:
+        pass
+
+    assert corpus._leases == {}
+    assert corpus_exists(cid)
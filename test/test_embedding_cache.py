@@ -0,0 +1,50 @@
+import time
+
+import pytest
+
+from app.fake_providers import FakeEmbeddings
+from rag_pipeline.embedding import CachedEmbeddings
+from rag_pipeline.embedding_cache import EmbeddingCache
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__(size=8)
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return super().embed_documents(texts)
+
+
+def test_embedding_cache_persists_and_evicts_lru(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    cache = EmbeddingCache(path, max_entries=2)
+    cache.put_many({"a": [1.0, 2.0], "b": [3.0, 4.0]})
+    assert cache.get_many(["a", "missing"]) == {"a": [1.0, 2.0]}
+
+    # "b" is least recently used once "a" was read
+    time.sleep(0.01)
+    cache.put_many({"c": [5.0, 6.0]})
+    assert set(cache.get_many(["a", "b", "c"])) == {"a", "c"}
+    assert cache.stats()["hits"] == 3 and cache.stats()["misses"] == 2
+
+    reopened = EmbeddingCache(path, max_entries=2)
+    assert reopened.get_many(["c"]) == {"c": [5.0, 6.0]}
+
+
+def test_cached_embeddings_embed_each_text_once(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite")
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(model, EmbeddingCache(path))
+
+    first = embeddings.embed_documents(["solar", "wind", "solar"])
+    second = embeddings.embed_documents(["wind", "solar", "grid"])
+
+    assert model.texts == ["solar", "wind", "grid"]
+    assert first[0] == first[2] == pytest.approx(second[1])
+
+    # A new process reads the vectors back from disk
+    restarted = CountingEmbeddings()
+    CachedEmbeddings(restarted, EmbeddingCache(path)).embed_documents(["grid"])
+    assert restarted.texts == []
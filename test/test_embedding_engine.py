@@ -0,0 +1,151 @@
+import threading
+import time
+
+import numpy as np
+import openai
+import pytest
+
+import app.dependencies as dependencies
+from rag_pipeline.embedding_engine import EmbeddingEngine, TokenBucket
+from test.stub_openai import StubOpenAIServer
+from utils.tokens import count_tokens, split_tokens
+
+TEXTS = [f"chunk {n} about solar storage and grid {n * 7}" for n in range(40)]
+
+
+@pytest.fixture
+def server():
+    with StubOpenAIServer() as server:
+        yield server
+
+
+def make_engine(server, **kwargs):
+    client = openai.OpenAI(api_key="stub", base_url=server.base_url, max_retries=0)
+    return EmbeddingEngine(model="stub-embed", client=client, **kwargs)
+
+
+def test_batches_respect_token_and_size_caps(server):
+    engine = make_engine(server, concurrency=1, max_batch_tokens=60, max_batch_size=8)
+    engine.embed_documents(TEXTS)
+
+    batches = [texts for _, _, texts in server.requests]
+    assert len(batches) > 1
+    assert [text for texts in batches for text in texts] == TEXTS
+    for texts in batches:
+        assert len(texts) <= 8
+        assert len(texts) == 1 or sum(map(count_tokens, texts)) <= 60
+
+
+def test_concurrent_batches_keep_input_order(server):
+    server.shuffle = True
+    server.latency = 0.01
+    engine = make_engine(server, concurrency=4, max_batch_tokens=40)
+
+    vectors = engine.embed_documents(TEXTS)
+
+    assert len(server.requests) > 4
+    np.testing.assert_allclose(vectors, server.embed(TEXTS), rtol=1e-6)
+
+
+def test_rate_limited_request_waits_for_retry_after(server):
+    server.rate_limit_first = 1
+    server.retry_after = "0.3"
+    engine = make_engine(server, concurrency=1, max_retries=2)
+
+    started = time.monotonic()
+    vectors = engine.embed_documents(TEXTS[:3])
+
+    assert [status for _, status, _ in server.requests] == [429, 200]
+    assert server.requests[1][0] - server.requests[0][0] >= 0.3
+    assert time.monotonic() - started >= 0.3
+    np.testing.assert_allclose(vectors, server.embed(TEXTS[:3]), rtol=1e-6)
+
+
+def test_rate_limit_gives_up_after_max_retries(server):
+    server.rate_limit_first = 10
+    engine = make_engine(server, concurrency=1, max_retries=2)
+
+    with pytest.raises(openai.RateLimitError):
+        engine.embed_documents(TEXTS[:3])
+    assert len(server.requests) == 3
+
+
+def test_token_bucket_waits_for_refill():
+    bucket = TokenBucket(per_minute=600)  # 10 per second
+    bucket.acquire(600)
+
+    started = time.monotonic()
+    bucket.acquire(3)
+    assert 0.25 <= time.monotonic() - started < 1.0
+
+
+def test_requests_per_minute_spaces_out_batches(server):
+    # 120 requests per minute: one every 0.5s once the bucket is drained
+    engine = make_engine(
+        server, concurrency=4, max_batch_size=10, requests_per_minute=120
+    )
+    engine.request_bucket.acquire(120)
+
+    engine.embed_documents(TEXTS[:30])
+
+    arrivals = sorted(arrived for arrived, _, _ in server.requests)
+    assert len(arrivals) == 3
+    assert arrivals[-1] - arrivals[0] >= 0.9
+
+
+def test_tokens_per_minute_delays_large_batches(server):
+    # 6000 tokens per minute: 100 tokens per second once drained
+    engine = make_engine(server, concurrency=1, tokens_per_minute=6000)
+    engine.token_bucket.acquire(6000)
+    tokens = sum(count_tokens(text) for text in TEXTS[:5])
+
+    started = time.monotonic()
+    engine.embed_documents(TEXTS[:5])
+
+    assert time.monotonic() - started >= tokens / 100 * 0.9
+
+
+def test_texts_over_the_context_are_embedded_in_pieces(server):
+    server.max_input_tokens = 50
+    long_text = " ".join(TEXTS)
+    assert count_tokens(long_text) > 150
+    engine = make_engine(server, concurrency=2, max_input_tokens=50)
+
+    short, combined = engine.embed_documents([TEXTS[0], long_text])
+
+    pieces = split_tokens(long_text, 50)
+    assert all(count_tokens(piece) <= 50 for piece in pieces)
+    assert all(status == 200 for _, status, _ in server.requests)
+    expected = np.average(
+        server.embed(pieces), axis=0, weights=[count_tokens(p) for p in pieces]
+    )
+    np.testing.assert_allclose(combined, expected / np.linalg.norm(expected), rtol=1e-5)
+    np.testing.assert_allclose(short, server.embed(TEXTS[:1])[0], rtol=1e-6)
+    np.testing.assert_allclose(engine.embed_query(long_text), combined, rtol=1e-6)
+
+    with pytest.raises(openai.BadRequestError):
+        make_engine(server, max_input_tokens=10_000).embed_documents([long_text])
+
+
+def test_embed_model_is_a_process_singleton(monkeypatch, server):
+    monkeypatch.setattr(dependencies, "LLM_PROVIDER", "openai")
+    monkeypatch.setattr(dependencies, "EMBED_CONCURRENCY", 4)
+    monkeypatch.setattr(dependencies, "OPENAI_API_KEY", "stub")
+    monkeypatch.setattr(dependencies, "OPENAI_BASE_URL", server.base_url)
+    monkeypatch.setattr(dependencies, "_embed_model", None)
+
+    models = []
+    threads = [
+        threading.Thread(target=lambda: models.append(dependencies.embed_model()))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    model = dependencies.embed_model()
+    assert isinstance(model, EmbeddingEngine)
+    assert all(other is model for other in models)
+    assert model.client._client is dependencies.http_client()
+    assert model.embed_query(TEXTS[0]) == pytest.approx(server.embed(TEXTS[:1])[0])
@@ -0,0 +1,176 @@
+import asyncio
+
+import pytest
+
+import api.jobs as jobs
+from api.jobs import Job, JobManager, QueueFullError
+
+
+class StubStream:
+    """Stands in for astream_ppt_events; each run waits until released"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.release = None
+        self.started = []
+
+    async def __call__(self, topic, output_dir, **kwargs):
+        self.started.append(topic)
+        yield {"event": "stage_started", "stage": "outline", "progress": 0.1}
+        await self.release.wait()
+        if self.fail:
+            raise RuntimeError("generation failed")
+        yield {"event": "stage_finished", "stage": "outline", "progress": 1.0}
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    stream = StubStream()
+    monkeypatch.setattr(jobs, "astream_ppt_events", stream)
+    return stream
+
+
+async def _until(condition, timeout=5.0):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def _finished_job(manager, tmp_path, finished_at, status="completed"):
+    job = Job("topic", 3, "", upload_dir=None, output_root=str(tmp_path))
+    job.status = status
+    job.finished_at = finished_at
+    (tmp_path / job.job_id).mkdir()
+    (tmp_path / job.job_id / "generated_ppt.pptx").write_bytes(b"pptx")
+    manager.jobs[job.job_id] = job
+    return job
+
+
+def test_prune_removes_expired_jobs_and_outputs(tmp_path):
+    pruned = []
+    manager = JobManager(1, 5, on_prune=pruned.append, ttl=60)
+    old = _finished_job(manager, tmp_path, finished_at=1000)
+    recent = _finished_job(manager, tmp_path, finished_at=1050, status="failed")
+    running = Job("topic", 3, "", upload_dir=None, output_root=str(tmp_path))
+    running.status = "running"
+    manager.jobs[running.job_id] = running
+
+    assert manager.prune(now=1100) == 1
+
+    assert set(manager.jobs) == {recent.job_id, running.job_id}
+    assert pruned == [old]
+    assert not (tmp_path / old.job_id).exists()
+    assert (tmp_path / recent.job_id).exists()
+
+
+def test_prune_keeps_at_most_max_finished_jobs(tmp_path):
+    manager = JobManager(1, 5, ttl=0, max_finished=2)
+    jobs = [_finished_job(manager, tmp_path, finished_at=t) for t in (3, 1, 2, 4)]
+
+    assert manager.prune(now=10**9) == 2
+
+    assert set(manager.jobs) == {jobs[0].job_id, jobs[3].job_id}
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(manager.jobs)
+
+
+def test_queue_runs_jobs_in_order_and_reports_positions(tmp_path, stream):
+    async def scenario():
+        stream.release = asyncio.Event()
+        manager = JobManager(1, 2, ttl=0)
+        await manager.start()
+        try:
+            first, second, third = (
+                Job(topic, 3, "", upload_dir=None, output_root=str(tmp_path))
+                for topic in ("one", "two", "three")
+            )
+            manager.submit(first)
+            await _until(lambda: first.status == "running")
+            manager.submit(second)
+            manager.submit(third)
+
+            assert manager.position(first.job_id) is None
+            assert manager.position(second.job_id) == 1
+            assert manager.position(third.job_id) == 2
+            with pytest.raises(QueueFullError) as full:
+                manager.submit(Job("four", 3, "", upload_dir=None))
+            assert full.value.retry_after >= 1
+            assert first.stage == "outline"
+
+            stream.release.set()
+            await _until(lambda: third.finished)
+        finally:
+            await manager.stop()
+        return first, second, third
+
+    jobs_run = asyncio.run(scenario())
+    assert stream.started == ["one", "two", "three"]
+    for job in jobs_run:
+        assert job.status == "completed" and job.progress == 1.0
+        assert job.completed_stages == ["outline"]
+        assert job.to_dict()["download_url"] == f"/download/{job.job_id}"
+
+
+def test_cancel_queued_and_running_jobs(tmp_path, stream):
+    finished = []
+
+    async def scenario():
+        stream.release = asyncio.Event()
+        manager = JobManager(1, 5, on_complete=finished.append, ttl=0)
+        await manager.start()
+        try:
+            running = manager.submit(
+                Job("running", 3, "", upload_dir=None, output_root=str(tmp_path))
+            )
+            queued = manager.submit(
+                Job("queued", 3, "", upload_dir=None, output_root=str(tmp_path))
+            )
+            await _until(lambda: running.status == "running")
+
+            assert manager.cancel(queued.job_id)
+            assert manager.position(queued.job_id) is None
+            assert manager.cancel(running.job_id)
+            await _until(lambda: running.finished)
+            assert not manager.cancel(running.job_id)
+
+            # the cancelled queued job is skipped, so the worker is free again
+            after = manager.submit(
+                Job("after", 3, "", upload_dir=None, output_root=str(tmp_path))
+            )
+            stream.release.set()
+            await _until(lambda: after.finished)
+        finally:
+            await manager.stop()
+        return running, queued, after
+
+    running, queued, after = asyncio.run(scenario())
+    assert (running.status, queued.status, after.status) == (
+        "cancelled",
+        "cancelled",
+        "completed",
+    )
+    assert stream.started == ["running", "after"]
+    assert finished == [queued, running, after]
+
+
+def test_failed_generation_marks_job_failed(tmp_path, monkeypatch):
+    stream = StubStream(fail=True)
+    monkeypatch.setattr(jobs, "astream_ppt_events", stream)
+
+    async def scenario():
+        stream.release = asyncio.Event()
+        stream.release.set()
+        manager = JobManager(1, 1, ttl=0)
+        await manager.start()
+        try:
+            job = manager.submit(Job("topic", 3, "", upload_dir=None))
+            await _until(lambda: job.finished)
+        finally:
+            await manager.stop()
+        return job
+
+    job = asyncio.run(scenario())
+    assert job.status == "failed"
+    assert job.to_dict()["error"] == "generation failed"
+    assert "download_url" not in job.to_dict()
@@ -0,0 +1,36 @@
+import time
+
+from langchain_core.messages import HumanMessage
+
+from app.fake_providers import FakeChatModel
+from orchestrator.agent_state import ContentExpansion
+from utils.llm_cache import SQLiteLLMCache
+
+
+def test_llm_cache_serves_repeated_structured_calls(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "llm.sqlite"), max_entries=10)
+    model = FakeChatModel(cache=cache).with_structured_output(ContentExpansion)
+    prompt = [HumanMessage(content="Expand: solar storage")]
+
+    first = model.invoke(prompt)
+    second = model.invoke(prompt)
+
+    assert isinstance(second, ContentExpansion) and second == first
+    assert cache.stats()["hits"] == 1 and cache.stats()["entries"] == 1
+
+    raw = FakeChatModel(cache=cache)
+    raw.invoke("hello")
+    assert raw.invoke("hello").response_metadata["cached"] is True
+
+
+def test_llm_cache_expires_and_evicts(tmp_path):
+    cache = SQLiteLLMCache(str(tmp_path / "llm.sqlite"), max_entries=2, ttl=0.05)
+    model = FakeChatModel(cache=cache)
+    for prompt in ("one", "two", "three"):
+        model.invoke(prompt)
+    assert cache.stats()["entries"] == 2
+
+    time.sleep(0.06)
+    misses = cache.misses
+    model.invoke("three")
+    assert cache.misses == misses + 1
@@ -0,0 +1,38 @@
+import os
+
+from langchain_community.document_loaders import PyPDFLoader
+
+import rag_pipeline.loader as loader
+from rag_pipeline.loader import load_documents
+
+PDF = os.path.join(
+    os.path.dirname(__file__), "..", "data", "documents", "current_class_12.pdf"
+)
+
+
+def test_parallel_pdf_pages_match_pypdfloader(monkeypatch):
+    # 26 pages: split into several page-range tasks
+    monkeypatch.setattr(loader, "PDF_PAGES_PER_TASK", 10)
+    expected = PyPDFLoader(PDF).load()
+
+    documents = load_documents([PDF], workers=2)
+
+    assert [doc.page_content for doc in documents] == [
+        doc.page_content for doc in expected
+    ]
+    assert [doc.metadata for doc in documents] == [doc.metadata for doc in expected]
+    assert documents[0].metadata["creationdate"] == "2022-09-13T14:15:46-07:00"
+
+
+def test_parallel_load_keeps_file_order(tmp_path):
+    paths = []
+    for n in range(3):
+        path = tmp_path / f"note_{n}.txt"
+        path.write_text(f"note {n}")
+        paths.append(str(path))
+    (tmp_path / "image.png").write_bytes(b"")
+
+    documents = load_documents(paths + [PDF, str(tmp_path / "image.png")], workers=2)
+
+    assert [doc.page_content for doc in documents[:3]] == ["note 0", "note 1", "note 2"]
+    assert len(documents) == 3 + 26
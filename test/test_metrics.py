@@ -0,0 +1,190 @@
+import math
+import re
+
+import pytest
+
+from utils.metrics import REGISTRY, Registry
+
+# Prometheus text exposition format 0.0.4
+METRIC_NAME = r"[a-zA-Z_:][a-zA-Z0-9_:]*"
+LABEL = r'[a-zA-Z_][a-zA-Z0-9_]*="(?:[^"\\\n]|\\[\\"n])*"'
+SAMPLE = re.compile(
+    rf"^(?P<name>{METRIC_NAME})"
+    rf"(?:\{{(?P<labels>{LABEL}(?:,{LABEL})*)\}})?"
+    r" (?P<value>\S+)$"
+)
+HELP = re.compile(rf"^# HELP (?P<name>{METRIC_NAME}) (?P<text>(?:[^\\\n]|\\[\\n])*)$")
+TYPE = re.compile(
+    rf"^# TYPE (?P<name>{METRIC_NAME}) "
+    r"(?P<type>counter|gauge|histogram|summary|untyped)$"
+)
+LABEL_PAIR = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+
+def _unescape(value):
+    return re.sub(r"\\(.)", lambda m: "\n" if m.group(1) == "n" else m.group(1), value)
+
+
+def _value(text):
+    if text in ("+Inf", "-Inf", "NaN"):
+        return float(text.replace("Inf", "inf"))
+    return float(text)
+
+
+def parse(text):
+    """
+    Validates an exposition and returns {family: {"type", "help", "samples"}},
+    samples being (name, labels dict, value) tuples
+    """
+    assert text.endswith("\n")
+    families = {}
+    current = None
+    for line in text[:-1].split("\n"):
+        if match := HELP.match(line):
+            assert match["name"] not in families, f"duplicate family: {line}"
+            current = families[match["name"]] = {
+                "help": _unescape(match["text"]),
+                "samples": [],
+            }
+        elif match := TYPE.match(line):
+            assert current is families.get(match["name"]), f"TYPE without HELP: {line}"
+            assert not current["samples"] and "type" not in current
+            current["type"] = match["type"]
+        else:
+            match = SAMPLE.match(line)
+            assert match, f"invalid sample line: {line!r}"
+            name = match["name"]
+            family = next(
+                family
+                for family in families
+                if name == family
+                or (
+                    name.startswith(family)
+                    and name[len(family) :] in ("_bucket", "_sum", "_count")
+                )
+            )
+            assert families[family] is current, f"sample outside its family: {line}"
+            labels = {
+                key: _unescape(value)
+                for key, value in LABEL_PAIR.findall(match["labels"] or "")
+            }
+            current["samples"].append((name, labels, _value(match["value"])))
+    return families
+
+
+def _histograms(family, name):
+    """Buckets, sum and count of each label set of a histogram family"""
+    series = {}
+    for sample, labels, value in family["samples"]:
+        le = labels.pop("le", None)
+        entry = series.setdefault(tuple(sorted(labels.items())), {"buckets": []})
+        if sample == f"{name}_bucket":
+            entry["buckets"].append((_value(le), value))
+        else:
+            entry[sample[len(name) + 1 :]] = value
+    return series
+
+
+def test_counter_samples_and_label_escaping():
+    registry = Registry()
+    requests = registry.counter("app_requests_total", "Requests served", ["path"])
+    plain = registry.counter("app_plain_total", "No labels")
+    requests.inc(path="/a")
+    requests.inc(2, path="/a")
+    requests.inc(path='say "hi"\\\nbye')
+    plain.inc(0.5)
+
+    families = parse(registry.render())
+
+    assert families["app_requests_total"]["type"] == "counter"
+    assert families["app_requests_total"]["samples"] == [
+        ("app_requests_total", {"path": "/a"}, 3),
+        ("app_requests_total", {"path": 'say "hi"\\\nbye'}, 1),
+    ]
+    assert families["app_plain_total"]["samples"] == [("app_plain_total", {}, 0.5)]
+
+
+def test_help_text_is_escaped():
+    registry = Registry()
+    registry.counter("app_total", "Path like C:\\temp\nsecond line")
+
+    families = parse(registry.render())
+
+    assert families["app_total"]["help"] == "Path like C:\\temp\nsecond line"
+
+
+def test_histogram_buckets_are_cumulative_with_inf_equal_to_count():
+    registry = Registry()
+    latency = registry.histogram(
+        "app_latency_seconds", "Latency", ["route"], buckets=(1, 0.1, 0.5)
+    )
+    for value in (0.05, 0.1, 0.3, 0.7, 2.0):
+        latency.observe(value, route="/x")
+    latency.observe(0.2, route='q"uote')
+
+    family = parse(registry.render())["app_latency_seconds"]
+    series = _histograms(family, "app_latency_seconds")
+
+    assert family["type"] == "histogram"
+    assert set(series) == {(("route", "/x"),), (("route", 'q"uote'),)}
+    for entry in series.values():
+        bounds = [bound for bound, _ in entry["buckets"]]
+        counts = [count for _, count in entry["buckets"]]
+        assert bounds == sorted(bounds) and bounds[-1] == math.inf
+        assert counts == sorted(counts)
+        assert counts[-1] == entry["count"]
+
+    x = series[(("route", "/x"),)]
+    # le is inclusive: 0.1 falls in the 0.1 bucket
+    assert x["buckets"] == [(0.1, 2), (0.5, 3), (1.0, 4), (math.inf, 5)]
+    assert x["sum"] == pytest.approx(3.15)
+
+
+def test_histogram_time_observes_elapsed_seconds():
+    registry = Registry()
+    histogram = registry.histogram("app_step_seconds", "Step time")
+    with histogram.time():
+        pass
+
+    family = parse(registry.render())["app_step_seconds"]
+    (entry,) = _histograms(family, "app_step_seconds").values()
+    assert entry["count"] == 1 and 0 <= entry["sum"] < 1
+    assert entry["buckets"][0] == (0.005, 1)
+
+
+def test_process_registry_renders_valid_exposition():
+    families = parse(REGISTRY.render())
+
+    assert "ppt_llm_calls_total" in families
+    for name, family in families.items():
+        assert family["help"] and family["type"] in ("counter", "histogram")
+
+
+def test_metrics_endpoint_serves_text_format():
+    from fastapi.testclient import TestClient
+
+    from api.main import app
+
+    response = TestClient(app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    parse(response.text)
+
+
+@pytest.mark.parametrize("mode", ["sequential", "slide_parallel"])
+def test_llm_usage_is_labelled_per_agent(tmp_path, mode):
+    from orchestrator.ppt_graph import stream_ppt_events
+
+    events = list(
+        stream_ppt_events(
+            "Solar storage", slides=3, mode=mode, output_dir=str(tmp_path)
+        )
+    )
+
+    usage = events[-1]["timings"]["llm"]
+    assert {"outline", "expand", "review"} <= set(usage)
+    assert "slide" not in usage
+    # One expansion and one review call per slide in slide_parallel mode
+    if mode == "slide_parallel":
+        assert usage["expand"]["calls"] == usage["review"]["calls"] == 3
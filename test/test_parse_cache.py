@@ -0,0 +1,43 @@
+import time
+
+from langchain_core.documents import Document
+
+from app.dependencies import parse_cache
+from rag_pipeline.parse_cache import ParseCache
+from rag_pipeline.pipeline import RAGPipeline
+
+
+def test_parse_cache_round_trips_pages_and_chunks(tmp_path):
+    cache = ParseCache(str(tmp_path / "parsed"), max_bytes=10_000)
+    pages = [Document(page_content="page one", metadata={"source": "old.pdf"})]
+    key = ParseCache.splitter_key(1000, 200, ["\n\n"])
+
+    assert cache.get_pages("hash", "new.pdf") is None
+    cache.put_pages("hash", pages)
+    cache.put_chunks("hash", key, pages)
+
+    restored = cache.get_pages("hash", "new.pdf")
+    assert restored[0].page_content == "page one"
+    assert restored[0].metadata["source"] == "new.pdf"
+    assert cache.get_chunks("hash", key, "new.pdf")[0].page_content == "page one"
+    assert cache.get_chunks("hash", ParseCache.splitter_key(500, 0, []), "x") is None
+
+
+def test_parse_cache_evicts_least_recently_used(tmp_path):
+    cache = ParseCache(str(tmp_path / "parsed"), max_bytes=600)
+    for n in range(5):
+        text = "x" * 200
+        cache.put_pages(f"hash{n}", [Document(page_content=text, metadata={})])
+        time.sleep(0.01)
+
+    assert cache.get_pages("hash0", "a.txt") is None
+    assert cache.get_pages("hash4", "a.txt") is not None
+
+
+def test_parse_cache_skips_unchanged_files_on_reingest(tmp_path, corpus):
+    rag = RAGPipeline(persist_directory=str(tmp_path / "first"))
+    rag.ingest(str(corpus))
+
+    hits = parse_cache().hits
+    RAGPipeline(persist_directory=str(tmp_path / "second")).ingest(str(corpus))
+    assert parse_cache().hits - hits == len(list(corpus.iterdir()))
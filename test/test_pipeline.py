@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+
+import rag_pipeline.pipeline as pipeline
+from app.fake_providers import FakeEmbeddings
+from rag_pipeline.pipeline import RAGPipeline
+from rag_pipeline.shards import read_shard_layout, shard_key
+
+QUESTIONS = ["solar panel output", "battery storage cost", "grid policy"]
+
+
+def _chunk_ids(rag):
+    return sorted(
+        doc_id
+        for vectorstore in rag.get_shards()[0]
+        for doc_id in vectorstore.index_to_docstore_id.values()
+    )
+
+
+def _results(rag, question, k=5):
+    return [
+        (doc.metadata["chunk_id"], round(distance, 4))
+        for doc, distance in rag.query_with_scores(question, k)
+    ]
+
+
+def _assert_same_hits(found, expected):
+    """Same distances and chunks; chunks tied at the k-th distance may differ"""
+    assert [distance for _, distance in found] == [d for _, d in expected]
+    cutoff = expected[-1][1] if expected else None
+    assert {hit for hit in found if hit[1] != cutoff} == {
+        hit for hit in expected if hit[1] != cutoff
+    }
+
+
+def _edit_corpus(corpus):
+    """Modify, delete and add one file each"""
+    (corpus / "doc_00002.txt").write_text("Carbon market update.\n" * 60)
+    (corpus / "doc_00003.txt").unlink()
+    (corpus / "new_notes.txt").write_text("Hydrogen efficiency notes.\n" * 60)
+
+
+def test_full_ingest_and_query(tmp_path, corpus):
+    rag = RAGPipeline(persist_directory=str(tmp_path / "index"))
+    rag.ingest(str(corpus))
+
+    assert rag.chunk_count() == len(_chunk_ids(rag)) > 100
+    results = rag.query_with_scores("solar", k=3)
+    assert len(results) == 3
+    assert [distance for _, distance in results] == sorted(
+        distance for _, distance in results
+    )
+
+    reloaded = RAGPipeline(persist_directory=str(tmp_path / "index"))
+    reloaded.load()
+    assert _results(reloaded, "solar") == _results(rag, "solar")
+
+
+def test_batch_query_matches_single_queries(tmp_path, corpus):
+    rag = RAGPipeline(persist_directory=str(tmp_path / "index"))
+    rag.ingest(str(corpus))
+
+    batch = rag.query_batch_with_scores(QUESTIONS, k=4)
+    for question, results in zip(QUESTIONS, batch):
+        _assert_same_hits(
+            [(doc.metadata["chunk_id"], round(d, 4)) for doc, d in results],
+            _results(rag, question, k=4),
+        )
+
+
+def test_incremental_ingest_matches_full_rebuild(tmp_path, corpus):
+    rag = RAGPipeline(persist_directory=str(tmp_path / "index"))
+    rag.ingest(str(corpus))
+    _edit_corpus(corpus)
+    rag.ingest(str(corpus), incremental=True)
+
+    rebuilt = RAGPipeline(persist_directory=str(tmp_path / "rebuilt"))
+    rebuilt.ingest(str(corpus))
+
+    assert _chunk_ids(rag) == _chunk_ids(rebuilt)
+    for question in QUESTIONS:
+        _assert_same_hits(_results(rag, question), _results(rebuilt, question))
+
+
+def test_incremental_ingest_without_changes_keeps_index(tmp_path, corpus):
+    rag = RAGPipeline(persist_directory=str(tmp_path / "index"))
+    rag.ingest(str(corpus))
+    version = rag.index_version
+
+    rag.ingest(str(corpus), incremental=True)
+
+    assert rag.index_version == version
+
+
+def test_sharded_ingest_matches_single_index(monkeypatch, tmp_path, corpus):
+    single = RAGPipeline(persist_directory=str(tmp_path / "single"))
+    single.ingest(str(corpus))
+
+    monkeypatch.setattr(pipeline, "INDEX_SHARDS", 4)
+    rag = RAGPipeline(persist_directory=str(tmp_path / "index"))
+    rag.ingest(str(corpus))
+
+    layout = read_shard_layout(str(tmp_path / "index"))
+    assert layout["count"] == 4 and 1 < len(layout["shards"]) <= 4
+    assert len(rag.get_shards()[0]) == len(layout["shards"])
+    assert _chunk_ids(rag) == _chunk_ids(single)
+    for question in QUESTIONS:
+        _assert_same_hits(_results(rag, question), _results(single, question))
+
+
+def test_sharded_incremental_ingest_rebuilds_only_changed_shards(
+    monkeypatch, tmp_path, corpus
+):
+    monkeypatch.setattr(pipeline, "INDEX_SHARDS", 4)
+    persist_directory = str(tmp_path / "index")
+    rag = RAGPipeline(persist_directory=persist_directory)
+    rag.ingest(str(corpus))
+    before = read_shard_layout(persist_directory)["shards"]
+
+    _edit_corpus(corpus)
+    rag.ingest(str(corpus), incremental=True)
+
+    touched = {
+        shard_key(str(corpus / name), str(corpus), 4)
+        for name in ("doc_00002.txt", "doc_00003.txt", "new_notes.txt")
+    }
+    after = read_shard_layout(persist_directory)["shards"]
+    for key in set(before) | set(after):
+        assert (after.get(key) != before.get(key)) == (key in touched)
+
+    rebuilt = RAGPipeline(persist_directory=str(tmp_path / "rebuilt"))
+    rebuilt.ingest(str(corpus))
+    assert _chunk_ids(rag) == _chunk_ids(rebuilt)
+    for question in QUESTIONS:
+        _assert_same_hits(_results(rag, question), _results(rebuilt, question))
+
+
+@pytest.mark.parametrize("shards", [1, 4])
+def test_chunk_vectors_are_the_stored_embeddings(monkeypatch, tmp_path, corpus, shards):
+    monkeypatch.setattr(pipeline, "INDEX_SHARDS", shards)
+    rag = RAGPipeline(persist_directory=str(tmp_path / "index"))
+    rag.ingest(str(corpus))
+
+    documents = [doc for doc, _ in rag.query_with_scores("solar battery", k=5)]
+    vectors = rag.chunk_vectors([doc.id for doc in documents])
+
+    expected = FakeEmbeddings(size=vectors.shape[1]).embed_documents(
+        [doc.page_content for doc in documents]
+    )
+    np.testing.assert_allclose(vectors, expected, rtol=1e-6)
+    assert rag.chunk_vectors(["missing-chunk"]) is None
+    assert rag.chunk_vectors([]) is None
@@ -0,0 +1,115 @@
+import asyncio
+import random
+
+import pytest
+from pptx import Presentation
+
+import rag_pipeline.corpus as corpora
+from orchestrator.agent_state import (
+    ContentExpansion,
+    SlideResult,
+    SlideValidation,
+    ValidationPoint,
+    merge_slide_results,
+)
+from orchestrator.ppt_graph import (
+    arun_ppt_generation,
+    astream_ppt_events,
+    run_ppt_generation,
+)
+from rag_pipeline.corpus import ingest_corpus
+
+
+@pytest.fixture
+def corpus_id(monkeypatch, tmp_path, corpus):
+    monkeypatch.setattr(corpora, "CORPUS_INDEX_ROOT", str(tmp_path / "corpora"))
+    return ingest_corpus(str(corpus))
+
+
+def _slide_result(index, title=None):
+    title = title or f"Slide {index}"
+    return SlideResult(
+        index=index,
+        expanded=ContentExpansion(title=title, detailed_points=["point"]),
+        validation=SlideValidation(
+            title=title,
+            validation=[ValidationPoint(point="point", status="accurate")],
+        ),
+    )
+
+
+def test_slide_results_merge_in_outline_order():
+    results = [_slide_result(index) for index in range(6)]
+    arrivals = results[:]
+    random.Random(7).shuffle(arrivals)
+
+    merged = []
+    for result in arrivals:
+        merged = merge_slide_results(merged, [result])
+
+    assert merged == results
+    # A re-run branch replaces the earlier result for its slide
+    redone = _slide_result(2, "Slide 2, again")
+    assert merge_slide_results(merged, [redone])[2] == redone
+    assert merge_slide_results(None, [results[0]]) == [results[0]]
+
+
+def test_slide_parallel_matches_sequential(monkeypatch, tmp_path, corpus_id):
+    monkeypatch.chdir(tmp_path)
+    runs = {
+        mode: run_ppt_generation(
+            "Solar storage", slides=5, mode=mode, use_cache=False, corpus_id=corpus_id
+        )
+        for mode in ("sequential", "slide_parallel")
+    }
+    sequential, parallel = runs["sequential"], runs["slide_parallel"]
+
+    titles = [slide.title for slide in sequential["outline"].slides]
+    assert len(titles) == 5
+    for run in (sequential, parallel):
+        assert [slide.title for slide in run["expanded_content"]] == titles
+        assert [slide.title for slide in run["validation_results"]] == titles
+    assert [result.index for result in parallel["slide_results"]] == list(range(5))
+
+    assert parallel["expanded_content"] == sequential["expanded_content"]
+    assert parallel["validation_results"] == sequential["validation_results"]
+    # Every slide packed its own expansion and review context
+    assert {f"expand/{i}" for i in range(5)} <= set(parallel["context_stats"])
+    assert {f"review/{i}" for i in range(5)} <= set(parallel["context_stats"])
+    assert any(stats["tokens"] for stats in parallel["context_stats"].values())
+
+
+@pytest.mark.parametrize("mode", ["sequential", "slide_parallel"])
+def test_async_runs_export_to_the_output_dir(tmp_path, corpus_id, mode):
+    async def generate():
+        state = await arun_ppt_generation(
+            "Solar storage",
+            slides=3,
+            mode=mode,
+            corpus_id=corpus_id,
+            output_dir=str(tmp_path / "run"),
+        )
+        events = [
+            event
+            async for event in astream_ppt_events(
+                "Solar storage",
+                slides=3,
+                mode=mode,
+                corpus_id=corpus_id,
+                output_dir=str(tmp_path / "stream"),
+            )
+        ]
+        return state, events
+
+    state, events = asyncio.run(generate())
+
+    assert len(state["validation_results"]) == 3
+    assert events[-1]["event"] == "run_finished"
+    for name in ("run", "stream"):
+        deck = Presentation(str(tmp_path / name / "generated_ppt.pptx"))
+        assert len(deck.slides) >= 3
+        assert (
+            (tmp_path / name / "draft.txt")
+            .read_text()
+            .startswith("PRESENTATION: Solar storage")
+        )
@@ -0,0 +1,99 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.main as main
+import orchestrator.ppt_graph as ppt_graph
+from orchestrator.ppt_graph import stream_ppt_events
+from orchestrator.progress import SEQUENTIAL_STAGES, SLIDE_PARALLEL_STAGES
+
+MODES = {"sequential": SEQUENTIAL_STAGES, "slide_parallel": SLIDE_PARALLEL_STAGES}
+SLIDES = 4
+
+
+def _stage_events(events, name):
+    """Stages of whole-run stage events (not per slide), in order"""
+    return [e["stage"] for e in events if e["event"] == name and "slide" not in e]
+
+
+def _index(events, name, stage):
+    return next(
+        n
+        for n, e in enumerate(events)
+        if e["event"] == name and e["stage"] == stage and "slide" not in e
+    )
+
+
+def _assert_progress(events, stages):
+    progress = [event["progress"] for event in events if "progress" in event]
+    assert progress == sorted(progress)
+    assert progress[-1] == 1.0
+    assert events[-1]["event"] == "run_finished"
+
+    whole_run = [stage for stage in stages if stage != "slide"]
+    assert _stage_events(events, "stage_started") == whole_run
+    assert _stage_events(events, "stage_finished") == whole_run
+    for stage in whole_run:
+        started = _index(events, "stage_started", stage)
+        finished = _index(events, "stage_finished", stage)
+        assert started < finished and events[finished]["duration"] >= 0
+
+    if "slide" in stages:
+        for name in ("stage_started", "stage_finished"):
+            slides = [e["slide"] for e in events if e["event"] == name and "slide" in e]
+            # expand and review run inside the slide node: one event per slide
+            assert sorted(slides) == list(range(SLIDES))
+        completed = [
+            (e["completed"], e["total"])
+            for e in events
+            if e["event"] == "slide_progress"
+        ]
+        assert completed == [(n, SLIDES) for n in range(1, SLIDES + 1)]
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_stream_events_cover_every_stage(tmp_path, mode):
+    events = list(
+        stream_ppt_events(
+            "Solar storage", slides=SLIDES, mode=mode, output_dir=str(tmp_path)
+        )
+    )
+
+    _assert_progress(events, MODES[mode])
+    outputs = [e["stage"] for e in events if e["event"] == "stage_output"]
+    assert outputs == [stage for stage in MODES[mode] if stage != "slide"]
+    timings = events[-1]["timings"]["stages"]
+    assert set(timings) == set(MODES[mode])
+
+
+def _parse_sse(body):
+    events = []
+    for message in body.strip().split("\n\n"):
+        name, data = message.split("\n")
+        assert name.startswith("event: ") and data.startswith("data: ")
+        event = json.loads(data[len("data: ") :])
+        assert event["event"] == name[len("event: ") :]
+        events.append(event)
+    return events
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_generate_stream_sends_sse_progress(monkeypatch, tmp_path, mode):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(ppt_graph, "GRAPH_MODE", mode)
+    monkeypatch.setattr(main, "sessions", {})
+    client = TestClient(main.app)
+
+    with client.stream(
+        "POST", "/generate/stream", data={"topic": "Solar storage", "slides": SLIDES}
+    ) as response:
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = _parse_sse(response.read().decode())
+
+    assert events[0]["event"] == "run_started"
+    _assert_progress(events[1:], MODES[mode])
+    finished = events[-1]
+    assert finished["session_id"] == events[0]["session_id"]
+    assert finished["download_url"] == f"/download/{finished['session_id']}"
+    assert client.get(finished["download_url"]).status_code == 200
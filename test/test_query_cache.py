@@ -0,0 +1,97 @@
+import time
+
+from app.dependencies import search_cache
+from app.fake_providers import FakeEmbeddings
+from rag_pipeline.embedding import CachedEmbeddings
+from rag_pipeline.embedding_cache import EmbeddingCache
+from rag_pipeline.pipeline import RAGPipeline
+from rag_pipeline.query_cache import LRUCache
+
+
+class CountingEmbeddings(FakeEmbeddings):
+    def __init__(self):
+        super().__init__(size=8)
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return super().embed_documents(texts)
+
+
+def test_lru_cache_bounds_entries_bytes_and_ttl():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1
+
+    sized = LRUCache(10, sizeof=len, max_bytes=5)
+    sized.set("x", "abc")
+    sized.set("y", "abc")
+    assert sized.get("x") is None and sized.get("y") == "abc"
+    sized.set("z", "abcdefgh")
+    assert sized.get("z") == "abcdefgh"
+
+    expiring = LRUCache(10, ttl=0.05)
+    expiring.set("k", "v")
+    assert expiring.get("k") == "v"
+    time.sleep(0.06)
+    assert expiring.get("k") is None
+
+
+def test_query_embeddings_are_cached_by_normalized_text(tmp_path):
+    model = CountingEmbeddings()
+    embeddings = CachedEmbeddings(
+        model, EmbeddingCache(str(tmp_path / "embeddings.sqlite")), LRUCache(10)
+    )
+
+    embeddings.embed_query("Solar  Power")
+    embeddings.embed_query("solar power")
+    assert embeddings.embed_queries(["SOLAR power", "storage"])
+    assert model.texts == ["Solar  Power", "storage"]
+
+
+def test_search_results_are_cached_per_index_version(tmp_path, corpus):
+    rag = RAGPipeline(persist_directory=str(tmp_path / "index"))
+    rag.ingest(str(corpus))
+    cache = search_cache()
+
+    hits = cache.hits
+    first = rag.query_with_scores("Solar storage", k=3)
+    assert rag.query_with_scores("solar   STORAGE", k=3) == first
+    assert cache.hits == hits + 1
+
+    (corpus / "doc_00000.txt").write_text("Solar storage, rewritten.\n" * 40)
+    rag.ingest(str(corpus), incremental=True)
+    misses = cache.misses
+    rag.query_with_scores("solar storage", k=3)
+    assert cache.misses == misses + 1
+
+
+def test_swap_during_a_search_does_not_cache_old_hits_as_new(
+    monkeypatch, tmp_path, corpus
+):
+    rag = RAGPipeline(persist_directory=str(tmp_path / "index"))
+    rag.ingest(str(corpus))
+    get_shards = rag.get_shards
+
+    def swapped_after_read():
+        loaded = get_shards()
+        # Another pipeline publishes a new version and this one reloads it
+        (corpus / "doc_00000.txt").write_text("Solar storage, rewritten.\n" * 40)
+        RAGPipeline(persist_directory=rag.persist_directory).ingest(
+            str(corpus), incremental=True
+        )
+        rag.load()
+        return loaded
+
+    monkeypatch.setattr(rag, "get_shards", swapped_after_read)
+    stale = rag.query_with_scores("solar storage", k=3)
+    monkeypatch.setattr(rag, "get_shards", get_shards)
+
+    cache = search_cache()
+    misses = cache.misses
+    fresh = rag.query_with_scores("solar storage", k=3)
+    assert cache.misses == misses + 1
+    assert fresh != stale
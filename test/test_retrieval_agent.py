@@ -0,0 +1,72 @@
+import pytest
+
+import rag_pipeline.corpus as corpora
+from agents.retrieval_agent import _slide_query, retrieve_slide_contexts
+from app.dependencies import get_rag_pipeline
+from orchestrator.agent_state import Bulletslides
+from rag_pipeline.corpus import ingest_corpus
+
+SLIDES = [
+    Bulletslides(title="Solar output", bullet_points=["solar panel output"]),
+    Bulletslides(title="Solar panels", bullet_points=["solar panel efficiency"]),
+    Bulletslides(title="Storage", bullet_points=["battery storage cost"]),
+    Bulletslides(title="Policy", bullet_points=["grid policy"]),
+]
+
+
+@pytest.fixture
+def corpus_id(monkeypatch, tmp_path, corpus):
+    monkeypatch.setattr(corpora, "CORPUS_INDEX_ROOT", str(tmp_path / "corpora"))
+    return ingest_corpus(str(corpus))
+
+
+def test_slide_contexts_use_one_batched_search(monkeypatch, corpus_id):
+    rag = get_rag_pipeline(corpus_id)
+    calls = []
+    search = rag.query_batch_with_scores
+
+    def counting_search(queries, k):
+        calls.append((list(queries), k))
+        return search(queries, k)
+
+    monkeypatch.setattr(rag, "query_batch_with_scores", counting_search)
+    monkeypatch.setattr(
+        rag,
+        "query_with_scores",
+        lambda *args, **kwargs: pytest.fail("per-slide search"),
+    )
+
+    contexts = retrieve_slide_contexts(SLIDES, k=3, corpus_id=corpus_id)
+
+    assert calls == [([_slide_query(slide) for slide in SLIDES], 6)]
+    assert len(contexts) == len(SLIDES)
+    assert all(0 < len(chunks) <= 3 for chunks in contexts)
+
+
+def test_each_chunk_goes_to_its_nearest_slide(corpus_id):
+    contexts = retrieve_slide_contexts(SLIDES, k=3, corpus_id=corpus_id)
+
+    assigned = [chunk.content for chunks in contexts for chunk in chunks]
+    assert len(assigned) == len(set(assigned))
+
+    # Every slide's own hits, to find which slide each chunk is closest to
+    everything = get_rag_pipeline(corpus_id).query_batch_with_scores(
+        [_slide_query(slide) for slide in SLIDES], k=6
+    )
+    nearest = {}
+    for index, hits in enumerate(everything):
+        for doc, distance in hits:
+            best = nearest.get(doc.page_content)
+            if best is None or distance < best[0]:
+                nearest[doc.page_content] = (distance, index)
+
+    shared = {
+        content
+        for content in nearest
+        if sum(content in [d.page_content for d, _ in hits] for hits in everything) > 1
+    }
+    assert shared, "slides should compete for some chunks"
+    for index, chunks in enumerate(contexts):
+        for chunk in chunks:
+            assert nearest[chunk.content][1] == index
+            assert chunk.score == pytest.approx(nearest[chunk.content][0])
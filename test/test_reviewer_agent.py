@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from typing import Any
+
+import pytest
+
+import agents.reviewer_agent as reviewer_agent
+from agents.reviewer_agent import ReviewerAgent, ReviewerAgentAsync
+from app.fake_providers import FakeChatModel
+from orchestrator.agent_state import ContentExpansion, PPTAgentState
+
+TITLES = [f"Slide {n}" for n in range(6)]
+
+
+class Recorder:
+    """Calls per slide and peak concurrency seen by FlakyChatModel"""
+
+    def __init__(self, failures=None):
+        # slide title -> number of calls that fail before one succeeds
+        self.failures = failures or {}
+        self.calls = {}
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    def start(self, messages):
+        prompt = "\n".join(str(message.content) for message in messages)
+        title = prompt.split("Slide: ")[1].split("\n")[0]
+        with self.lock:
+            self.calls[title] = self.calls.get(title, 0) + 1
+            self.in_flight += 1
+            self.peak = max(self.peak, self.in_flight)
+            return self.calls[title] <= self.failures.get(title, 0)
+
+    def finish(self):
+        with self.lock:
+            self.in_flight -= 1
+
+
+class FlakyChatModel(FakeChatModel):
+    """Fake model that fails the first calls for some slides"""
+
+    recorder: Any = None
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        fail = self.recorder.start(messages)
+        try:
+            time.sleep(self.latency)
+            if fail:
+                raise RuntimeError("provider unavailable")
+            return super()._generate(messages, stop, run_manager, **kwargs)
+        finally:
+            self.recorder.finish()
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        fail = self.recorder.start(messages)
+        try:
+            await asyncio.sleep(self.latency)
+            if fail:
+                raise RuntimeError("provider unavailable")
+            return await super()._agenerate(messages, stop, run_manager, **kwargs)
+        finally:
+            self.recorder.finish()
+
+
+def _fell_back(results):
+    """Whether any slide got the needs-review fallback"""
+    return any(
+        (point.reason or "").startswith("Automatic review failed")
+        for result in results
+        for point in result.validation
+    )
+
+
+@pytest.fixture
+def review(monkeypatch):
+    """Runs the sync or async reviewer over TITLES with a FlakyChatModel"""
+
+    def run(mode, recorder, latency=0.0):
+        model = FlakyChatModel(latency=latency, recorder=recorder)
+        monkeypatch.setattr(reviewer_agent, "get_llm", lambda use_cache=True: model)
+        state = PPTAgentState(
+            topic="Energy",
+            retrieved_context=[],
+            expanded_content=[
+                ContentExpansion(
+                    title=title,
+                    detailed_points=[f"{title} point {m}" for m in range(3)],
+                )
+                for title in TITLES
+            ],
+        )
+        if mode == "async":
+            return asyncio.run(ReviewerAgentAsync(state)).validation_results
+        return ReviewerAgent(state).validation_results
+
+    return run
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_slides_are_reviewed_concurrently_in_order(monkeypatch, review, mode):
+    monkeypatch.setattr(reviewer_agent, "REVIEW_CONCURRENCY", 3)
+    recorder = Recorder()
+
+    results = review(mode, recorder, latency=0.05)
+
+    assert [result.title for result in results] == TITLES
+    assert recorder.peak == 3
+    assert all(count == 1 for count in recorder.calls.values())
+    assert not _fell_back(results)
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_transient_failure_is_retried(monkeypatch, review, mode):
+    monkeypatch.setattr(reviewer_agent, "REVIEW_MAX_RETRIES", 2)
+    recorder = Recorder(failures={"Slide 1": 1, "Slide 4": 1})
+
+    results = review(mode, recorder)
+
+    assert recorder.calls["Slide 1"] == recorder.calls["Slide 4"] == 2
+    assert recorder.calls["Slide 0"] == 1
+    assert [result.title for result in results] == TITLES
+    assert not _fell_back(results)
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_slide_needs_review_when_retries_run_out(monkeypatch, review, mode):
+    monkeypatch.setattr(reviewer_agent, "REVIEW_MAX_RETRIES", 1)
+    recorder = Recorder(failures={"Slide 2": 10})
+
+    results = review(mode, recorder)
+
+    assert recorder.calls["Slide 2"] == 2
+    failed = results[2]
+    assert failed.title == "Slide 2"
+    assert [point.point for point in failed.validation] == [
+        f"Slide 2 point {m}" for m in range(3)
+    ]
+    assert all(point.status == "needs_review" for point in failed.validation)
+    assert all(
+        point.reason == "Automatic review failed: provider unavailable"
+        for point in failed.validation
+    )
+    assert not _fell_back(results[:2] + results[3:])
@@ -0,0 +1,78 @@
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.main as main
+
+
+async def _fake_events(topic, output_dir, **kwargs):
+    os.makedirs(output_dir, exist_ok=True)
+    with open(os.path.join(output_dir, "generated_ppt.pptx"), "wb") as f:
+        f.write(b"pptx")
+    yield {
+        "event": "run_finished",
+        "progress": 1.0,
+        "context": {},
+        "timings": {"total": 0.0, "stages": {}, "llm": {}},
+    }
+
+
+async def _failing_events(topic, output_dir, **kwargs):
+    os.makedirs(output_dir, exist_ok=True)
+    yield {"event": "stage_started", "stage": "outline"}
+    raise RuntimeError("generation failed")
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "sessions", {})
+    monkeypatch.setattr(main, "astream_ppt_events", _fake_events)
+    return TestClient(main.app)
+
+
+def _output_dirs(tmp_path):
+    return sorted(os.listdir(tmp_path / "outputs"))
+
+
+def test_delete_session_removes_its_output(client, tmp_path):
+    session_id = client.post("/generate", data={"topic": "t"}).json()["session_id"]
+    assert _output_dirs(tmp_path) == [session_id]
+    assert client.get(f"/download/{session_id}").content == b"pptx"
+
+    assert client.delete(f"/session/{session_id}").status_code == 200
+
+    assert _output_dirs(tmp_path) == []
+    assert client.get(f"/download/{session_id}").status_code == 404
+
+
+def test_sessions_are_pruned_by_cap_and_ttl(monkeypatch, client, tmp_path):
+    monkeypatch.setattr(main, "JOB_MAX_FINISHED", 2)
+    monkeypatch.setattr(main, "JOB_TTL", 60)
+    ids = [
+        client.post("/generate", data={"topic": f"t{n}"}).json()["session_id"]
+        for n in range(2)
+    ]
+    with client.stream("POST", "/generate/stream", data={"topic": "s"}) as response:
+        body = response.read().decode()
+    assert "run_finished" in body
+    ids.append(next(sid for sid in main.sessions if sid not in ids))
+
+    assert list(main.sessions) == ids[1:]
+    assert _output_dirs(tmp_path) == sorted(ids[1:])
+
+    main.sessions[ids[1]]["finished_at"] -= 120
+    assert main._prune_sessions() == 1
+    assert _output_dirs(tmp_path) == [ids[2]]
+
+
+def test_failed_runs_leave_no_output(monkeypatch, client, tmp_path):
+    monkeypatch.setattr(main, "astream_ppt_events", _failing_events)
+
+    assert client.post("/generate", data={"topic": "t"}).status_code == 500
+    with client.stream("POST", "/generate/stream", data={"topic": "t"}) as response:
+        assert "generation failed" in response.read().decode()
+
+    assert main.sessions == {}
+    assert _output_dirs(tmp_path) == []
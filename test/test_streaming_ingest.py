@@ -0,0 +1,83 @@
+import os
+
+import pytest
+
+import rag_pipeline.pipeline as pipeline
+from rag_pipeline.chunk_store import CHUNK_STORE_FILE, ChunkStore
+from rag_pipeline.pipeline import CHECKPOINT_DIR, RAGPipeline
+
+
+def _chunk_ids(rag):
+    return sorted(
+        doc_id
+        for vectorstore in rag.get_shards()[0]
+        for doc_id in vectorstore.index_to_docstore_id.values()
+    )
+
+
+def test_streaming_ingest_resumes_from_checkpoint_segments(
+    monkeypatch, tmp_path, corpus
+):
+    monkeypatch.setattr(pipeline, "INGEST_CHECKPOINT_EVERY", 2)
+    expected = RAGPipeline(persist_directory=str(tmp_path / "full"))
+    expected.ingest_streaming(str(corpus), batch_size=10)
+
+    rag = RAGPipeline(persist_directory=str(tmp_path / "index"))
+    embed_and_add = rag._embed_and_add
+    calls = []
+
+    def crash_after_five_batches(*args):
+        calls.append(1)
+        if len(calls) > 5:
+            raise RuntimeError("crash")
+        return embed_and_add(*args)
+
+    monkeypatch.setattr(rag, "_embed_and_add", crash_after_five_batches)
+    with pytest.raises(RuntimeError):
+        rag.ingest_streaming(str(corpus), batch_size=10)
+
+    # Two segments of two batches each; the fifth batch was never saved
+    checkpoint_dir = tmp_path / "index" / CHECKPOINT_DIR
+    segments = sorted(os.listdir(checkpoint_dir))
+    assert segments == ["segment-000000", "segment-000001"]
+    for name in segments:
+        assert len(ChunkStore(str(checkpoint_dir / name / CHUNK_STORE_FILE))) == 20
+
+    embedded = []
+    monkeypatch.setattr(
+        rag,
+        "_embed_and_add",
+        lambda vectorstore, chunks, ids: embedded.extend(ids)
+        or embed_and_add(vectorstore, chunks, ids),
+    )
+    rag.ingest_streaming(str(corpus), batch_size=10)
+
+    assert _chunk_ids(rag) == _chunk_ids(expected)
+    assert len(embedded) == len(_chunk_ids(expected)) - 40
+    assert not checkpoint_dir.exists()
+
+
+def test_resume_drops_chunks_of_changed_files(monkeypatch, tmp_path, corpus):
+    monkeypatch.setattr(pipeline, "INGEST_CHECKPOINT_EVERY", 1)
+    rag = RAGPipeline(persist_directory=str(tmp_path / "index"))
+    embed_and_add = rag._embed_and_add
+    calls = []
+
+    def crash_after_three_batches(*args):
+        calls.append(1)
+        if len(calls) > 3:
+            raise RuntimeError("crash")
+        return embed_and_add(*args)
+
+    monkeypatch.setattr(rag, "_embed_and_add", crash_after_three_batches)
+    with pytest.raises(RuntimeError):
+        rag.ingest_streaming(str(corpus), batch_size=10)
+
+    changed = sorted(corpus.iterdir())[0]
+    changed.write_text("Solar panels were replaced by a new text.")
+    monkeypatch.setattr(rag, "_embed_and_add", embed_and_add)
+    rag.ingest_streaming(str(corpus), batch_size=10)
+
+    expected = RAGPipeline(persist_directory=str(tmp_path / "full"))
+    expected.ingest(str(corpus))
+    assert _chunk_ids(rag) == _chunk_ids(expected)
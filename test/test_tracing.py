@@ -0,0 +1,76 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import utils.tracing as tracing
+from utils.tracing import bind_context, span, trace
+
+
+def _busy(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(100))
+
+
+def traced_work():
+    _busy(0.2)
+
+
+def pool_work():
+    _busy(0.2)
+
+
+def other_request_work(stop):
+    while not stop.is_set():
+        sum(range(100))
+
+
+def test_tracing_is_off_without_trace_dir(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "TRACE_DIR", "")
+    monkeypatch.chdir(tmp_path)
+    with trace("request") as current:
+        with span("step") as opened:
+            pass
+    assert current is None and opened is None
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_spans_are_exported_as_jsonl(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "TRACE_DIR", str(tmp_path))
+    with trace("request", topic="solar") as current:
+        with span("step", n=1):
+            pass
+
+    spans = [json.loads(line) for line in open(current.path, encoding="utf-8")]
+    assert [s["name"] for s in spans] == ["request", "step"]
+    assert spans[1]["parent_span_id"] == spans[0]["span_id"]
+    assert spans[0]["attributes"] == {"topic": "solar"}
+
+
+def test_profiler_samples_only_threads_of_its_trace(monkeypatch, tmp_path):
+    monkeypatch.setattr(tracing, "TRACE_DIR", str(tmp_path))
+    monkeypatch.setattr(tracing, "PROFILE_INTERVAL", 0.002)
+    stop = threading.Event()
+    other = threading.Thread(target=other_request_work, args=(stop,))
+    other.start()
+    try:
+        with trace("request", profile=True) as current:
+            traced_work()
+            with ThreadPoolExecutor(1) as pool:
+                pool.submit(bind_context(pool_work)).result()
+    finally:
+        stop.set()
+        other.join()
+
+    folded = (tmp_path / f"{current.trace_id}.folded").read_text()
+    assert "traced_work" in folded
+    assert "pool_work" in folded
+    assert "other_request_work" not in folded
+    assert not tracing._thread_traces
+
+
+def test_frame_names_fall_back_to_co_name():
+    code = SimpleNamespace(co_name="run", co_filename="/src/job.py", co_firstlineno=7)
+    assert tracing._frame_name(code) == "run (job.py:7)"
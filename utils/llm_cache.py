@@ -0,0 +1,163 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from langchain_core.caches import BaseCache
+from langchain_core.load import dumps, loads
+from pydantic import BaseModel
+
+
+def llm_cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Content address of an LLM call. llm_string carries the model, temperature
+    and bound kwargs (including the structured-output schema).
+    """
+    raw = f"{llm_string}\x00{prompt}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _storable(generations):
+    """
+    Structured-output responses carry the parsed Pydantic object, which
+    LangChain cannot serialize; store it as a dict, which the parser
+    validates back into the schema on a hit.
+    """
+    stored = []
+    for generation in generations:
+        message = getattr(generation, "message", None)
+        parsed = message.additional_kwargs.get("parsed") if message else None
+        if isinstance(parsed, BaseModel):
+            message = message.model_copy(
+                update={
+                    "additional_kwargs": {
+                        **message.additional_kwargs,
+                        "parsed": parsed.model_dump(),
+                    }
+                }
+            )
+            generation = generation.model_copy(update={"message": message})
+        stored.append(generation)
+    return stored
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    Persistent LangChain LLM cache with LRU size eviction, an optional TTL
+    and hit/miss counters. Stores the raw generations, so structured-output
+    parsers rebuild validated Pydantic objects from a hit.
+    """
+
+    def __init__(self, path: str, max_entries: int = 10000, ttl: float = 0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                generations TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )""")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_llm_responses_last_used ON llm_responses(last_used)"
+        )
+        self._conn.commit()
+
+    def lookup(self, prompt: str, llm_string: str):
+        key = llm_cache_key(prompt, llm_string)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT generations, created_at FROM llm_responses WHERE key = ?",
+                (key,),
+            ).fetchone()
+
+            if row is not None and self.ttl and now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM llm_responses WHERE key = ?", (key,))
+                self._conn.commit()
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE llm_responses SET last_used = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        try:
+            generations = loads(row[0], allowed_objects="core")
+        except Exception:
+            # Written by an incompatible LangChain version: treat as a miss
+            with self._lock:
+                self.hits -= 1
+                self.misses += 1
+            return None
+
+        # Lets usage metrics tell cache hits from billed calls
+        for generation in generations:
+            message = getattr(generation, "message", None)
+            if message is not None:
+                message.response_metadata["cached"] = True
+        return generations
+
+    def update(self, prompt: str, llm_string: str, return_val):
+        key = llm_cache_key(prompt, llm_string)
+        now = time.time()
+        payload = dumps(_storable(return_val))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, generations, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, payload, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now: float):
+        if self.ttl:
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE created_at < ?", (now - self.ttl,)
+            )
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()
+        overflow = count - self.max_entries
+        if overflow > 0:
+            self._conn.execute(
+                """DELETE FROM llm_responses WHERE key IN (
+                    SELECT key FROM llm_responses ORDER BY last_used ASC LIMIT ?
+                )""",
+                (overflow,),
+            )
+
+    def stats(self) -> dict:
+        """Hit/miss counters for this process and the number of stored responses"""
+        with self._lock:
+            (entries,) = self._conn.execute(
+                "SELECT COUNT(*) FROM llm_responses"
+            ).fetchone()
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": entries,
+                "max_entries": self.max_entries,
+            }
+
+    def clear(self, **kwargs):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_responses")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
@@ -0,0 +1,261 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from langchain_core.callbacks import BaseCallbackHandler
+from app.config import LLM_INPUT_COST_PER_1M, LLM_OUTPUT_COST_PER_1M
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _escape_help(text) -> str:
+    return str(text).replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _label_text(labelnames, values, extra=()) -> str:
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_label_text(self.labelnames, key)} {value}"
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._values.get(
+                key, ([0] * len(self.buckets), 0.0, 0)
+            )
+            if index < len(counts):
+                counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self._lock:
+            items = sorted(
+                (key, list(counts), total, count)
+                for key, (counts, total, count) in self._values.items()
+            )
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _label_text(self.labelnames, key, [("le", repr(float(bound)))])
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _label_text(self.labelnames, key, [("le", "+Inf")])
+            yield f"{self.name}_bucket{labels} {count}"
+            yield f"{self.name}_sum{_label_text(self.labelnames, key)} {total}"
+            yield f"{self.name}_count{_label_text(self.labelnames, key)} {count}"
+
+
+class Registry:
+    """Process-wide set of metrics rendered in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics = []
+
+    def counter(self, name: str, help: str, labelnames=()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.type}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+INGEST_STAGE_SECONDS = REGISTRY.histogram(
+    "ppt_ingest_stage_seconds",
+    "Time spent per ingestion stage (parse, split, embed, index)",
+    ["stage"],
+)
+INGEST_CHUNKS = REGISTRY.counter(
+    "ppt_ingest_chunks_total", "Chunks embedded and indexed"
+)
+QUERY_SECONDS = REGISTRY.histogram(
+    "ppt_rag_query_seconds", "Retrieval latency (single or batched queries)", ["kind"]
+)
+NODE_SECONDS = REGISTRY.histogram(
+    "ppt_graph_node_seconds", "Wall time of each workflow node", ["node"]
+)
+LLM_CALLS = REGISTRY.counter(
+    "ppt_llm_calls_total",
+    "LLM calls per agent, by response cache outcome",
+    ["agent", "cache"],
+)
+LLM_SECONDS = REGISTRY.histogram(
+    "ppt_llm_call_seconds", "LLM call latency per agent", ["agent"]
+)
+LLM_TOKENS = REGISTRY.counter(
+    "ppt_llm_tokens_total",
+    "LLM tokens per agent (prompt or completion)",
+    ["agent", "kind"],
+)
+LLM_COST = REGISTRY.counter(
+    "ppt_llm_cost_usd_total", "Estimated LLM spend per agent in USD", ["agent"]
+)
+EXPORT_SECONDS = REGISTRY.histogram("ppt_export_seconds", "PPTX rendering time")
+
+
+def llm_cost(prompt_tokens: int, completion_tokens: int) -> float:
+    return (
+        prompt_tokens * LLM_INPUT_COST_PER_1M
+        + completion_tokens * LLM_OUTPUT_COST_PER_1M
+    ) / 1_000_000
+
+
+AGENT_TAG = "agent:"
+
+
+def agent_tags(agent: str) -> list:
+    """Run tags labelling the LLM calls of a chain with the agent making them"""
+    return [AGENT_TAG + agent]
+
+
+class LLMUsageCallback(BaseCallbackHandler):
+    """
+    Records every chat model call of a run: latency, tokens and cost per
+    agent (the agent tag of the calling chain, else the graph node that made
+    the call), both in the process metrics and in per-run totals returned by
+    summary().
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._started = {}
+        self._usage = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, tags=None, metadata=None, **kwargs
+    ):
+        agent = next(
+            (tag[len(AGENT_TAG) :] for tag in tags or () if tag.startswith(AGENT_TAG)),
+            (metadata or {}).get("langgraph_node", "unknown"),
+        )
+        with self._lock:
+            self._started[run_id] = (agent, time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            agent, started = self._started.pop(run_id, ("unknown", None))
+        duration = time.perf_counter() - started if started is not None else 0.0
+
+        prompt_tokens = completion_tokens = 0
+        cached = False
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if message is None:
+                    continue
+                cached = cached or bool(message.response_metadata.get("cached"))
+                usage = message.usage_metadata or {}
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+
+        LLM_CALLS.inc(agent=agent, cache="hit" if cached else "miss")
+        LLM_SECONDS.observe(duration, agent=agent)
+        if cached:
+            # Served from the response cache: no tokens were spent
+            prompt_tokens = completion_tokens = 0
+        cost = llm_cost(prompt_tokens, completion_tokens)
+        LLM_TOKENS.inc(prompt_tokens, agent=agent, kind="prompt")
+        LLM_TOKENS.inc(completion_tokens, agent=agent, kind="completion")
+        LLM_COST.inc(cost, agent=agent)
+
+        with self._lock:
+            totals = self._usage.setdefault(
+                agent,
+                {
+                    "calls": 0,
+                    "cached_calls": 0,
+                    "seconds": 0.0,
+                    "prompt_tokens": 0,
+                    "completion_tokens": 0,
+                    "cost_usd": 0.0,
+                },
+            )
+            totals["calls"] += 1
+            totals["cached_calls"] += int(cached)
+            totals["seconds"] += duration
+            totals["prompt_tokens"] += prompt_tokens
+            totals["completion_tokens"] += completion_tokens
+            totals["cost_usd"] += cost
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            agent, _ = self._started.pop(run_id, ("unknown", None))
+        LLM_CALLS.inc(agent=agent, cache="error")
+
+    def summary(self) -> dict:
+        """Per-agent LLM totals of this run"""
+        with self._lock:
+            return {
+                agent: {
+                    **totals,
+                    "seconds": round(totals["seconds"], 3),
+                    "cost_usd": round(totals["cost_usd"], 6),
+                }
+                for agent, totals in self._usage.items()
+            }
@@ -0,0 +1,25 @@
+try:
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken missing or encoding files unavailable offline
+    _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """Token count of a text (cl100k_base), estimated from length as a fallback"""
+    if _encoding is None:
+        return max(1, len(text) // 4)
+    return len(_encoding.encode(text, disallowed_special=()))
+
+
+def split_tokens(text: str, max_tokens: int) -> list:
+    """Consecutive pieces of text of at most max_tokens tokens each"""
+    if _encoding is None:
+        size = max_tokens * 4
+        return [text[i : i + size] for i in range(0, len(text), size)] or [text]
+    tokens = _encoding.encode(text, disallowed_special=())
+    return [
+        _encoding.decode(tokens[i : i + max_tokens])
+        for i in range(0, len(tokens), max_tokens)
+    ] or [text]
@@ -0,0 +1,323 @@
+import contextvars
+import json
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager, suppress
+from langchain_core.callbacks import BaseCallbackHandler
+from app.config import TRACE_DIR, PROFILE_INTERVAL
+
+_trace = contextvars.ContextVar("trace", default=None)
+_span = contextvars.ContextVar("span", default=None)
+
+# thread id -> {trace id: nesting depth} of the traces each thread is working for
+_thread_traces = {}
+_thread_traces_lock = threading.Lock()
+
+# Leaf frames of threads that are waiting rather than working
+IDLE_FRAMES = {
+    ("threading.py", "wait"),
+    ("threading.py", "_wait_for_tstate_lock"),
+    ("queue.py", "get"),
+    ("selectors.py", "select"),
+    ("thread.py", "_worker"),
+}
+
+
+class Span:
+    """One timed operation of a trace, serialized like an OTLP span"""
+
+    def __init__(self, trace, name: str, parent=None, attributes=None):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes or {})
+        self.thread = threading.current_thread().name
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def end(self, error: BaseException = None):
+        self.end_ns = time.time_ns()
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.trace.add(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent_id,
+            "name": self.name,
+            "start_time_unix_nano": self.start_ns,
+            "end_time_unix_nano": self.end_ns,
+            "duration_ms": round((self.end_ns - self.start_ns) / 1e6, 3),
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+            "thread": self.thread,
+            "attributes": self.attributes,
+        }
+
+
+class Trace:
+    """Finished spans of one request, written to <directory>/<trace_id>.jsonl"""
+
+    def __init__(self, trace_id: str, directory: str):
+        self.trace_id = trace_id
+        self.directory = directory
+        self.spans = []
+        self._lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, f"{self.trace_id}.jsonl")
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def export(self) -> str:
+        os.makedirs(self.directory, exist_ok=True)
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span.start_ns)
+        with open(self.path, "w", encoding="utf-8") as f:
+            for span in spans:
+                f.write(json.dumps(span.to_dict(), default=str) + "\n")
+        return self.path
+
+
+@contextmanager
+def _bind_thread(trace):
+    """Mark the current thread as working for trace (what the profiler samples)"""
+    thread_id = threading.get_ident()
+    with _thread_traces_lock:
+        _thread_traces.setdefault(thread_id, Counter())[trace.trace_id] += 1
+    try:
+        yield
+    finally:
+        with _thread_traces_lock:
+            traces = _thread_traces[thread_id]
+            traces[trace.trace_id] -= 1
+            if traces[trace.trace_id] <= 0:
+                del traces[trace.trace_id]
+            if not traces:
+                del _thread_traces[thread_id]
+
+
+def _bound_threads(trace_id: str):
+    with _thread_traces_lock:
+        return {
+            thread_id
+            for thread_id, traces in _thread_traces.items()
+            if trace_id in traces
+        }
+
+
+def _frame_name(code) -> str:
+    # co_qualname (Class.method) is only available from Python 3.11
+    name = getattr(code, "co_qualname", code.co_name)
+    return f"{name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Samples Python stacks every `interval` seconds and counts them in folded
+    format ("outer;inner count" lines), which flamegraph.pl, speedscope and
+    similar tools render as a flame graph.
+
+    With a trace_id only threads currently working for that trace are
+    sampled: the thread that opened it, and others while they are inside its
+    spans or bind_context() calls. The event loop thread is shared by
+    concurrent async requests, so its samples can include their coroutines.
+    Without a trace_id all other threads of the process are sampled.
+    """
+
+    def __init__(self, interval: float = 0.005, trace_id: str = None):
+        self.interval = interval
+        self.trace_id = trace_id
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            bound = _bound_threads(self.trace_id) if self.trace_id else None
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (
+                    bound is not None and thread_id not in bound
+                ):
+                    continue
+                leaf = (
+                    os.path.basename(frame.f_code.co_filename),
+                    frame.f_code.co_name,
+                )
+                if leaf in IDLE_FRAMES:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame.f_code))
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def write(self, path: str):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def current_trace_id():
+    trace = _trace.get()
+    return trace.trace_id if trace is not None else None
+
+
+@contextmanager
+def trace(name: str, profile: bool = False, **attributes):
+    """
+    Trace a request: spans opened in this context (including threads and
+    tasks started from it) are collected under one trace id and exported on
+    exit. With profile=True the request also runs under the sampling
+    profiler, whose folded stacks are written next to the trace.
+    Tracing is off when TRACE_DIR is empty, unless profiling.
+    """
+    directory = TRACE_DIR or ("traces" if profile else "")
+    if not directory:
+        yield None
+        return
+
+    current = Trace(uuid.uuid4().hex, directory)
+    profiler = SamplingProfiler(PROFILE_INTERVAL, current.trace_id) if profile else None
+    trace_token = _trace.set(current)
+    root = Span(current, name, attributes=attributes)
+    span_token = _span.set(root)
+    if profiler is not None:
+        profiler.start()
+    error = None
+    try:
+        with _bind_thread(current):
+            yield current
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        if profiler is not None:
+            profiler.stop()
+            os.makedirs(directory, exist_ok=True)
+            profiler.write(os.path.join(directory, f"{current.trace_id}.folded"))
+        root.end(error)
+        # An abandoned streaming response may be closed from another context
+        with suppress(ValueError):
+            _span.reset(span_token)
+            _trace.reset(trace_token)
+        current.export()
+
+
+@contextmanager
+def span(name: str, **attributes):
+    """Time a block as a child of the current span (no-op outside a trace)"""
+    current = _trace.get()
+    if current is None:
+        yield None
+        return
+
+    opened = Span(current, name, _span.get(), attributes)
+    token = _span.set(opened)
+    error = None
+    try:
+        with _bind_thread(current):
+            yield opened
+    except BaseException as e:
+        error = e
+        raise
+    finally:
+        with suppress(ValueError):
+            _span.reset(token)
+        opened.end(error)
+
+
+def bind_context(func):
+    """
+    Wrap func to run in a copy of the caller's context, so spans opened in
+    pool threads stay attached to the caller's trace
+    """
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(_call_in_trace, func, *args, **kwargs)
+
+    return run
+
+
+def _call_in_trace(func, *args, **kwargs):
+    current = _trace.get()
+    if current is None:
+        return func(*args, **kwargs)
+    with _bind_thread(current):
+        return func(*args, **kwargs)
+
+
+class TracingCallback(BaseCallbackHandler):
+    """Records each chat model call as a span of the current trace"""
+
+    run_inline = True
+
+    def __init__(self):
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(
+        self, serialized, messages, *, run_id, metadata=None, **kwargs
+    ):
+        current = _trace.get()
+        if current is None:
+            return
+        opened = Span(
+            current,
+            "llm.call",
+            _span.get(),
+            {"agent": (metadata or {}).get("langgraph_node", "unknown")},
+        )
+        with self._lock:
+            self._spans[run_id] = opened
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            opened = self._spans.pop(run_id, None)
+        if opened is None:
+            return
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                if message is None:
+                    continue
+                usage = message.usage_metadata or {}
+                opened.set(
+                    prompt_tokens=usage.get("input_tokens", 0),
+                    completion_tokens=usage.get("output_tokens", 0),
+                    cached=bool(message.response_metadata.get("cached")),
+                )
+        opened.end()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            opened = self._spans.pop(run_id, None)
+        if opened is not None:
+            opened.end(error)